@@ -0,0 +1,134 @@
+# Local load test for the web server transports
+# Compares the JSON/base64 POST endpoint with the binary WebSocket channel
+#
+# Usage (server running on localhost:8080):
+#   python load_test.py --transport both --clients 4 --frames 200 --in_flight 2
+#   python load_test.py --video ../clip.mp4 --transport ws
+
+import argparse
+import base64
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+import cv2
+import numpy as np
+
+from protocol import pack_frame, unpack_result
+
+def load_jpegs(video, count, width, quality):
+    """Encode test frames once up front so encoding cost doesn't skew the numbers"""
+    frames = []
+    if video:
+        cap = cv2.VideoCapture(video)
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+    if not frames:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(10)]
+    jpegs = []
+    for frame in frames:
+        scale = width / frame.shape[1]
+        frame = cv2.resize(frame, (width, int(frame.shape[0] * scale)))
+        _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        jpegs.append(buffer.tobytes())
+    return jpegs
+
+def run_http_client(base_url, jpegs, num_frames, results):
+    """One client doing sequential JSON POSTs, like the original script.js"""
+    session_id = str(uuid.uuid4())
+    latencies, bytes_up, bytes_down, busy = [], 0, 0, 0
+    for i in range(num_frames):
+        payload = json.dumps({'image': 'data:image/jpeg;base64,' + base64.b64encode(jpegs[i % len(jpegs)]).decode()})
+        request = urllib.request.Request(base_url + '/process_frame', data=payload.encode(),
+                                         headers={'Content-Type': 'application/json', 'X-Session-ID': session_id})
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                body = response.read()
+        except urllib.error.HTTPError as e:
+            body = e.read()
+        latencies.append(time.perf_counter() - start)
+        bytes_up += len(payload)
+        bytes_down += len(body)
+        if json.loads(body).get('busy'):
+            busy += 1
+    results.append({'latencies': latencies, 'bytes_up': bytes_up, 'bytes_down': bytes_down, 'busy': busy})
+
+def run_ws_client(base_url, jpegs, num_frames, in_flight, results):
+    """One client on the binary WebSocket channel with up to ``in_flight`` frames outstanding"""
+    import simple_websocket
+    session_id = str(uuid.uuid4())
+    ws = simple_websocket.Client(base_url.replace('http', 'ws', 1) + f'/ws?session={session_id}')
+    sent_at, latencies = {}, []
+    bytes_up = bytes_down = busy = 0
+    next_seq = 0
+    try:
+        while len(latencies) < num_frames:
+            while next_seq < num_frames and next_seq - len(latencies) < in_flight:
+                message = pack_frame(next_seq, jpegs[next_seq % len(jpegs)])
+                sent_at[next_seq] = time.perf_counter()
+                ws.send(message)
+                bytes_up += len(message)
+                next_seq += 1
+            message = ws.receive(timeout=60)
+            if message is None:
+                break
+            seq, header, _ = unpack_result(message)
+            latencies.append(time.perf_counter() - sent_at.pop(seq))
+            bytes_down += len(message)
+            if header.get('busy'):
+                busy += 1
+    finally:
+        ws.close()
+    results.append({'latencies': latencies, 'bytes_up': bytes_up, 'bytes_down': bytes_down, 'busy': busy})
+
+def run_transport(name, target, clients):
+    results, threads = [], []
+    start = time.perf_counter()
+    for _ in range(clients):
+        thread = threading.Thread(target=target, args=(results,))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([l for r in results for l in r['latencies']]) * 1000.0
+    frames = len(latencies)
+    if frames == 0:
+        print(f"{name:>5}: no frames completed")
+        return
+    print(f"{name:>5}: {frames / elapsed:6.1f} FPS total | latency p50 {np.percentile(latencies, 50):6.1f} ms "
+          f"p95 {np.percentile(latencies, 95):6.1f} ms | up {sum(r['bytes_up'] for r in results) / frames / 1024:6.1f} KB/frame "
+          f"down {sum(r['bytes_down'] for r in results) / frames / 1024:6.1f} KB/frame "
+          f"| busy {sum(r['busy'] for r in results)}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the HTTP and WebSocket frame transports')
+    parser.add_argument('--url', type=str, default='http://localhost:8080')
+    parser.add_argument('--transport', type=str, default='both', choices=['http', 'ws', 'both'])
+    parser.add_argument('--clients', type=int, default=1, help='Concurrent simulated clients')
+    parser.add_argument('--frames', type=int, default=100, help='Frames per client')
+    parser.add_argument('--in_flight', type=int, default=2, help='Frames in flight per WebSocket client')
+    parser.add_argument('--video', type=str, default=None, help='Local clip to take frames from')
+    parser.add_argument('--width', type=int, default=416, help='Frame width sent to the server')
+    parser.add_argument('--quality', type=int, default=50, help='JPEG quality of the sent frames')
+    args = parser.parse_args()
+
+    jpegs = load_jpegs(args.video, args.frames, args.width, args.quality)
+    print(f"📊 {args.clients} client(s) x {args.frames} frames, {len(jpegs[0]) / 1024:.1f} KB per JPEG")
+    if args.transport in ('http', 'both'):
+        run_transport('http', lambda results: run_http_client(args.url, jpegs, args.frames, results), args.clients)
+    if args.transport in ('ws', 'both'):
+        run_transport('ws', lambda results: run_ws_client(args.url, jpegs, args.frames, args.in_flight, results), args.clients)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+# Simulated slow network link for testing the client's adaptive quality controller locally
+# Frames and replies are delayed as if they crossed a link with limited bandwidth and a given
+# round-trip time; each direction is serialized, so large frames queue up like on a real uplink.
+
+import random
+import threading
+import time
+
+def parse_link(text):
+    """'KBPS[:RTT_MS[:JITTER_MS]]' -> SimulatedLink, e.g. '2000:80' for 2 Mbit/s with 80 ms RTT"""
+    values = [float(v) for v in text.split(':')]
+    if not 1 <= len(values) <= 3 or values[0] <= 0:
+        raise ValueError(f"Expected KBPS[:RTT_MS[:JITTER_MS]], got '{text}'")
+    return SimulatedLink(*values)
+
+class SimulatedLink:
+    """Delays transfers by serialization time (``bandwidth_kbps``) plus half the RTT and some jitter.
+
+    The server calls :meth:`transfer` after receiving a frame ('up') and before
+    sending the reply ('down'). Time spent here is not part of the processing
+    latency the server reports, so the client sees it as network time.
+    """
+    def __init__(self, bandwidth_kbps, rtt_ms=0.0, jitter_ms=0.0):
+        self.bandwidth_kbps = bandwidth_kbps
+        self.rtt_ms = rtt_ms
+        self.jitter_ms = jitter_ms
+        self._free_at = {'up': 0.0, 'down': 0.0}
+        self._lock = threading.Lock()
+
+    def transfer(self, nbytes, direction):
+        """Block until ``nbytes`` would have crossed the link in ``direction`` ('up' or 'down')"""
+        with self._lock:
+            now = time.perf_counter()
+            # Queue behind earlier transfers in the same direction
+            done = max(now, self._free_at[direction]) + nbytes * 8 / (self.bandwidth_kbps * 1000)
+            self._free_at[direction] = done
+        delay = done - now + (self.rtt_ms / 2 + random.uniform(0, self.jitter_ms)) / 1000
+        time.sleep(delay)
+        return delay
+
+    def __str__(self):
+        return f"{self.bandwidth_kbps:.0f} kbit/s, {self.rtt_ms:.0f} ms RTT, {self.jitter_ms:.0f} ms jitter"
@@ -0,0 +1,28 @@
+# Binary framing for the WebSocket frame transport
+# client → server: [uint32 seq][JPEG bytes]
+# server → client: [uint32 seq][uint32 header length][JSON header][JPEG bytes (may be empty)]
+
+import json
+import struct
+
+_FRAME_HEADER = struct.Struct('>I')
+_RESULT_HEADER = struct.Struct('>II')
+
+def pack_frame(seq, jpeg_bytes):
+    return _FRAME_HEADER.pack(seq) + bytes(jpeg_bytes)
+
+def unpack_frame(message):
+    """Return (seq, memoryview of the JPEG bytes)"""
+    (seq,) = _FRAME_HEADER.unpack_from(message, 0)
+    return seq, memoryview(message)[_FRAME_HEADER.size:]
+
+def pack_result(seq, header, jpeg_bytes=b''):
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    return _RESULT_HEADER.pack(seq, len(header_bytes)) + header_bytes + bytes(jpeg_bytes)
+
+def unpack_result(message):
+    """Return (seq, header dict, JPEG bytes)"""
+    seq, header_len = _RESULT_HEADER.unpack_from(message, 0)
+    start = _RESULT_HEADER.size
+    header = json.loads(bytes(message[start:start + header_len]).decode('utf-8'))
+    return seq, header, bytes(message[start + header_len:])
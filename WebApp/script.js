@@ -1,4 +1,106 @@
 // Modern Person Tracker - Optimized JavaScript
+
+// Closed-loop stream quality: picks the size and JPEG quality of the frames sent to the
+// server and how many may be in flight, aiming for a target capture-to-result latency.
+// Inputs are the measured end-to-end latency plus the processing latency and queue
+// pressure the server reports with every reply ('server' in the response header).
+class QualityController {
+    constructor(targetLatency = 250) {
+        this.targetLatency = targetLatency;             // ms, capture to result
+        this.sizes = [240, 320, 416, 512, 640, 800, 960, 1280];   // longest side in px
+        this.qualities = [0.3, 0.4, 0.5, 0.6, 0.7, 0.8];
+        this.sizeIndex = 2;       // 416px
+        this.qualityIndex = 2;    // 0.5
+        this.inFlight = 1;
+        this.maxInFlight = 1;     // raised on the WebSocket transport
+        this.maxSize = Infinity;  // camera's native longest side
+        this.latency = null;      // moving averages (ms)
+        this.serverLatency = null;
+        this.pressure = 0;
+        this.samples = 0;
+        this.lastChange = 0;
+        this.downInterval = 1000; // react quickly to congestion...
+        this.upInterval = 3000;   // ...and probe for headroom slowly
+    }
+
+    get maxDimension() {
+        return Math.min(this.sizes[this.sizeIndex], this.maxSize);
+    }
+
+    get quality() {
+        return this.qualities[this.qualityIndex];
+    }
+
+    setTransport(maxInFlight) {
+        this.maxInFlight = maxInFlight;
+        this.inFlight = Math.min(Math.max(this.inFlight, 2), maxInFlight);
+    }
+
+    setNativeSize(width, height) {
+        // Never send more pixels than the camera delivers
+        this.maxSize = Math.max(width, height);
+        while (this.sizeIndex > 0 && this.sizes[this.sizeIndex] > this.maxSize) {
+            this.sizeIndex--;
+        }
+    }
+
+    // Feed one reply; returns true when a setting changed
+    report(latency, server) {
+        const smooth = (average, value) => average === null ? value : average * 0.8 + value * 0.2;
+        this.latency = smooth(this.latency, latency);
+        this.serverLatency = smooth(this.serverLatency, server.latency_ms);
+        this.pressure = server.pressure;
+        this.samples++;
+        return this.adjust(performance.now());
+    }
+
+    // The server rejected a frame: back off right away
+    busy() {
+        this.pressure = 1;
+        return this.adjust(performance.now(), true);
+    }
+
+    adjust(now, force = false) {
+        if (!force && this.samples < 5) return false;
+        const network = Math.max(0, this.latency - this.serverLatency);
+        if (this.pressure >= 0.9 || this.latency > this.targetLatency * 1.2) {
+            if (now - this.lastChange < this.downInterval) return false;
+            if (this.pressure >= 0.5 && this.inFlight > 1) {
+                this.inFlight--;           // frames are queueing on the server
+            } else if (network > this.serverLatency && this.qualityIndex > 0) {
+                this.qualityIndex--;       // link-bound: fewer bytes per frame
+            } else if (this.sizeIndex > 0) {
+                this.sizeIndex--;          // fewer pixels to send, decode and scan
+            } else if (this.qualityIndex > 0) {
+                this.qualityIndex--;
+            } else {
+                return false;
+            }
+        } else if (this.latency < this.targetLatency * 0.7 && this.pressure < 0.5) {
+            if (now - this.lastChange < this.upInterval) return false;
+            if (this.sizeIndex + 1 < this.sizes.length && this.sizes[this.sizeIndex + 1] <= this.maxSize) {
+                this.sizeIndex++;          // detail first: small and distant persons
+            } else if (this.qualityIndex + 1 < this.qualities.length) {
+                this.qualityIndex++;
+            } else if (this.inFlight < this.maxInFlight) {
+                this.inFlight++;           // then throughput
+            } else {
+                return false;
+            }
+        } else {
+            return false;
+        }
+        this.lastChange = now;
+        this.samples = 0;
+        return true;
+    }
+
+    describe() {
+        const latency = this.latency === null ? '-' : Math.round(this.latency);
+        return `${this.maxDimension}px · q${Math.round(this.quality * 100)} · ×${this.inFlight} · ${latency} ms`;
+    }
+}
+
 class PersonTracker {
     constructor() {
         this.video = document.getElementById('video');
@@ -11,9 +113,29 @@ class PersonTracker {
         // AI Processing state
         this.isAIProcessing = false;
         this.lastProcessedFrame = null;
-        this.maxConcurrentRequests = 1;
         this.activeRequests = 0;
         
+        // Adaptive frame size, JPEG quality and frames in flight (?target_latency=<ms> to override)
+        const targetLatency = Number(new URLSearchParams(window.location.search).get('target_latency')) || 250;
+        this.quality = new QualityController(targetLatency);
+        this.aiCanvas = document.createElement('canvas');
+        this.sentAt = new Map();
+        
+        // Per-client session so the server keeps separate tracker state for this device
+        this.sessionId = (window.crypto && crypto.randomUUID) ? crypto.randomUUID() : Math.random().toString(36).slice(2);
+        this.busyUntil = 0;
+        
+        // Binary WebSocket transport (falls back to JSON POST /process_frame)
+        this.socket = null;
+        this.useWebSocket = false;
+        this.maxFramesInFlight = 3;
+        this.frameSeq = 0;
+        
+        // 'metadata': server returns tracks only and overlays are drawn here on the live video
+        // 'image': server returns the annotated JPEG
+        this.renderMode = 'metadata';
+        this.lastResult = null;
+        
         // UI elements
         this.startBtn = document.getElementById('startButton');
         this.stopBtn = document.getElementById('stopButton');
@@ -83,12 +205,12 @@ class PersonTracker {
             this.showLoading(true);
             this.updateStatus('Requesting camera access...', 'Starting');
             
-            // Request camera with optimized settings for performance
+            // Request up to 720p; the quality controller picks the size actually sent
             const constraints = {
                 video: {
                     facingMode: 'user',
-                    width: { ideal: 640, max: 1280 }, // Reduced resolution for better performance
-                    height: { ideal: 480, max: 720 },
+                    width: { ideal: 1280, max: 1280 },
+                    height: { ideal: 720, max: 720 },
                     frameRate: { ideal: 30, max: 30 }
                 }
             };
@@ -101,6 +223,7 @@ class PersonTracker {
             
             this.video.play();
             this.setCanvasDimensions();
+            this.quality.setNativeSize(this.video.videoWidth, this.video.videoHeight);
             
             this.showLoading(false);
             this.isProcessing = true;
@@ -115,6 +238,7 @@ class PersonTracker {
             this.serverFPS = 0;
             
             // Start the optimized processing loops
+            this.connectWebSocket();
             this.startVideoLoop();
             this.startAILoop();
             
@@ -179,6 +303,7 @@ class PersonTracker {
             await this.waitForVideoReady();
             this.video.play();
             this.setCanvasDimensions();
+            this.quality.setNativeSize(this.video.videoWidth, this.video.videoHeight);
             
             this.showLoading(false);
             this.isProcessing = true;
@@ -187,6 +312,7 @@ class PersonTracker {
             this.startBtn.disabled = true;
             this.stopBtn.disabled = false;
             
+            this.connectWebSocket();
             this.startVideoLoop();
             this.startAILoop();
             
@@ -208,8 +334,17 @@ class PersonTracker {
             cancelAnimationFrame(this.animationId);
             this.animationId = null;
         }
+        
+        if (this.socket) {
+            const socket = this.socket;
+            this.socket = null;
+            this.useWebSocket = false;
+            socket.close();
+        }
           this.isProcessing = false;
         this.activeRequests = 0;
+        this.sentAt.clear();
+        this.lastResult = null;
         this.serverFPS = 0; // Reset server FPS
         this.ctx.clearRect(0, 0, this.canvas.width, this.canvas.height);
         
@@ -226,7 +361,13 @@ class PersonTracker {
             if (!this.isProcessing) return;
 
             // Always show live video for smooth display
-            if (this.lastProcessedFrame) {
+            if (this.renderMode === 'metadata') {
+                // Live video with the latest detections drawn on top
+                this.ctx.drawImage(this.video, 0, 0, this.canvas.width, this.canvas.height);
+                if (this.lastResult) {
+                    this.drawOverlay(this.lastResult);
+                }
+            } else if (this.lastProcessedFrame) {
                 // Show processed frame with detections
                 this.displayProcessedFrame(this.lastProcessedFrame);
             } else {
@@ -247,9 +388,13 @@ class PersonTracker {
         const aiLoop = async () => {
             if (!this.isProcessing) return;
 
-            // Process AI immediately if not already processing
-            if (this.activeRequests < this.maxConcurrentRequests) {
-                this.processFrameWithAI();
+            // Process AI immediately if not already processing (and the server isn't asking us to back off)
+            if (this.activeRequests < this.quality.inFlight && performance.now() >= this.busyUntil) {
+                if (this.useWebSocket) {
+                    this.sendFrameOverSocket();
+                } else {
+                    this.processFrameWithAI();
+                }
             }
 
             // Continue AI loop as fast as possible
@@ -259,61 +404,201 @@ class PersonTracker {
         aiLoop();
     }
 
+    connectWebSocket() {
+        if (!('WebSocket' in window)) return;
+        
+        const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
+        const socket = new WebSocket(`${protocol}://${window.location.host}/ws?session=${encodeURIComponent(this.sessionId)}&mode=${this.renderMode}`);
+        socket.binaryType = 'arraybuffer';
+        
+        socket.onopen = () => {
+            if (!this.isProcessing) {
+                socket.close();
+                return;
+            }
+            this.socket = socket;
+            this.useWebSocket = true;
+            this.activeRequests = 0;
+            this.quality.setTransport(this.maxFramesInFlight);
+            console.log('🔌 Binary WebSocket transport connected');
+        };
+        socket.onmessage = (event) => this.handleSocketResult(event.data);
+        socket.onclose = () => {
+            if (this.socket === socket) {
+                // Fall back to the JSON endpoint
+                console.warn('WebSocket closed, falling back to HTTP transport');
+                this.socket = null;
+                this.useWebSocket = false;
+                this.activeRequests = 0;
+                this.sentAt.clear();
+                this.quality.setTransport(1);
+            }
+        };
+    }
+
+    captureAICanvas() {
+        // Downscale to the controller's current size (never upscale); the server processes
+        // frames at the size they arrive in
+        const aiCanvas = this.aiCanvas;
+        const scale = Math.min(1, this.quality.maxDimension / Math.max(this.video.videoWidth, this.video.videoHeight));
+        const width = Math.floor(this.video.videoWidth * scale);
+        const height = Math.floor(this.video.videoHeight * scale);
+        if (aiCanvas.width !== width || aiCanvas.height !== height) {
+            aiCanvas.width = width;
+            aiCanvas.height = height;
+        }
+        
+        const aiCtx = aiCanvas.getContext('2d');
+        aiCtx.drawImage(this.video, 0, 0, aiCanvas.width, aiCanvas.height);
+        return aiCanvas;
+    }
+
+    recordLatency(sentAt, header) {
+        // End-to-end latency (capture, encode, upload, server, download) for the quality controller
+        if (sentAt === undefined || !header.server) return;
+        if (this.quality.report(performance.now() - sentAt, header.server)) {
+            this.onQualityChange();
+        }
+    }
+
+    onQualityChange() {
+        console.log(`📶 Stream quality: ${this.quality.describe()}`);
+        this.updateStatus(`AI detection active · ${this.quality.describe()}`);
+    }
+
+    async sendFrameOverSocket() {
+        this.activeRequests++;
+        const seq = this.frameSeq++;
+        this.sentAt.set(seq, performance.now());
+        
+        try {
+            // Raw JPEG bytes prefixed with a 4-byte sequence number - no base64, no JSON
+            const aiCanvas = this.captureAICanvas();
+            const blob = await new Promise(resolve => aiCanvas.toBlob(resolve, 'image/jpeg', this.quality.quality));
+            const jpeg = new Uint8Array(await blob.arrayBuffer());
+            const message = new Uint8Array(4 + jpeg.byteLength);
+            new DataView(message.buffer).setUint32(0, seq);
+            message.set(jpeg, 4);
+            
+            if (!this.socket || this.socket.readyState !== WebSocket.OPEN) {
+                throw new Error('WebSocket not open');
+            }
+            this.socket.send(message.buffer);
+        } catch (error) {
+            this.activeRequests = Math.max(0, this.activeRequests - 1);
+            this.sentAt.delete(seq);
+            console.error('Error sending frame:', error);
+        }
+    }
+
+    async handleSocketResult(data) {
+        this.activeRequests = Math.max(0, this.activeRequests - 1);
+        
+        // [uint32 seq][uint32 header length][JSON header][JPEG bytes]
+        const view = new DataView(data);
+        const seq = view.getUint32(0);
+        const headerLength = view.getUint32(4);
+        const header = JSON.parse(new TextDecoder().decode(new Uint8Array(data, 8, headerLength)));
+        const sentAt = this.sentAt.get(seq);
+        this.sentAt.delete(seq);
+        
+        if (!header.success) {
+            if (header.busy) {
+                this.busyUntil = performance.now() + 500;
+                this.statusSpan.textContent = 'Busy';
+                if (this.quality.busy()) {
+                    this.onQualityChange();
+                }
+            } else {
+                console.error('Processing error:', header.error);
+                this.updateStatus('Processing error occurred', 'Error');
+            }
+            return;
+        }
+        
+        this.recordLatency(sentAt, header);
+        if (header.result) {
+            // Metadata mode - nothing to decode, the overlay is drawn by the video loop
+            this.lastResult = header.result;
+            this.applyResultStats(header);
+            return;
+        }
+        
+        const jpeg = new Blob([new Uint8Array(data, 8 + headerLength)], { type: 'image/jpeg' });
+        const bitmap = await createImageBitmap(jpeg);
+        if (this.lastProcessedFrame instanceof ImageBitmap) {
+            this.lastProcessedFrame.close();
+        }
+        this.lastProcessedFrame = bitmap;
+        this.applyResultStats(header);
+    }
+
+    applyResultStats(result) {
+        // Update server FPS
+        if (result.fps !== undefined) {
+            this.serverFPS = result.fps;
+        }
+        
+        // Update stats
+        if (result.total_persons !== undefined) {
+            this.personsSpan.textContent = result.total_persons;
+        }
+        
+        // Update status based on detection
+        if (result.total_persons > 0) {
+            this.statusSpan.textContent = 'Detecting';
+        } else {
+            this.statusSpan.textContent = 'Active';
+        }
+    }
+
     async processFrameWithAI() {
-        if (this.activeRequests >= this.maxConcurrentRequests) return;
+        if (this.activeRequests >= this.quality.inFlight) return;
 
         this.activeRequests++;
+        const sentAt = performance.now();
 
         try {
-            // Create smaller canvas for AI processing to improve performance
-            const aiCanvas = document.createElement('canvas');
-            const maxDimension = 416; // Smaller size for faster processing
-            const scale = Math.min(maxDimension / this.video.videoWidth, maxDimension / this.video.videoHeight);
+            const aiCanvas = this.captureAICanvas();
             
-            aiCanvas.width = Math.floor(this.video.videoWidth * scale);
-            aiCanvas.height = Math.floor(this.video.videoHeight * scale);
-            
-            const aiCtx = aiCanvas.getContext('2d');
-            aiCtx.drawImage(this.video, 0, 0, aiCanvas.width, aiCanvas.height);
-            
-            // Convert to base64 with lower quality for faster transfer
-            const imageData = aiCanvas.toDataURL('image/jpeg', 0.5);
+            // Convert to base64 at the controller's JPEG quality
+            const imageData = aiCanvas.toDataURL('image/jpeg', this.quality.quality);
 
             // Send frame to server for processing (non-blocking)
             const response = await fetch('/process_frame', {
                 method: 'POST',
                 headers: { 
                     'Content-Type': 'application/json',
-                    'Cache-Control': 'no-cache'
+                    'Cache-Control': 'no-cache',
+                    'X-Session-ID': this.sessionId
                 },
-                body: JSON.stringify({ image: imageData })
+                body: JSON.stringify({ image: imageData, mode: this.renderMode })
             });
 
+            if (response.status === 503) {
+                // Server is at capacity - back off briefly instead of piling up requests
+                this.busyUntil = performance.now() + 500;
+                this.statusSpan.textContent = 'Busy';
+                if (this.quality.busy()) {
+                    this.onQualityChange();
+                }
+                return;
+            }
+
             if (!response.ok) {
                 throw new Error(`Server error: ${response.status}`);
             }
 
             const result = await response.json();
+            this.recordLatency(sentAt, result);
               if (result.success) {
-                // Store the latest processed frame
-                this.lastProcessedFrame = result.processed_image;
-                
-                // Update server FPS
-                if (result.fps !== undefined) {
-                    this.serverFPS = result.fps;
-                }
-                
-                // Update stats
-                if (result.total_persons !== undefined) {
-                    this.personsSpan.textContent = result.total_persons;
-                }
-                
-                // Update status based on detection
-                if (result.total_persons > 0) {
-                    this.statusSpan.textContent = 'Detecting';
+                // Store the latest processed frame (or tracks in metadata mode)
+                if (result.result) {
+                    this.lastResult = result.result;
                 } else {
-                    this.statusSpan.textContent = 'Active';
+                    this.lastProcessedFrame = result.processed_image;
                 }
+                this.applyResultStats(result);
                 
             } else {
                 console.error('Processing error:', result.error);
@@ -333,7 +618,54 @@ class PersonTracker {
         }
     }
 
+    drawOverlay(result) {
+        // Server coordinates are in the processed frame size - scale them to the canvas
+        const [frameWidth, frameHeight] = result.frame_size;
+        const sx = this.canvas.width / frameWidth;
+        const sy = this.canvas.height / frameHeight;
+        const ctx = this.ctx;
+        const fontSize = Math.max(12, Math.round(18 * sy));
+        
+        ctx.save();
+        ctx.lineWidth = 2;
+        ctx.font = `${fontSize}px Inter, sans-serif`;
+        
+        for (const track of result.tracks) {
+            const [x1, y1, x2, y2] = track.box;
+            ctx.strokeStyle = ctx.fillStyle = '#ff0000';
+            ctx.strokeRect(x1 * sx, y1 * sy, (x2 - x1) * sx, (y2 - y1) * sy);
+            ctx.fillText(`ID: ${track.id}`, x1 * sx, y1 * sy - 8);
+            
+            if (track.trail.length > 1) {
+                ctx.strokeStyle = 'rgb(230, 230, 230)';
+                ctx.beginPath();
+                track.trail.forEach(([x, y], i) => i ? ctx.lineTo(x * sx, y * sy) : ctx.moveTo(x * sx, y * sy));
+                ctx.stroke();
+            }
+        }
+        
+        ctx.strokeStyle = ctx.fillStyle = '#00ff00';
+        for (const track of result.tracks) {
+            const faces = track.emotion ? track.faces.concat([track.emotion.face]) : track.faces;
+            for (const [fx1, fy1, fx2, fy2] of faces) {
+                ctx.strokeRect(fx1 * sx, fy1 * sy, (fx2 - fx1) * sx, (fy2 - fy1) * sy);
+                ctx.fillText('Face', fx1 * sx, fy1 * sy - 8);
+            }
+            if (track.emotion) {
+                const [fx1, , , fy2] = track.emotion.face;
+                const label = `Emotion: ${track.emotion.label} (${Math.round(track.emotion.confidence * 100)}%)`;
+                ctx.fillText(label, fx1 * sx, fy2 * sy + fontSize + 4);
+            }
+        }
+        ctx.restore();
+    }
+
     displayProcessedFrame(processedImageData) {
+        if (processedImageData instanceof ImageBitmap) {
+            // Decoded binary frame from the WebSocket transport
+            this.ctx.drawImage(processedImageData, 0, 0, this.canvas.width, this.canvas.height);
+            return;
+        }
         if (!this.processedImage || this.processedImage.src !== processedImageData) {
             this.processedImage = new Image();
             this.processedImage.onload = () => {
@@ -1,5 +1,14 @@
-from flask import Flask, send_from_directory, request, jsonify
+import time
+LAUNCH_TIME = time.perf_counter()  # for /health: import time and time to first frame
+
+from flask import Flask, Response, send_from_directory, request, jsonify
+from flask_sock import Sock
+import argparse
+import functools
 import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import cv2
 import numpy as np
 import base64
@@ -9,30 +18,49 @@ import sys
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(os.path.abspath(os.path.join(current_dir, '..')))
 
-from ultralytics import YOLO
-from fer import FER
-from engine import PersonTrackerEngine
+from backends import BACKENDS, MODEL_VARIANTS
+from metrics import NULL_METRICS
+from model_loader import LazyModel, load_model_set, preload
+from netsim import parse_link
+from sessions import SessionManager, ServerBusyError
+from protocol import unpack_frame, pack_result
+IMPORT_SECONDS = time.perf_counter() - LAUNCH_TIME
 
 app = Flask(__name__)
+sock = Sock(app)
+
+def load_models(backend='ultralytics', intra_op_threads=0, model_variant='fp32', emotions=True):
+    """One set of lazily loaded models for a session worker (see model_loader.py)"""
+    return load_model_set(backend, intra_op_threads, model_variant, emotions=emotions)
+
+# Per-client sessions sharing a pool of model workers (configured in __main__)
+session_manager = None
+# Optional netsim.SimulatedLink (--simulate_link) for testing the client's rate controller locally
+link = None
 
-models_dir = os.path.join(current_dir, '..', 'models')
+def get_session_manager():
+    global session_manager
+    if session_manager is None:
+        # frame_size=None: process frames at the client's (adaptive) capture size
+        session_manager = SessionManager(load_models, engine_kwargs={'conf': 0.4, 'emotion_interval': 1.0,
+                                                                     'frame_size': None})
+    return session_manager
 
-# Load models
-person_model_path = os.path.join(models_dir, 'yolov8n.onnx')
-face_model_path = os.path.join(models_dir, 'yolov8n-face-lindevs.onnx')
+def simulate_link(nbytes, direction):
+    if link is not None:
+        link.transfer(nbytes, direction)
 
-person_model = YOLO(person_model_path, task='detect')
-face_model = YOLO(face_model_path, task='detect')
-emotion_detector = FER()
+def server_status(manager, session_id, start, busy=False):
+    """Processing latency and worker queue pressure, sent with every reply for the client's rate controller"""
+    status = manager.load(session_id)
+    if busy:
+        status['pressure'] = 1.0
+    status['latency_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    return status
 
-# Initialize tracking and emotion detection engine
-person_tracker_engine = PersonTrackerEngine(
-    person_model=person_model,
-    face_model=face_model,
-    emotion_detector=emotion_detector,
-    conf=0.4,
-    emotion_interval=1.0
-)
+def get_session_id():
+    """Client-generated session ID, falling back to the remote address"""
+    return request.headers.get('X-Session-ID') or request.remote_addr
 
 # Serve the index.html file
 @app.route('/')
@@ -45,31 +73,249 @@ def static_files(path):
     return send_from_directory(os.path.dirname(__file__), path)
 
 # Process video frames sent from the client and return the processed image
+# (or, with "mode": "metadata", only the tracks so the client draws the overlay)
 @app.route('/process_frame', methods=['POST'])
 def process_frame():
+    session_id = get_session_id()
+    simulate_link(request.content_length or 0, 'up')
+    payload, status = process_json_frame(session_id, time.perf_counter())
+    reply = jsonify(payload)
+    simulate_link(len(reply.get_data()), 'down')
+    return reply, status
+
+def process_json_frame(session_id, start):
+    """Returns (JSON payload, HTTP status) for one /process_frame request"""
+    manager = get_session_manager()
     try:
         # Decode the image from the request
         data = request.json['image']
+        metadata_only = request.json.get('mode') == 'metadata'
         image_data = base64.b64decode(data.split(',')[1])
         np_image = np.frombuffer(image_data, np.uint8)
-        frame = cv2.imdecode(np_image, cv2.IMREAD_COLOR)
+        with manager.metrics.stage('decode'):
+            frame = cv2.imdecode(np_image, cv2.IMREAD_COLOR)
+
+        # Run the frame through this client's session
+        draw_frame, result = manager.process(session_id, frame, render=not metadata_only)
 
-        # Call the PersonTrackerEngine process_frame method
-        draw_frame, person_emotions, last_emotion_time, current_fps, total_persons = person_tracker_engine.process_frame(frame)
+        if metadata_only:
+            return {
+                'success': True,
+                'result': result,
+                'fps': result['fps'],
+                'total_persons': result['total_persons'],
+                'server': server_status(manager, session_id, start)
+            }, 200
 
         # Encode the processed frame to send back to the client
-        _, buffer = cv2.imencode('.jpg', draw_frame)
+        with manager.metrics.stage('encode'):
+            _, buffer = cv2.imencode('.jpg', draw_frame)
         processed_image = base64.b64encode(buffer).decode('utf-8')
 
-        return jsonify({ 
-            'success': True, 
+        return {
+            'success': True,
             'processed_image': f'data:image/jpeg;base64,{processed_image}',
-            'fps': current_fps,
-            'total_persons': total_persons
-        })
+            'fps': result['fps'],
+            'total_persons': result['total_persons'],
+            'server': server_status(manager, session_id, start)
+        }, 200
+    except ServerBusyError as e:
+        # Reject quickly instead of queueing without bound
+        return {'success': False, 'busy': True, 'error': str(e),
+                'server': server_status(manager, session_id, start, busy=True)}, 503
     except Exception as e:
-        return jsonify({ 'success': False, 'error': str(e) })
+        return {'success': False, 'error': str(e)}, 200
+
+def socket_reply(manager, session_id, message, metadata_only, reservation, start):
+    """Decode, process and encode one binary /ws frame; returns the packed reply"""
+    # A malformed message is answered like any other failed frame instead of closing the socket
+    seq = 0
+    try:
+        try:
+            seq, jpeg = unpack_frame(message)
+            with manager.metrics.stage('decode'):
+                frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+            if frame is None:
+                raise ValueError('Could not decode the JPEG frame')
+        except Exception:
+            if reservation is not None:
+                manager.release(reservation)
+            raise
+        draw_frame, result = manager.process(session_id, frame, render=not metadata_only, reservation=reservation)
+        header = {'success': True, 'fps': result['fps'], 'total_persons': result['total_persons']}
+        if metadata_only:
+            header['result'] = result
+            buffer = b''
+        else:
+            with manager.metrics.stage('encode'):
+                _, buffer = cv2.imencode('.jpg', draw_frame)
+        header['server'] = server_status(manager, session_id, start)
+        return pack_result(seq, header, buffer)
+    except ServerBusyError as e:
+        return pack_result(seq, {'success': False, 'busy': True, 'error': str(e),
+                                 'server': server_status(manager, session_id, start, busy=True)})
+    except Exception as e:
+        return pack_result(seq, {'success': False, 'error': str(e)})
+
+def send_replies(ws, replies, in_flight):
+    """Send finished replies in arrival order until a None arrives"""
+    connected = True
+    while True:
+        future = replies.get()
+        if future is None:
+            return
+        reply = future.result()
+        try:
+            if connected:
+                simulate_link(len(reply), 'down')
+                ws.send(reply)
+        except Exception:
+            # Client went away: keep draining so the remaining frames release their slots
+            connected = False
+        finally:
+            in_flight.release()
+
+# Persistent binary channel: raw JPEG frames in, raw JPEG + small JSON header out.
+# With ?mode=metadata the reply is the JSON header only, carrying the tracks.
+# The client may keep up to SOCKET_IN_FLIGHT frames in flight. They are decoded, processed and
+# encoded concurrently, so one client's stages overlap: the session's reservations keep the
+# frames in arrival order through the models, and the replies are sent in that order too.
+# Every header carries a 'server' entry with processing latency and queue pressure.
+SOCKET_IN_FLIGHT = 3
+
+@sock.route('/ws')
+def frame_socket(ws):
+    session_id = request.args.get('session') or get_session_id()
+    metadata_only = request.args.get('mode') == 'metadata'
+    manager = get_session_manager()
+    replies = queue.Queue()
+    # Reading blocks while SOCKET_IN_FLIGHT frames are unanswered, which pushes back on the client
+    in_flight = threading.BoundedSemaphore(SOCKET_IN_FLIGHT)
+    sender = threading.Thread(target=send_replies, args=(ws, replies, in_flight), name='ws-sender', daemon=True)
+    sender.start()
+    try:
+        with ThreadPoolExecutor(max_workers=SOCKET_IN_FLIGHT, thread_name_prefix='ws-frame') as pool:
+            while True:
+                message = ws.receive()
+                if message is None:
+                    break
+                if isinstance(message, str):
+                    continue
+                simulate_link(len(message), 'up')
+                start = time.perf_counter()
+                try:
+                    reservation = manager.reserve(session_id)
+                except ServerBusyError:
+                    # process() raises (and counts) the same rejection on the frame's own thread
+                    reservation = None
+                in_flight.acquire()
+                replies.put(pool.submit(socket_reply, manager, session_id, message, metadata_only,
+                                        reservation, start))
+    finally:
+        replies.put(None)
+        sender.join()
+
+# Per-stage latency quantiles and frame/person/face/emotion/drop counters
+# (Prometheus text format; ?format=json for the same numbers as JSON)
+@app.route('/metrics')
+def metrics_endpoint():
+    manager_metrics = get_session_manager().metrics
+    if request.args.get('format') == 'json':
+        return jsonify(manager_metrics.snapshot())
+    return Response(manager_metrics.prometheus(), mimetype='text/plain; version=0.0.4')
+
+# Liveness: the process is up and serving requests (models may still be loading)
+@app.route('/health')
+def health():
+    return jsonify({'status': 'ok', 'uptime_s': round(time.perf_counter() - LAUNCH_TIME, 1),
+                    'import_s': round(IMPORT_SECONDS, 3)})
+
+def model_status(worker):
+    """Load state of a worker's models; models not created through model_loader are loaded already"""
+    models = {}
+    for role, model in zip(('person', 'face', 'emotion'), worker.models()):
+        if isinstance(model, LazyModel):
+            models[f"worker{worker.index}/{model.name}"] = model.status()
+        elif model is not None:
+            models[f"worker{worker.index}/{role}"] = {'loaded': True, 'load_seconds': None, 'error': None}
+    return models
+
+# Readiness: 200 once every enabled model of every worker is loaded, 503 until then
+@app.route('/ready')
+def ready():
+    manager = get_session_manager()
+    models = {}
+    for worker in manager.workers:
+        models.update(model_status(worker))
+    is_ready = all(status['loaded'] for status in models.values())
+    first_frame = manager.first_frame_time
+    return jsonify({
+        'ready': is_ready,
+        'models': models,
+        'import_s': round(IMPORT_SECONDS, 3),
+        'first_frame_s': round(first_frame - LAUNCH_TIME, 3) if first_frame is not None else None,
+    }), 200 if is_ready else 503
+
+# Active sessions, worker assignment and pipeline statistics
+@app.route('/sessions')
+def sessions_stats():
+    return jsonify(get_session_manager().stats())
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Person Tracker web server')
+    parser.add_argument('--workers', type=int, default=2,
+                        help='Number of model worker threads (each loads its own set of models)')
+    parser.add_argument('--max_pending', type=int, default=2,
+                        help='Frames allowed in flight per worker before clients get a busy response')
+    parser.add_argument('--max_sessions', type=int, default=64,
+                        help='Maximum number of concurrent client sessions')
+    parser.add_argument('--session_timeout', type=float, default=60.0,
+                        help='Seconds of inactivity before a session and its tracker state are evicted')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Process frames on each worker through the threaded stage pipeline')
+    parser.add_argument('--queue_size', type=int, default=4,
+                        help='Bounded queue size between pipeline stages')
+    parser.add_argument('--detect_interval', type=int, default=1,
+                        help='Maximum frames between person-detector keyframes per session (adaptive)')
+    parser.add_argument('--backend', type=str, default='ultralytics', choices=BACKENDS,
+                        help='Inference backend for the ONNX detectors')
+    parser.add_argument('--intra_op_threads', type=int, default=0,
+                        help='ONNX Runtime intra-op threads per worker (0 = runtime default)')
+    parser.add_argument('--model_variant', type=str, default='fp32', choices=MODEL_VARIANTS,
+                        help='ONNX model variant produced by convert_models.py')
+    parser.add_argument('--no_metrics', action='store_true',
+                        help='Disable per-stage instrumentation (/metrics stays empty)')
+    parser.add_argument('--no_emotions', action='store_true',
+                        help='Disable emotion recognition (FER/TensorFlow are never imported)')
+    parser.add_argument('--no_preload', action='store_true',
+                        help='Load models on the first request instead of in the background at startup')
+    parser.add_argument('--fixed_resolution', action='store_true',
+                        help='Resize every frame to 1280x720 instead of processing it at the client\'s capture size')
+    parser.add_argument('--simulate_link', type=str, default=None, metavar='KBPS[:RTT_MS[:JITTER_MS]]',
+                        help='Delay frames and replies like a slow network link (e.g. 2000:80)')
+    args = parser.parse_args()
+
+    if args.simulate_link:
+        link = parse_link(args.simulate_link)
+        print(f"🐢 Simulating a slow link: {link}")
+
+    session_manager = SessionManager(
+        functools.partial(load_models, args.backend, args.intra_op_threads, args.model_variant,
+                          not args.no_emotions),
+        workers=args.workers,
+        max_pending=args.max_pending,
+        max_sessions=args.max_sessions,
+        session_timeout=args.session_timeout,
+        pipeline=args.pipeline,
+        queue_size=args.queue_size,
+        engine_kwargs={'conf': 0.4, 'emotion_interval': 1.0, 'detect_interval': args.detect_interval,
+                       'frame_size': (1280, 720) if args.fixed_resolution else None},
+        metrics=NULL_METRICS if args.no_metrics else None
+    )
+    if not args.no_preload:
+        # Serve /health right away; /ready turns 200 once the preload finishes
+        print(f"🚀 Loading models for {args.workers} worker(s) in the background...")
+        preload([model for worker in session_manager.workers for model in worker.models()])
+
     # Run the server on port 8080 for easy Cloudflare Tunnel integration
-    app.run(host='0.0.0.0', port=8080)
+    app.run(host='0.0.0.0', port=8080, threaded=True)
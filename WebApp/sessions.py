@@ -0,0 +1,242 @@
+# Per-client sessions for the web server
+# Each session owns its own tracker state; sessions share a small pool of model workers
+
+import threading
+import time
+
+from engine import PersonTrackerEngine, create_tracker
+from metrics import Metrics
+from pipeline import FramePipeline
+from renderer import draw_result
+
+class ServerBusyError(Exception):
+    """Raised when a request cannot be admitted without unbounded queueing"""
+
+class ModelWorker:
+    """One set of models shared by the sessions assigned to it.
+
+    At most ``max_pending`` frames may be in flight on a worker; anything beyond
+    that is rejected immediately so latency stays predictable under load.
+    """
+    def __init__(self, index, models, max_pending=2, pipeline=False, queue_size=4):
+        self.index = index
+        self.person_model, self.face_model, self.emotion_detector = models
+        self.sessions = 0
+        self.max_pending = max(1, max_pending)
+        self.pending = 0
+        self._pending_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self.pipeline = FramePipeline(None, queue_size=queue_size, policy='block').start() if pipeline else None
+
+    def models(self):
+        return (self.person_model, self.face_model, self.emotion_detector)
+
+    def process(self, session, ticket, frame, render=True, timeout=30.0):
+        """Returns (draw_frame, result); draw_frame is None when ``render`` is False.
+
+        ``ticket`` comes from :meth:`Session.take_ticket`; frames of one session
+        enter the worker in ticket order, since a plain lock does not hand itself
+        to waiting threads in order.
+        """
+        if not self._slots.acquire(blocking=False):
+            session.skip_turn(ticket)
+            raise ServerBusyError(f"Worker {self.index} is at capacity")
+        with self._pending_lock:
+            self.pending += 1
+        try:
+            if not session.wait_turn(ticket, timeout):
+                raise ServerBusyError(f"Worker {self.index} timed out")
+            try:
+                if self.pipeline is not None:
+                    # The pipeline keeps submission order from here on
+                    future = self.pipeline.submit(frame, engine=session.engine, render=render)
+                elif not self._lock.acquire(timeout=timeout):
+                    raise ServerBusyError(f"Worker {self.index} timed out")
+            finally:
+                session.end_turn()
+            if self.pipeline is not None:
+                return future.result(timeout=timeout)
+            try:
+                frame, result = session.engine.analyze_frame(frame)
+            finally:
+                self._lock.release()
+            # Drawing doesn't touch the models, so it happens outside the worker lock
+            return (draw_result(frame, result, copy=False) if render else None), result
+        finally:
+            with self._pending_lock:
+                self.pending -= 1
+            self._slots.release()
+
+    def pressure(self):
+        """Share of this worker's admission slots in use (1.0 means new frames get rejected)"""
+        return min(1.0, self.pending / self.max_pending)
+
+    def stop(self):
+        if self.pipeline is not None:
+            self.pipeline.stop()
+
+class Session:
+    """Tracker state for one client, pinned to one model worker"""
+    def __init__(self, session_id, engine, worker):
+        self.session_id = session_id
+        self.engine = engine
+        self.worker = worker
+        self.created = time.time()
+        self.last_seen = self.created
+        self.frames = 0
+        # Arrival-order gate in front of the worker (see ModelWorker.process)
+        self._turn = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+        self._skipped = set()
+
+    def take_ticket(self):
+        with self._turn:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            return ticket
+
+    def wait_turn(self, ticket, timeout=None):
+        """Block until every earlier frame of this session has entered the worker; False on timeout"""
+        with self._turn:
+            if self._turn.wait_for(lambda: self._serving == ticket, timeout):
+                return True
+            self._skipped.add(ticket)
+            self._advance()
+            return False
+
+    def end_turn(self):
+        with self._turn:
+            self._serving += 1
+            self._advance()
+
+    def skip_turn(self, ticket):
+        """Give up a ticket whose frame was rejected, so later frames don't wait for it"""
+        with self._turn:
+            self._skipped.add(ticket)
+            self._advance()
+
+    def _advance(self):
+        while self._serving in self._skipped:
+            self._skipped.remove(self._serving)
+            self._serving += 1
+        self._turn.notify_all()
+
+class SessionManager:
+    """Creates, routes and evicts client sessions.
+
+    ``model_factory`` is called once per worker and must return a
+    (person_model, face_model, emotion_detector) tuple. New sessions go to the
+    worker with the fewest sessions and stay there, so a session's frames are
+    always processed in order against its own ByteTrack instance. All session
+    engines record into one shared ``metrics`` (pass ``NULL_METRICS`` to disable).
+    """
+    def __init__(self, model_factory, workers=2, max_pending=2, max_sessions=64, session_timeout=60.0,
+                 pipeline=False, queue_size=4, engine_kwargs=None, metrics=None):
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.max_sessions = max_sessions
+        self.session_timeout = session_timeout
+        self.engine_kwargs = engine_kwargs or {}
+        self.workers = [ModelWorker(i, model_factory(), max_pending, pipeline, queue_size) for i in range(max(1, workers))]
+        self.sessions = {}
+        self.rejected = 0
+        # perf_counter() time of the first successfully processed frame (startup measurement)
+        self.first_frame_time = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._janitor = threading.Thread(target=self._evict_loop, name='session-janitor', daemon=True)
+        self._janitor.start()
+
+    def reserve(self, session_id):
+        """Hold a frame's place in the session's order before it is decoded.
+
+        Returns a reservation for :meth:`process`; give it back with
+        :meth:`release` if the frame never gets there.
+        """
+        session = self._get_session(session_id)
+        return session, session.take_ticket()
+
+    def release(self, reservation):
+        session, ticket = reservation
+        session.skip_turn(ticket)
+
+    def process(self, session_id, frame, render=True, timeout=30.0, reservation=None):
+        """Run one frame for ``session_id`` and return (draw_frame, result).
+
+        Frames processed concurrently for one session go through the models in
+        the order of their :meth:`reserve` calls (or of their process() calls
+        without one). Raises ServerBusyError when over capacity.
+        """
+        try:
+            session, ticket = reservation or self.reserve(session_id)
+            session.last_seen = time.time()
+            session.frames += 1
+            output = session.worker.process(session, ticket, frame, render, timeout)
+            if self.first_frame_time is None:
+                self.first_frame_time = time.perf_counter()
+            return output
+        except ServerBusyError:
+            self.rejected += 1
+            self.metrics.count('rejected_frames')
+            raise
+
+    def load(self, session_id):
+        """Queue pressure of the worker serving ``session_id``, reported to clients for rate control"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return {'pending': 0, 'pressure': 0.0}
+        worker = session.worker
+        return {'pending': worker.pending, 'pressure': round(worker.pressure(), 2)}
+
+    def _get_session(self, session_id):
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is not None:
+                return session
+            if len(self.sessions) >= self.max_sessions:
+                self._evict_idle_locked(time.time())
+                if len(self.sessions) >= self.max_sessions:
+                    raise ServerBusyError("Too many active sessions")
+            worker = min(self.workers, key=lambda w: w.sessions)
+            engine = PersonTrackerEngine(worker.person_model, worker.face_model, worker.emotion_detector,
+                                         tracker=create_tracker(), metrics=self.metrics, **self.engine_kwargs)
+            session = Session(session_id, engine, worker)
+            worker.sessions += 1
+            self.sessions[session_id] = session
+            print(f"🆕 Session {session_id} started on worker {worker.index} ({len(self.sessions)} active)")
+            return session
+
+    def evict_idle(self):
+        with self._lock:
+            return self._evict_idle_locked(time.time())
+
+    def _evict_idle_locked(self, now):
+        expired = [sid for sid, s in self.sessions.items() if now - s.last_seen > self.session_timeout]
+        for sid in expired:
+            session = self.sessions.pop(sid)
+            session.worker.sessions -= 1
+            print(f"🧹 Session {sid} evicted after {now - session.last_seen:.0f}s idle")
+        return len(expired)
+
+    def _evict_loop(self):
+        while not self._stop.wait(min(10.0, self.session_timeout / 2)):
+            self.evict_idle()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'active_sessions': len(self.sessions),
+                'rejected': self.rejected,
+                'workers': [{'index': w.index, 'sessions': w.sessions, 'pending': w.pending,
+                             'pipeline': w.pipeline.report() if w.pipeline is not None else None}
+                            for w in self.workers],
+                'sessions': [{'id': sid, 'worker': s.worker.index, 'frames': s.frames,
+                              'track_state': s.engine.cache_stats()}
+                             for sid, s in self.sessions.items()],
+            }
+
+    def stop(self):
+        self._stop.set()
+        for worker in self.workers:
+            worker.stop()
@@ -0,0 +1,239 @@
+# Inference backends for the person and face detectors
+# PersonTrackerEngine talks to detectors only through DetectorBackend.detect()
+
+import os
+
+import cv2
+import numpy as np
+
+def letterbox(image, size, color=(114, 114, 114)):
+    """Resize an image keeping its aspect ratio and pad it to a square canvas.
+
+    Returns the padded image, the scale factor and the (left, top) padding so
+    detections can be mapped back with :func:`unletterbox_boxes`.
+    """
+    h, w = image.shape[:2]
+    scale = min(size / h, size / w)
+    new_w = max(1, int(round(w * scale)))
+    new_h = max(1, int(round(h * scale)))
+    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((size, size, 3), color, dtype=np.uint8)
+    left = (size - new_w) // 2
+    top = (size - new_h) // 2
+    canvas[top:top + new_h, left:left + new_w] = resized
+    return canvas, scale, (left, top)
+
+def unletterbox_boxes(boxes, scale, pad):
+    """Map xyxy boxes from letterboxed coordinates back to the source image"""
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4).copy()
+    boxes[:, [0, 2]] -= pad[0]
+    boxes[:, [1, 3]] -= pad[1]
+    boxes /= scale
+    return boxes
+
+def nms(boxes, scores, iou_threshold=0.45, max_det=300):
+    """Greedy non-maximum suppression; returns kept indices, best score first.
+
+    Each round compares the current best box against all remaining boxes at
+    once, so the Python loop runs once per kept box rather than per pair.
+    """
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size and len(keep) < max_det:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        iw = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        ih = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = iw * ih
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+class DetectorBackend:
+    """Runs a detector on a list of BGR images.
+
+    :meth:`detect` returns one (N, 6) float32 array of
+    [x1, y1, x2, y2, conf, cls] per image, in that image's pixel coordinates.
+    """
+    name = 'base'
+    # Whether the legacy ``model.track(persist=True)`` path is available
+    supports_tracking = False
+
+    def detect(self, images, conf=0.25, iou=0.45, imgsz=640, classes=None):
+        raise NotImplementedError
+
+    def warmup(self, imgsz=640, batch=1):
+        """Run a few dummy inferences so the first real frame isn't slow"""
+        dummy = [np.zeros((imgsz, imgsz, 3), dtype=np.uint8)] * batch
+        for _ in range(2):
+            self.detect(dummy, imgsz=imgsz)
+
+class UltralyticsBackend(DetectorBackend):
+    """Ultralytics ``YOLO`` models (.pt or .onnx) with their own pre/post-processing"""
+    name = 'ultralytics'
+    supports_tracking = True
+
+    def __init__(self, model, task='detect'):
+        if isinstance(model, (str, os.PathLike)):
+            from ultralytics import YOLO
+            model = YOLO(model, task=task)
+        self.model = model
+        # Models exported with a fixed batch dimension (e.g. static ONNX) reject
+        # stacked input; remember that and fall back to one call per image.
+        self.single_batch = False
+
+    def _predict(self, images, **kwargs):
+        if len(images) > 1 and not self.single_batch:
+            try:
+                return self.model(images, **kwargs)
+            except Exception as e:
+                print(f"⚠️ Batched inference not supported by model, using per-image calls: {e}")
+                self.single_batch = True
+        results = []
+        for image in images:
+            results.extend(self.model(image, **kwargs))
+        return results
+
+    def detect(self, images, conf=0.25, iou=0.45, imgsz=640, classes=None):
+        results = self._predict(images, conf=conf, iou=iou, imgsz=imgsz, classes=classes, verbose=False)
+        return [result.boxes.data.cpu().numpy().astype(np.float32).reshape(-1, 6) for result in results]
+
+    def track(self, frame, **kwargs):
+        return self.model.track(source=frame, **kwargs)
+
+class OnnxRuntimeBackend(DetectorBackend):
+    """YOLOv8 ONNX models run directly with ONNX Runtime.
+
+    Preprocessing is a letterbox per image plus one stacked NCHW tensor;
+    postprocessing decodes the (B, 4 + classes, anchors) output and applies
+    class-aware NMS in NumPy. Thread counts and the graph optimization level
+    map straight to ``onnxruntime.SessionOptions``.
+    """
+    name = 'onnxruntime'
+    GRAPH_OPTIMIZATION_LEVELS = ('disable', 'basic', 'extended', 'all')
+
+    def __init__(self, path, intra_op_threads=0, inter_op_threads=0, graph_optimization='all',
+                 parallel=False, providers=None, warmup=True, max_det=300):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.graph_optimization_level = {
+            'disable': ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+            'basic': ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+            'extended': ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+            'all': ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+        }[graph_optimization]
+        options.execution_mode = (ort.ExecutionMode.ORT_PARALLEL if parallel
+                                  else ort.ExecutionMode.ORT_SEQUENTIAL)
+        self.path = path
+        self.max_det = max_det
+        self.session = ort.InferenceSession(path, sess_options=options,
+                                            providers=providers or ['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        batch, _, height, _ = model_input.shape
+        # Symbolic dimensions come back as strings (dynamic export)
+        self.fixed_batch = batch if isinstance(batch, int) else None
+        self.fixed_imgsz = height if isinstance(height, int) else None
+        self.input_dtype = np.float16 if 'float16' in model_input.type else np.float32
+        if warmup:
+            self.warmup(self.fixed_imgsz or 640)
+
+    def preprocess(self, images, imgsz):
+        canvases, transforms = [], []
+        for image in images:
+            canvas, scale, pad = letterbox(image, imgsz)
+            canvases.append(canvas)
+            transforms.append((scale, pad))
+        # BGR HWC uint8 -> RGB NCHW float in [0, 1]
+        batch = np.ascontiguousarray(np.stack(canvases)[..., ::-1].transpose(0, 3, 1, 2), dtype=self.input_dtype)
+        batch /= 255
+        return batch, transforms
+
+    def _run(self, batch):
+        if self.fixed_batch is None or len(batch) == self.fixed_batch:
+            return self.session.run(None, {self.input_name: batch})[0]
+        return np.concatenate([self.session.run(None, {self.input_name: batch[i:i + 1]})[0]
+                               for i in range(len(batch))])
+
+    def postprocess(self, predictions, conf, iou, classes):
+        """Decode one image's (4 + classes, anchors) output into an (N, 6) array"""
+        predictions = predictions.T.astype(np.float32)
+        scores = predictions[:, 4:]
+        class_ids = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(scores)), class_ids]
+        mask = confidences >= conf
+        if classes is not None:
+            mask &= np.isin(class_ids, classes)
+        if not mask.any():
+            return np.zeros((0, 6), dtype=np.float32)
+        xywh, confidences, class_ids = predictions[mask, :4], confidences[mask], class_ids[mask]
+        boxes = np.empty_like(xywh)
+        boxes[:, :2] = xywh[:, :2] - xywh[:, 2:] / 2
+        boxes[:, 2:] = xywh[:, :2] + xywh[:, 2:] / 2
+        # Offset boxes by class so one NMS pass never suppresses across classes
+        offsets = class_ids[:, None].astype(np.float32) * 4096
+        keep = nms(boxes + offsets, confidences, iou, self.max_det)
+        return np.concatenate([boxes[keep], confidences[keep, None], class_ids[keep, None].astype(np.float32)], axis=1)
+
+    def detect(self, images, conf=0.25, iou=0.45, imgsz=640, classes=None):
+        if not images:
+            return []
+        imgsz = self.fixed_imgsz or imgsz
+        batch, transforms = self.preprocess(images, imgsz)
+        outputs = self._run(batch)
+        results = []
+        for image, predictions, (scale, pad) in zip(images, outputs, transforms):
+            detections = self.postprocess(predictions, conf, iou, classes)
+            if len(detections):
+                h, w = image.shape[:2]
+                detections[:, :4] = unletterbox_boxes(detections[:, :4], scale, pad)
+                detections[:, [0, 2]] = np.clip(detections[:, [0, 2]], 0, w)
+                detections[:, [1, 3]] = np.clip(detections[:, [1, 3]], 0, h)
+            results.append(detections)
+        return results
+
+BACKENDS = ('ultralytics', 'onnxruntime')
+# ONNX variants produced by convert_models.py, stored next to the FP32 file
+MODEL_VARIANTS = ('fp32', 'int8-dynamic', 'int8-static')
+
+def variant_path(onnx_path, variant='fp32'):
+    """Path of a named variant, e.g. models/yolov8n.onnx -> models/yolov8n-int8-static.onnx"""
+    if variant not in MODEL_VARIANTS:
+        raise ValueError(f"Unknown model variant '{variant}', expected one of {MODEL_VARIANTS}")
+    if variant == 'fp32':
+        return onnx_path
+    root, ext = os.path.splitext(onnx_path)
+    return f"{root}-{variant}{ext}"
+
+def resolve_variant(onnx_path, variant='fp32'):
+    """Variant path if it exists, otherwise the FP32 model with a warning"""
+    path = variant_path(onnx_path, variant)
+    if not os.path.exists(path):
+        print(f"⚠️ {os.path.basename(path)} not found (run convert_models.py), using {os.path.basename(onnx_path)}")
+        return onnx_path
+    return path
+
+def load_detector(path, backend='ultralytics', **options):
+    """Load a detector with the named backend; ``options`` go to the backend constructor.
+
+    The ONNX Runtime backend needs an .onnx file; for anything else (e.g. a
+    PyTorch fallback) the Ultralytics backend is used instead.
+    """
+    if backend == 'onnxruntime':
+        if str(path).endswith('.onnx'):
+            return OnnxRuntimeBackend(path, **options)
+        print(f"⚠️ {os.path.basename(str(path))} is not an ONNX file, using the Ultralytics backend")
+    elif backend != 'ultralytics':
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+    return UltralyticsBackend(path)
+
+def as_backend(model):
+    """Wrap a plain Ultralytics model (or stub with the same interface) as a backend"""
+    if model is None or isinstance(model, DetectorBackend):
+        return model
+    return UltralyticsBackend(model)
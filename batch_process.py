@@ -0,0 +1,210 @@
+# Headless batch processing of recorded video with PersonTrackerEngine
+# Processes files (or directories of files) as fast as the CPU allows and writes per-frame records
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+
+from backends import BACKENDS, MODEL_VARIANTS, load_detector, resolve_variant
+from engine import PersonTrackerEngine, create_tracker
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.m4v', '.webm')
+
+# Models are loaded once per worker process by _init_worker
+_worker_models = None
+
+def find_videos(inputs):
+    """Expand files and directories (recursively) into a sorted list of (video path, output name).
+
+    The output name is the path relative to the input directory without its
+    extension (just the file name for file inputs), so same-named videos in
+    different subdirectories get separate outputs; any name still taken gets a
+    numeric suffix.
+    """
+    videos = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for f in files:
+                    if f.lower().endswith(VIDEO_EXTENSIONS):
+                        video = os.path.join(root, f)
+                        videos.append((video, os.path.splitext(os.path.relpath(video, path))[0]))
+        elif os.path.isfile(path):
+            videos.append((path, os.path.splitext(os.path.basename(path))[0]))
+        else:
+            print(f"⚠️ Skipping missing input: {path}")
+    named = []
+    taken = set()
+    for video, name in sorted(videos):
+        unique, n = name, 2
+        while unique in taken:
+            unique, n = f"{name}_{n}", n + 1
+        taken.add(unique)
+        named.append((video, unique))
+    return named
+
+def load_models(faces=True, emotion=True, backend='ultralytics', model_variant='fp32'):
+    """Load the person/face models (ONNX preferred) and, optionally, FER"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    # One worker process per core, so each ONNX Runtime session gets a single thread
+    options = {'intra_op_threads': 1} if backend == 'onnxruntime' else {}
+    person_onnx_path = os.path.join(current_dir, 'models', 'yolov8n.onnx')
+    person_model = (load_detector(resolve_variant(person_onnx_path, model_variant), backend, **options) if os.path.exists(person_onnx_path)
+                    else load_detector('yolov8n.pt'))
+    face_model = None
+    if faces:
+        face_onnx_path = os.path.join(current_dir, 'models', 'yolov8n-face-lindevs.onnx')
+        face_pt_path = os.path.join(current_dir, 'models', 'archive', 'yolov8n-face-lindevs.pt')
+        face_model = (load_detector(resolve_variant(face_onnx_path, model_variant), backend, **options) if os.path.exists(face_onnx_path)
+                      else load_detector(face_pt_path))
+    emotion_detector = None
+    if emotion:
+        from fer import FER
+        emotion_detector = FER()
+    return person_model, face_model, emotion_detector
+
+def _init_worker(faces, emotion, backend, model_variant):
+    global _worker_models
+    cv2.setNumThreads(1)
+    _worker_models = load_models(faces, emotion, backend, model_variant)
+
+class RecordWriter:
+    """Writes per-frame records as JSON lines (.jsonl) or compact columnar arrays (.npz)"""
+    def __init__(self, path):
+        self.path = path
+        self.columnar = path.endswith('.npz')
+        self._file = None if self.columnar else open(path, 'w')
+        self._columns = {name: [] for name in ('frame', 'keyframe', 'track_id', 'x1', 'y1', 'x2', 'y2',
+                                                'emotion', 'confidence')}
+
+    def write(self, frame_index, timestamp, keyframe, result):
+        if not self.columnar:
+            record = {'frame': frame_index, 'time': round(timestamp, 3), 'keyframe': keyframe,
+                      'tracks': [{'id': t['id'], 'box': t['box'], 'emotion': t['emotion']} for t in result['tracks']]}
+            self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+            return
+        # One row per track per frame
+        for track in result['tracks']:
+            emotion = track['emotion']
+            for name, value in zip(('frame', 'keyframe', 'track_id', 'x1', 'y1', 'x2', 'y2'),
+                                   (frame_index, keyframe, track['id'], *track['box'])):
+                self._columns[name].append(value)
+            self._columns['emotion'].append(emotion['label'] if emotion else '')
+            self._columns['confidence'].append(emotion['confidence'] if emotion else 0.0)
+
+    def close(self):
+        if self.columnar:
+            np.savez_compressed(
+                self.path,
+                frame=np.array(self._columns['frame'], dtype=np.int32),
+                keyframe=np.array(self._columns['keyframe'], dtype=bool),
+                track_id=np.array(self._columns['track_id'], dtype=np.int32),
+                box=np.stack([np.array(self._columns[c], dtype=np.int16) for c in ('x1', 'y1', 'x2', 'y2')], axis=1)
+                    if self._columns['x1'] else np.zeros((0, 4), dtype=np.int16),
+                emotion=np.array(self._columns['emotion'], dtype='U8'),
+                confidence=np.array(self._columns['confidence'], dtype=np.float16),
+            )
+        else:
+            self._file.close()
+
+def process_video(video_path, output_path, detect_every=1, chunk_size=16, conf=0.4):
+    """Process one video file and return (frames, seconds)"""
+    person_model, face_model, emotion_detector = _worker_models
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Failed to open video: {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    engine = PersonTrackerEngine(person_model, face_model, emotion_detector, conf=conf,
+                                 tracker=create_tracker(frame_rate=max(1, round(fps))))
+    writer = RecordWriter(output_path)
+    frame_index = 0
+    clock_start = time.time()
+    start = time.perf_counter()
+    try:
+        while True:
+            # Read a chunk of frames, then detect on all of its keyframes in one batched call
+            chunk = []
+            while len(chunk) < chunk_size:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                chunk.append(engine.prepare_frame(frame))
+            if not chunk:
+                break
+            keyframes = [i for i in range(len(chunk)) if (frame_index + i) % detect_every == 0]
+            detections = dict(zip(keyframes, engine.detect_persons([chunk[i] for i in keyframes]))) if keyframes else {}
+            for i, frame in enumerate(chunk):
+                keyframe = i in detections
+                if keyframe:
+                    tracks = engine.track_detections(frame, detections[i])
+                    # Emotion refresh follows video time rather than wall-clock time
+                    engine.analyze_faces(frame, tracks, clock_start + (frame_index + i) / fps)
+                else:
+                    # Between keyframes: move tracks forward, keep the last known emotions
+                    tracks = engine.attach_emotions(engine.propagate_tracks(frame))
+                writer.write(frame_index + i, (frame_index + i) / fps, keyframe, engine.build_result(frame, tracks))
+            frame_index += len(chunk)
+    finally:
+        cap.release()
+        writer.close()
+    return frame_index, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless batch processing of recorded video files')
+    parser.add_argument('inputs', nargs='+', help='Video files or directories containing them')
+    parser.add_argument('--output_dir', type=str, default='output', help='Where per-video records are written')
+    parser.add_argument('--format', type=str, default='jsonl', choices=['jsonl', 'npz'],
+                        help='JSON lines per frame, or compressed columnar arrays')
+    parser.add_argument('--detect_every', type=int, default=1,
+                        help='Run the person detector on every Nth frame and propagate tracks in between')
+    parser.add_argument('--chunk_size', type=int, default=16, help='Frames read and detected per batch')
+    parser.add_argument('--processes', type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help='Worker processes (one video per process at a time)')
+    parser.add_argument('--conf', type=float, default=0.4, help='Confidence threshold for detection')
+    parser.add_argument('--no_faces', action='store_true', help='Skip face detection (implies --no_emotion)')
+    parser.add_argument('--no_emotion', action='store_true', help='Skip emotion recognition')
+    parser.add_argument('--backend', type=str, default='ultralytics', choices=BACKENDS,
+                        help='Inference backend for the ONNX detectors')
+    parser.add_argument('--model_variant', type=str, default='fp32', choices=MODEL_VARIANTS,
+                        help='ONNX model variant produced by convert_models.py')
+    args = parser.parse_args()
+
+    videos = find_videos(args.inputs)
+    if not videos:
+        print("❌ No video files found")
+        return
+    os.makedirs(args.output_dir, exist_ok=True)
+    faces = not args.no_faces
+    emotion = faces and not args.no_emotion
+    print(f"🎞️ Processing {len(videos)} video(s) with {args.processes} process(es), "
+          f"detecting every {args.detect_every} frame(s)")
+
+    total_frames = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.processes, initializer=_init_worker, initargs=(faces, emotion, args.backend, args.model_variant)) as pool:
+        futures = {}
+        for video, name in videos:
+            output_path = os.path.join(args.output_dir, f"{name}.{args.format}")
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            futures[pool.submit(process_video, video, output_path, max(1, args.detect_every),
+                                max(1, args.chunk_size), args.conf)] = (video, output_path)
+        for future in as_completed(futures):
+            video, output_path = futures[future]
+            try:
+                frames, seconds = future.result()
+            except Exception as e:
+                print(f"❌ {video}: {e}")
+                continue
+            total_frames += frames
+            print(f"✅ {video}: {frames} frames in {seconds:.1f}s ({frames / max(seconds, 1e-9):.1f} FPS) → {output_path}")
+
+    elapsed = time.perf_counter() - start
+    print(f"📊 Total: {total_frames} frames in {elapsed:.1f}s ({total_frames / max(elapsed, 1e-9):.1f} FPS overall)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+# Benchmark: person detection on every frame vs keyframes + optical-flow propagation
+# Runs the real models from models/ over a local clip with a fresh ByteTrack per run and
+# reports FPS, the share of frames that ran the detector, and how closely the propagated
+# boxes follow the every-frame boxes (mean best IoU per frame).
+# Without --video it checks on a static synthetic scene with the stub person model that both
+# cadences run the detector on fewer frames than every-frame detection (exit code 1 otherwise).
+#
+# Usage: python benchmarks/adaptive_cadence.py --video clip.mp4 --intervals 1 3 6 --frames 300
+#        python benchmarks/adaptive_cadence.py --frames 60
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, '..')))
+
+from engine import PersonTrackerEngine, create_tracker
+from scenes import SyntheticScene
+from stubs import BlobPersonModel
+
+def load_person_model():
+    from ultralytics import YOLO
+    onnx_path = os.path.join(current_dir, '..', 'models', 'yolov8n.onnx')
+    return YOLO(onnx_path, task='detect') if os.path.exists(onnx_path) else YOLO('yolov8n.pt')
+
+def load_frames(video, count):
+    cap = cv2.VideoCapture(video)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+def mean_best_iou(boxes, reference):
+    """Average over ``reference`` boxes of the best IoU with any of ``boxes``"""
+    if not reference:
+        return 1.0 if not boxes else 0.0
+    if not boxes:
+        return 0.0
+    a = np.array(reference, dtype=np.float32)[:, None, :]
+    b = np.array(boxes, dtype=np.float32)[None, :, :]
+    iw = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    ih = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = iw * ih
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    iou = inter / np.maximum(area_a + area_b - inter, 1e-6)
+    return float(iou.max(axis=1).mean())
+
+def run(person_model, frames, interval, adaptive):
+    """Track every frame and return (fps, keyframe share, per-frame boxes)"""
+    engine = PersonTrackerEngine(person_model, None, None, tracker=create_tracker(),
+                                 detect_interval=interval, adaptive_cadence=adaptive)
+    engine.track_persons(frames[0])  # warm-up
+    engine = PersonTrackerEngine(person_model, None, None, tracker=create_tracker(),
+                                 detect_interval=interval, adaptive_cadence=adaptive)
+    boxes, keyframes = [], 0
+    start = time.perf_counter()
+    for frame in frames:
+        _, tracks = engine.track_persons(frame)
+        keyframes += engine.last_keyframe
+        boxes.append([track["box"] for track in tracks])
+    elapsed = time.perf_counter() - start
+    return len(frames) / elapsed, keyframes / len(frames), boxes
+
+def check_static(frames, intervals):
+    """Keyframe share on a scene where nothing moves; True when every cadence detects less than every frame"""
+    person_model = BlobPersonModel()
+    passed = True
+    print(f"{'mode':>16} {'interval':>8} {'keyframes':>10}")
+    for interval in intervals:
+        for adaptive in (False, True):
+            _, keyframe_share, _ = run(person_model, frames, interval, adaptive)
+            ok = interval == 1 or keyframe_share < 1.0
+            passed &= ok
+            mode = 'adaptive' if adaptive else 'fixed'
+            print(f"{mode:>16} {interval:>8} {keyframe_share * 100:>9.1f}% {'' if ok else '❌'}")
+    return passed
+
+def main():
+    parser = argparse.ArgumentParser(description='Every-frame vs adaptive keyframe person detection benchmark')
+    parser.add_argument('--video', type=str, default=None,
+                        help='Local clip to use as input (default: static-scene check with the stub model)')
+    parser.add_argument('--persons', type=int, default=5, help='Persons in the static synthetic scene')
+    parser.add_argument('--frames', type=int, default=300, help='Frames to process per configuration')
+    parser.add_argument('--intervals', type=int, nargs='+', default=[3, 6, 10],
+                        help='Maximum keyframe intervals to compare against every-frame detection')
+    args = parser.parse_args()
+
+    if args.video is None:
+        frames = [SyntheticScene(args.persons).render()] * args.frames
+        if not check_static(frames, args.intervals):
+            print("❌ A keyframe cadence detected on every frame of a static scene")
+            sys.exit(1)
+        print("✅ Static scene: keyframes only on a share of the frames")
+        return
+
+    frames = load_frames(args.video, args.frames)
+    if not frames:
+        print(f"❌ Could not read frames from {args.video}")
+        return
+    person_model = load_person_model()
+
+    baseline_fps, _, baseline_boxes = run(person_model, frames, 1, False)
+    print(f"{'mode':>16} {'interval':>8} {'FPS':>8} {'speedup':>8} {'keyframes':>10} {'IoU vs every':>13}")
+    print(f"{'every frame':>16} {1:>8} {baseline_fps:>8.1f} {1.0:>7.2f}x {100.0:>9.1f}% {1.0:>13.3f}")
+    for interval in args.intervals:
+        for adaptive in (False, True):
+            fps, keyframe_share, boxes = run(person_model, frames, interval, adaptive)
+            agreement = np.mean([mean_best_iou(b, ref) for b, ref in zip(boxes, baseline_boxes)])
+            mode = 'adaptive' if adaptive else 'fixed'
+            print(f"{mode:>16} {interval:>8} {fps:>8.1f} {fps / baseline_fps:>7.2f}x "
+                  f"{keyframe_share * 100:>9.1f}% {agreement:>13.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+# Benchmark: frame staleness with a slow consumer, plain cv2.VideoCapture vs LatestFrameReader
+# A local clip stands in for a live camera: both readers follow the clip's native timeline and
+# the consumer spends --work_ms per frame (simulated inference). Staleness is how far the frame
+# being processed lags behind the live position; plain reads fall further behind every frame,
+# the latest-frame reader drops stale frames instead.
+#
+# Usage: python benchmarks/capture_latency.py --video clip.mp4 --work_ms 80 --frames 150
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, '..')))
+
+from capture import LatestFrameReader
+
+def plain(video, fps, frames, work_s):
+    cap = cv2.VideoCapture(video)
+    staleness = []
+    start = time.perf_counter()
+    for index in range(frames):
+        ret, _ = cap.read()
+        if not ret:
+            break
+        staleness.append(max(0.0, time.perf_counter() - start - index / fps))
+        time.sleep(work_s)
+    cap.release()
+    return np.array(staleness) * 1000, 0
+
+def latest(video, fps, frames, work_s, decode_width):
+    reader = LatestFrameReader(video, decode_width=decode_width, pace=True)
+    staleness = []
+    start = time.perf_counter()
+    for _ in range(frames):
+        ret, _ = reader.read(timeout=5.0)
+        if not ret:
+            break
+        # The frame just read is the newest one the reader has decoded
+        staleness.append(max(0.0, time.perf_counter() - start - (reader.captured - 1) / fps))
+        time.sleep(work_s)
+    dropped = reader.dropped
+    reader.release()
+    return np.array(staleness) * 1000, dropped
+
+def main():
+    parser = argparse.ArgumentParser(description='Capture staleness: synchronous reads vs latest-frame reader')
+    parser.add_argument('--video', type=str, required=True, help='Local clip used as a live-camera stand-in')
+    parser.add_argument('--frames', type=int, default=150, help='Frames consumed per reader')
+    parser.add_argument('--work_ms', type=float, default=80.0, help='Simulated processing time per frame')
+    parser.add_argument('--decode_width', type=int, default=1280)
+    args = parser.parse_args()
+
+    cap = cv2.VideoCapture(args.video)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+    print(f"🎞️ {args.video} at {fps:.1f} FPS, consumer needs {args.work_ms:.0f} ms/frame")
+    print(f"{'reader':>8} {'mean stale ms':>14} {'p95 stale ms':>13} {'final stale ms':>15} {'dropped':>8}")
+    for name, run in (('plain', lambda: plain(args.video, fps, args.frames, args.work_ms / 1000)),
+                      ('latest', lambda: latest(args.video, fps, args.frames, args.work_ms / 1000, args.decode_width))):
+        staleness, dropped = run()
+        print(f"{name:>8} {staleness.mean():>14.1f} {np.percentile(staleness, 95):>13.1f} "
+              f"{staleness[-1]:>15.1f} {dropped:>8}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# Benchmark: per-ROI vs batched face detection in PersonTrackerEngine.process_frame
+# Person boxes come from a stub tracker so the crowd size is controlled exactly;
+# the face model is the real one from models/ (ONNX preferred, PyTorch fallback).
+#
+# Usage: python benchmarks/face_batching.py --persons 1 5 10 20 30 --frames 50
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, '..')))
+
+from engine import PersonTrackerEngine
+from stubs import StubPersonModel, StubEmotionDetector
+
+def load_face_model():
+    from ultralytics import YOLO
+    models_dir = os.path.join(current_dir, '..', 'models')
+    onnx_path = os.path.join(models_dir, 'yolov8n-face-lindevs.onnx')
+    if os.path.exists(onnx_path):
+        return YOLO(onnx_path, task='detect')
+    return YOLO(os.path.join(models_dir, 'archive', 'yolov8n-face-lindevs.pt'))
+
+def load_frames(video, count):
+    """Read frames from a local clip, or synthesize noise frames"""
+    if video:
+        cap = cv2.VideoCapture(video)
+        frames = []
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        if frames:
+            return frames
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8) for _ in range(min(count, 10))]
+
+def run(face_model, frames, num_persons, batch_size, num_frames, warmup=3):
+    engine = PersonTrackerEngine(StubPersonModel(num_persons), face_model, StubEmotionDetector(),
+                                 face_batch_size=batch_size)
+    for i in range(warmup):
+        engine.process_frame(frames[i % len(frames)])
+    start = time.perf_counter()
+    for i in range(num_frames):
+        engine.process_frame(frames[i % len(frames)])
+    return num_frames / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-ROI vs batched face detection benchmark')
+    parser.add_argument('--persons', type=int, nargs='+', default=[1, 5, 10, 20, 30])
+    parser.add_argument('--frames', type=int, default=50, help='Timed frames per configuration')
+    parser.add_argument('--batch_size', type=int, default=32, help='Face batch size for the batched run')
+    parser.add_argument('--video', type=str, default=None, help='Optional local clip to use as input')
+    args = parser.parse_args()
+
+    face_model = load_face_model()
+    frames = load_frames(args.video, args.frames)
+
+    print(f"{'persons':>8} {'per-ROI FPS':>12} {'batched FPS':>12} {'speedup':>8}")
+    for num_persons in args.persons:
+        per_roi = run(face_model, frames, num_persons, 1, args.frames)
+        batched = run(face_model, frames, num_persons, args.batch_size, args.frames)
+        print(f"{num_persons:>8} {per_roi:>12.1f} {batched:>12.1f} {batched / per_roi:>7.2f}x")
+
+if __name__ == '__main__':
+    main()
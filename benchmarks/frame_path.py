@@ -0,0 +1,103 @@
+# Benchmark: per-frame copies, resizes and overlay blending in the GUI frame path
+# "before" reproduces the previous path: a pristine frame.copy() for pause, an unconditional
+# resize, a copy for drawing and two full-frame copies + addWeighted blends in the overlay.
+# "after" is the current path: no pristine copy, resize skipped for 720p (or into a reused
+# buffer), annotations in place and blending only inside the header/controls strips.
+# Person boxes come from a stub tracker so only the frame handling is measured.
+#
+# Usage: python benchmarks/frame_path.py --persons 5 --frames 300 --sizes 1280x720 1920x1080
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, '..')))
+
+from engine import PersonTrackerEngine
+from gui import ModernPersonTrackerViewer
+from stubs import StubPersonModel
+
+def make_viewer():
+    """Viewer with just the state the overlay needs (no models, window or capture)"""
+    viewer = ModernPersonTrackerViewer.__new__(ModernPersonTrackerViewer)
+    viewer.source = 'webcam'
+    viewer.scheduler = None
+    viewer.colors = {'primary': (255, 165, 0), 'secondary': (0, 255, 255), 'success': (0, 255, 0),
+                     'warning': (0, 255, 255), 'info': (255, 255, 255), 'dark': (40, 40, 40)}
+    return viewer
+
+def full_frame_tint(frame, x1, y1, x2, y2, color, alpha, outline=None):
+    """The previous blending: copy the whole frame, draw the box, blend the whole frame"""
+    overlay = frame.copy()
+    cv2.rectangle(overlay, (x1, y1), (x2 - 1, y2 - 1), color, -1)
+    if outline is not None:
+        cv2.rectangle(overlay, (x1, y1), (x2 - 1, y2 - 1), outline, 1)
+    frame[:] = cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0)
+    return frame
+
+def before_step(engine, viewer, frame):
+    last_frame = frame.copy()  # kept for the pause screen
+    draw_frame, _, _, fps, total = engine.process_frame(frame)
+    return viewer.draw_modern_overlay(draw_frame, fps, total), last_frame
+
+def after_step(engine, viewer, frame):
+    draw_frame, _, _, fps, total = engine.process_frame(frame, in_place=True)
+    return viewer.draw_modern_overlay(draw_frame, fps, total), None
+
+def measure(step, engine, viewer, source, frames, track_memory):
+    """Per-frame latency (ms) or peak extra bytes allocated per frame"""
+    values = []
+    for _ in range(frames):
+        frame = source.copy()  # a fresh capture buffer, like cap.read()
+        if track_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            step(engine, viewer, frame)
+            values.append(tracemalloc.get_traced_memory()[1] - baseline)
+        else:
+            start = time.perf_counter()
+            step(engine, viewer, frame)
+            values.append((time.perf_counter() - start) * 1000)
+    return np.array(values, dtype=np.float64)
+
+def build(mode, persons):
+    engine = PersonTrackerEngine(StubPersonModel(persons), None, None, reuse_buffers=(mode == 'after'))
+    viewer = make_viewer()
+    if mode == 'before':
+        # Previous behaviour: always resize, blend full frames
+        engine.prepare_frame = lambda frame: cv2.resize(frame, (1280, 720))
+        viewer.tint_region = full_frame_tint
+    return engine, viewer
+
+def main():
+    parser = argparse.ArgumentParser(description='Frame copies/resizes before vs after in-place annotation')
+    parser.add_argument('--persons', type=int, default=5)
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--sizes', nargs='+', default=['1280x720', '1920x1080', '640x480'],
+                        help='Source resolutions as WxH')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frame_mb = 1280 * 720 * 3 / (1024 * 1024)
+    print(f"{'source':>10} {'path':>7} {'mean ms':>8} {'p95 ms':>7} {'peak MB/frame':>15} {'≈ 720p buffers':>15}")
+    for size in args.sizes:
+        w, h = (int(v) for v in size.lower().split('x'))
+        source = rng.integers(0, 255, (h, w, 3), dtype=np.uint8)
+        for mode, step in (('before', before_step), ('after', after_step)):
+            engine, viewer = build(mode, args.persons)
+            measure(step, engine, viewer, source, 10, False)  # warm-up
+            latency = measure(step, engine, viewer, source, args.frames, False)
+            tracemalloc.start()
+            allocated = measure(step, engine, viewer, source, min(args.frames, 50), True) / (1024 * 1024)
+            tracemalloc.stop()
+            print(f"{size:>10} {mode:>7} {latency.mean():>8.2f} {np.percentile(latency, 95):>7.2f} "
+                  f"{allocated.mean():>15.2f} {allocated.mean() / frame_mb:>15.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# Benchmark: Ultralytics vs direct ONNX Runtime backends on CPU
+# Loads the ONNX person and face models from models/ with both backends and reports load time
+# (including warm-up), per-call latency and how closely the ONNX Runtime detections agree with
+# the Ultralytics ones (mean best IoU over the images where either backend found something, so a
+# clip without persons cannot score a perfect match).
+#
+# Usage: python benchmarks/inference_backends.py --video clip.mp4 --frames 100 --intra_op_threads 0 2 4
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, '..')))
+
+from adaptive_cadence import load_frames, mean_best_iou
+from backends import letterbox, load_detector
+
+MODELS_DIR = os.path.join(current_dir, '..', 'models')
+PERSON_PATH = os.path.join(MODELS_DIR, 'yolov8n.onnx')
+FACE_PATH = os.path.join(MODELS_DIR, 'yolov8n-face-lindevs.onnx')
+
+def time_calls(detector, batches, **kwargs):
+    """Mean milliseconds per call and the detections of every call"""
+    outputs = []
+    start = time.perf_counter()
+    for images in batches:
+        outputs.append(detector.detect(images, **kwargs))
+    return (time.perf_counter() - start) * 1000 / len(batches), outputs
+
+def agreement(outputs, reference):
+    """Mean best IoU against the reference detections, or None when neither backend detected anything"""
+    scores = [mean_best_iou(d[:, :4].tolist(), r[:, :4].tolist())
+              for out, ref in zip(outputs, reference) for d, r in zip(out, ref) if len(d) or len(r)]
+    return float(np.mean(scores)) if scores else None
+
+def detection_count(outputs):
+    return sum(len(detections) for out in outputs for detections in out)
+
+def main():
+    parser = argparse.ArgumentParser(description='Ultralytics vs ONNX Runtime detector backends (CPU)')
+    parser.add_argument('--video', type=str, required=True, help='Local clip with persons to use as input')
+    parser.add_argument('--frames', type=int, default=100, help='Frames per configuration')
+    parser.add_argument('--face_batch', type=int, default=8, help='Person crops per face-model call')
+    parser.add_argument('--intra_op_threads', type=int, nargs='+', default=[0],
+                        help='ONNX Runtime intra-op thread counts to try (0 = runtime default)')
+    args = parser.parse_args()
+
+    frames = [cv2.resize(frame, (1280, 720)) for frame in load_frames(args.video, args.frames)]
+    if not frames:
+        print(f"❌ Could not read frames from {args.video}")
+        sys.exit(1)
+    person_batches = [[frame] for frame in frames]
+    # Face model input: letterboxed top-centre crops standing in for person ROIs
+    crops = [letterbox(frame[:360, 480:800], 320)[0] for frame in frames]
+    face_batches = [crops[i:i + args.face_batch] for i in range(0, len(crops), args.face_batch)]
+
+    configs = [('ultralytics', {})] + [('onnxruntime', {'intra_op_threads': n}) for n in args.intra_op_threads]
+    reference = {}
+    print(f"{'backend':>12} {'threads':>7} {'load (s)':>9} {'person (ms)':>12} {'face (ms)':>10} "
+          f"{'person IoU':>11} {'face IoU':>9}")
+    for backend, options in configs:
+        start = time.perf_counter()
+        person = load_detector(PERSON_PATH, backend, **options)
+        face = load_detector(FACE_PATH, backend, **options)
+        if backend == 'ultralytics':
+            person.warmup(416)
+            face.warmup(320)
+        load_time = time.perf_counter() - start
+        person_ms, person_out = time_calls(person, person_batches, conf=0.4, iou=0.5, imgsz=416, classes=[0])
+        face_ms, face_out = time_calls(face, face_batches, conf=0.5, iou=0.7, imgsz=320)
+        if backend == 'ultralytics':
+            reference = {'person': person_out, 'face': face_out}
+        person_match = agreement(person_out, reference['person'])
+        face_match = agreement(face_out, reference['face'])
+        threads = options.get('intra_op_threads', '-')
+        print(f"{backend:>12} {threads:>7} {load_time:>9.2f} {person_ms:>12.2f} {face_ms:>10.2f} "
+              f"{'-' if person_match is None else f'{person_match:.3f}':>11} "
+              f"{'-' if face_match is None else f'{face_match:.3f}':>9}")
+    if not detection_count(reference['person']):
+        print(f"⚠️ Ultralytics found no persons in {args.video}; the IoU columns do not check accuracy")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# Benchmark: CPU cost of idle and busy stretches with and without the motion gate
+# Replays an empty corridor (static synthetic background) followed by a stretch with walking
+# persons, then reports CPU milliseconds per frame for each stretch, the projected CPU seconds
+# per hour at the camera frame rate and the share of each stretch the gate skipped. Every frame of
+# the busy stretch has moving persons, so skipping any of them is reported as an error (exit code 1).
+#
+# Usage: python benchmarks/motion_gate.py --models real --idle_frames 300 --busy_frames 300 --persons 3
+
+import argparse
+import os
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, '..')))
+
+from engine import PersonTrackerEngine, create_tracker
+from scenes import SyntheticScene
+from suite import load_models
+
+def run_stretch(engine, frames):
+    """(CPU ms per frame, share of frames the gate skipped)"""
+    skipped = 0
+    start = time.process_time()
+    for frame in frames:
+        engine.process_frame(frame, in_place=True)
+        skipped += engine.idle
+    return (time.process_time() - start) * 1000 / len(frames), skipped / len(frames)
+
+def main():
+    parser = argparse.ArgumentParser(description='Idle vs busy CPU time with and without the motion gate')
+    parser.add_argument('--models', type=str, default='stub', choices=['stub', 'real'])
+    parser.add_argument('--backend', type=str, default='ultralytics')
+    parser.add_argument('--idle_frames', type=int, default=300)
+    parser.add_argument('--busy_frames', type=int, default=300)
+    parser.add_argument('--persons', type=int, default=3)
+    parser.add_argument('--fps', type=float, default=15.0, help='Camera frame rate used for the per-hour projection')
+    parser.add_argument('--methods', nargs='+', default=['off', 'diff', 'mog2'])
+    args = parser.parse_args()
+
+    models = load_models(args.models, args.backend)
+    idle = SyntheticScene(0).frames(args.idle_frames)
+    busy = SyntheticScene(args.persons).frames(args.busy_frames)
+    print(f"{'gate':>6} {'idle ms/frame':>14} {'busy ms/frame':>14} {'idle CPU-s/h':>13} {'busy CPU-s/h':>13} "
+          f"{'idle skipped':>13} {'busy skipped':>13}")
+    missed = []
+    for method in args.methods:
+        engine = PersonTrackerEngine(*models, tracker=create_tracker(),
+                                     motion_gate=None if method == 'off' else method)
+        engine.process_frame(busy[0].copy())  # warm-up
+        idle_ms, idle_skipped = run_stretch(engine, [frame.copy() for frame in idle])
+        busy_ms, busy_skipped = run_stretch(engine, [frame.copy() for frame in busy])
+        print(f"{method:>6} {idle_ms:>14.2f} {busy_ms:>14.2f} {idle_ms * args.fps * 3.6:>13.0f} "
+              f"{busy_ms * args.fps * 3.6:>13.0f} {idle_skipped:>12.0%} {busy_skipped:>12.0%}")
+        if busy_skipped and args.persons:
+            missed.append(method)
+    if missed:
+        print(f"❌ The {', '.join(missed)} gate skipped frames with moving persons; "
+              f"busy ms/frame and CPU-s/h do not measure a busy camera")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
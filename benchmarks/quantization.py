@@ -0,0 +1,123 @@
+# Evaluation harness: FP32 vs INT8-quantized model variants (see convert_models.py)
+# Runs every variant through PersonTrackerEngine on the same local clip and reports per-stage
+# latency, FPS and how well person and face detections agree with the FP32 models.
+#
+# Usage: python benchmarks/quantization.py --video clip.mp4 --frames 300 --backend onnxruntime --json results.json
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, '..')))
+
+from backends import BACKENDS, MODEL_VARIANTS, load_detector, variant_path
+from engine import PersonTrackerEngine, create_tracker
+from adaptive_cadence import load_frames
+
+MODELS_DIR = os.path.join(current_dir, '..', 'models')
+PERSON_PATH = os.path.join(MODELS_DIR, 'yolov8n.onnx')
+FACE_PATH = os.path.join(MODELS_DIR, 'yolov8n-face-lindevs.onnx')
+STAGES = ('detect', 'track', 'faces')
+
+def iou_matrix(a, b):
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(1, -1, 4)
+    iw = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    ih = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = iw * ih
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-6)
+
+def agreement(frames_boxes, frames_reference, threshold=0.5):
+    """(recall, precision) of ``frames_boxes`` against the FP32 boxes at IoU >= threshold"""
+    matched_ref = matched_out = total_ref = total_out = 0
+    for boxes, reference in zip(frames_boxes, frames_reference):
+        total_ref += len(reference)
+        total_out += len(boxes)
+        if len(reference) and len(boxes):
+            iou = iou_matrix(reference, boxes)
+            matched_ref += int((iou.max(axis=1) >= threshold).sum())
+            matched_out += int((iou.max(axis=0) >= threshold).sum())
+    recall = matched_ref / total_ref if total_ref else 1.0
+    precision = matched_out / total_out if total_out else 1.0
+    return recall, precision
+
+def evaluate(variant, frames, backend, threads):
+    options = {'intra_op_threads': threads} if backend == 'onnxruntime' else {}
+    person = load_detector(variant_path(PERSON_PATH, variant), backend, **options)
+    face = load_detector(variant_path(FACE_PATH, variant), backend, **options)
+    # Face cache off so every keyframe measures the face model itself
+    engine = PersonTrackerEngine(person, face, None, tracker=create_tracker(), face_cache_ttl=0)
+    timings = {stage: [] for stage in STAGES}
+    persons, faces = [], []
+    start = time.perf_counter()
+    for index, frame in enumerate(frames):
+        frame = engine.prepare_frame(frame)
+        t0 = time.perf_counter()
+        detections = engine.detect_persons([frame])[0]
+        t1 = time.perf_counter()
+        tracks = engine.track_detections(frame, detections)
+        t2 = time.perf_counter()
+        engine.analyze_faces(frame, tracks, index / 30.0)
+        t3 = time.perf_counter()
+        for stage, seconds in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2)):
+            timings[stage].append(seconds * 1000)
+        persons.append(detections[:, :4].tolist())
+        faces.append([face_box for track in tracks for face_box in track['faces']])
+    elapsed = time.perf_counter() - start
+    return {
+        'variant': variant,
+        'fps': len(frames) / elapsed,
+        'stages': {stage: {'mean_ms': float(np.mean(values)), 'p95_ms': float(np.percentile(values, 95))}
+                   for stage, values in timings.items()},
+    }, persons, faces
+
+def main():
+    parser = argparse.ArgumentParser(description='Latency and FP32 agreement of quantized model variants')
+    parser.add_argument('--video', type=str, required=True, help='Fixed local clip used for every variant')
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--variants', nargs='+', default=list(MODEL_VARIANTS), choices=MODEL_VARIANTS)
+    parser.add_argument('--backend', type=str, default='onnxruntime', choices=BACKENDS)
+    parser.add_argument('--intra_op_threads', type=int, default=0)
+    parser.add_argument('--json', type=str, default=None, help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    if not frames:
+        print(f"❌ Could not read frames from {args.video}")
+        sys.exit(1)
+    variants = ['fp32'] + [v for v in args.variants if v != 'fp32']
+    results, reference = [], None
+    print(f"{'variant':>13} {'FPS':>7} " + ' '.join(f"{s + ' ms':>10}" for s in STAGES) +
+          f" {'person R/P':>12} {'face R/P':>12}")
+    for variant in variants:
+        missing = [os.path.basename(path) for path in (variant_path(PERSON_PATH, variant),
+                                                        variant_path(FACE_PATH, variant))
+                   if not os.path.exists(path)]
+        if missing:
+            print(f"⚠️ Skipping {variant}: {', '.join(missing)} not found, run convert_models.py first")
+            continue
+        result, persons, faces = evaluate(variant, frames, args.backend, args.intra_op_threads)
+        if reference is None:
+            reference = (persons, faces)
+        result['person_recall'], result['person_precision'] = agreement(persons, reference[0])
+        result['face_recall'], result['face_precision'] = agreement(faces, reference[1])
+        results.append(result)
+        stages = ' '.join(f"{result['stages'][s]['mean_ms']:>10.2f}" for s in STAGES)
+        print(f"{variant:>13} {result['fps']:>7.1f} {stages} "
+              f"{result['person_recall']:>6.2f}/{result['person_precision']:<5.2f} "
+              f"{result['face_recall']:>6.2f}/{result['face_precision']:<5.2f}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'video': args.video, 'frames': len(frames), 'backend': args.backend, 'results': results},
+                      f, indent=2)
+        print(f"📝 Results written to {args.json}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# Procedurally generated crowd scenes for the benchmarks
+# Persons are saturated figures walking over a static grey texture, so BlobPersonModel
+# (stubs.py) can find them and the scene is identical on every run for a given seed.
+
+import cv2
+import numpy as np
+
+class SyntheticScene:
+    """``num_persons`` figures (body plus head) bouncing around a ``size`` frame at constant speed.
+
+    Person heights are drawn from ``height_range`` as fractions of the frame
+    height (small values give distant persons on a wide-angle camera).
+    """
+    def __init__(self, num_persons, size=(1280, 720), seed=0, height_range=(0.2, 0.4)):
+        self.width, self.height = size
+        rng = np.random.default_rng(seed)
+        # Grey-only texture: zero saturation, so it never shows up as a person
+        texture = rng.integers(60, 140, (self.height, self.width), dtype=np.uint8)
+        self.background = cv2.cvtColor(cv2.GaussianBlur(texture, (5, 5), 0), cv2.COLOR_GRAY2BGR)
+        heights = rng.uniform(*height_range, num_persons) * self.height
+        self.sizes = np.stack([heights * 0.4, heights], axis=1)
+        self.positions = rng.uniform(0, 1, (num_persons, 2)) * ([self.width, self.height] - self.sizes)
+        self.velocities = rng.uniform(1, 4, (num_persons, 2)) * rng.choice([-1, 1], (num_persons, 2))
+        hues = rng.integers(0, 180, num_persons, dtype=np.uint8)
+        hsv = np.stack([hues, np.full(num_persons, 220, np.uint8), np.full(num_persons, 200, np.uint8)], axis=1)
+        # cvtColor rejects an empty image, and an empty scene (the idle case) needs no colors
+        self.colors = cv2.cvtColor(hsv[None], cv2.COLOR_HSV2BGR)[0].tolist() if num_persons else []
+
+    def step(self):
+        self.positions += self.velocities
+        limit = np.array([self.width, self.height]) - self.sizes
+        bounced = (self.positions < 0) | (self.positions > limit)
+        self.velocities[bounced] *= -1
+        self.positions = np.clip(self.positions, 0, limit)
+
+    def boxes(self):
+        """Ground-truth person boxes (N, 4) for the current frame"""
+        return np.concatenate([self.positions, self.positions + self.sizes], axis=1)
+
+    def render(self):
+        frame = self.background.copy()
+        for (x1, y1, x2, y2), color in zip(self.boxes().astype(int), self.colors):
+            w = x2 - x1
+            head = max(4, w // 3)
+            cv2.rectangle(frame, (x1, y1 + head), (x2, y2), color, -1)
+            cv2.circle(frame, ((x1 + x2) // 2, y1 + head), head, (80, 140, 230), -1)
+        return frame
+
+    def frames(self, count):
+        """Render ``count`` consecutive frames"""
+        frames = []
+        for _ in range(count):
+            frames.append(self.render())
+            self.step()
+        return frames
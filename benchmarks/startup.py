@@ -0,0 +1,84 @@
+# Benchmark: cold-start cost of gui.py / WebApp/server.py and time to the first processed frame
+# Each measurement runs in a fresh interpreter so module caches do not carry over. Reports the
+# import time of the entry module, then the time from launch until the first synthetic frame has
+# gone through PersonTrackerEngine with eager loading (everything loaded before the first frame)
+# and lazy loading (background preload, first frame waits only for what it needs), with and
+# without emotion recognition.
+#
+# Usage: python benchmarks/startup.py --repeats 3 --backend onnxruntime
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.abspath(os.path.join(current_dir, '..'))
+
+IMPORT_SCRIPT = """
+import sys, time
+sys.path[:0] = [{root!r}, {webapp!r}]
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+FIRST_FRAME_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+sys.path[:0] = [{root!r}, {bench!r}]
+from engine import PersonTrackerEngine
+from model_loader import load_model_set, preload
+from scenes import SyntheticScene
+models = load_model_set({backend!r}, emotions={emotions!r})
+if {eager!r}:
+    for model in models:
+        if model is not None:
+            model.load()
+else:
+    preload(models)
+frame = SyntheticScene(2).frames(1)[0]
+engine = PersonTrackerEngine(*models, conf=0.4)
+engine.process_frame(frame, in_place=True)
+print(time.perf_counter() - start)
+"""
+
+def run_python(script):
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, cwd=root_dir)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'failed')
+    return float(result.stdout.strip().splitlines()[-1])
+
+def median_of(script, repeats):
+    return round(statistics.median(run_python(script) for _ in range(repeats)), 3)
+
+def main():
+    parser = argparse.ArgumentParser(description='Import time and time to first processed frame')
+    parser.add_argument('--backend', type=str, default='ultralytics')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', type=str, default=None, help='Write the results as JSON')
+    args = parser.parse_args()
+
+    results = {}
+    for module in ('gui', 'server'):
+        script = IMPORT_SCRIPT.format(root=root_dir, webapp=os.path.join(root_dir, 'WebApp'), module=module)
+        results[f'import_{module}_s'] = median_of(script, args.repeats)
+        print(f"📦 import {module}: {results[f'import_{module}_s']:.3f}s")
+
+    for eager in (True, False):
+        for emotions in (True, False):
+            name = f"first_frame_{'eager' if eager else 'lazy'}_{'emotions' if emotions else 'no_emotions'}_s"
+            script = FIRST_FRAME_SCRIPT.format(root=root_dir, bench=current_dir, backend=args.backend,
+                                               emotions=emotions, eager=eager)
+            results[name] = median_of(script, args.repeats)
+            print(f"🎬 {name}: {results[name]:.3f}s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+# Lightweight stand-ins for the Ultralytics/FER objects used by PersonTrackerEngine
+# Lets the benchmarks control the number of persons in a scene without a camera
+
+import cv2
+import numpy as np
+
+class _Array:
+    """Minimal tensor-like wrapper exposing the methods the engine calls"""
+    def __init__(self, data):
+        self.data = np.asarray(data)
+
+    def cpu(self):
+        return self
+
+    def int(self):
+        return _Array(self.data.astype(np.int64))
+
+    def numpy(self):
+        return self.data
+
+    def tolist(self):
+        return self.data.tolist()
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+class _Boxes:
+    def __init__(self, xyxy, ids=None):
+        xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        xywh = np.empty_like(xyxy)
+        xywh[:, 0] = (xyxy[:, 0] + xyxy[:, 2]) / 2
+        xywh[:, 1] = (xyxy[:, 1] + xyxy[:, 3]) / 2
+        xywh[:, 2] = xyxy[:, 2] - xyxy[:, 0]
+        xywh[:, 3] = xyxy[:, 3] - xyxy[:, 1]
+        self.xyxy = _Array(xyxy)
+        self.xywh = _Array(xywh)
+        self.conf = _Array(np.full(len(xyxy), 0.9, dtype=np.float32))
+        self.cls = _Array(np.zeros(len(xyxy), dtype=np.float32))
+        self.id = _Array(ids) if ids is not None else None
+        self.data = _Array(np.concatenate([xyxy, self.conf.data[:, None], self.cls.data[:, None]], axis=1))
+
+    def __len__(self):
+        return len(self.xyxy)
+
+    def __bool__(self):
+        return len(self) > 0
+
+class _Result:
+    def __init__(self, xyxy, ids=None):
+        self.boxes = _Boxes(xyxy, ids)
+
+def grid_person_boxes(num_persons, frame_w=1280, frame_h=720):
+    """Lay out ``num_persons`` person-sized boxes on a regular grid"""
+    if num_persons <= 0:
+        return np.zeros((0, 4), dtype=np.float32)
+    cols = int(np.ceil(np.sqrt(num_persons * frame_w / frame_h)))
+    rows = int(np.ceil(num_persons / cols))
+    cell_w, cell_h = frame_w / cols, frame_h / rows
+    boxes = []
+    for i in range(num_persons):
+        r, c = divmod(i, cols)
+        x1, y1 = c * cell_w, r * cell_h
+        boxes.append((x1 + cell_w * 0.2, y1 + cell_h * 0.05, x1 + cell_w * 0.8, y1 + cell_h * 0.95))
+    return np.array(boxes, dtype=np.float32)
+
+class StubPersonModel:
+    """Person model that 'tracks' a fixed grid of persons with stable IDs"""
+    def __init__(self, num_persons):
+        self.num_persons = num_persons
+
+    def track(self, source, **kwargs):
+        h, w = source.shape[:2]
+        boxes = grid_person_boxes(self.num_persons, w, h)
+        return [_Result(boxes, np.arange(1, len(boxes) + 1))]
+
+    def __call__(self, source, **kwargs):
+        images = source if isinstance(source, list) else [source]
+        return [_Result(grid_person_boxes(self.num_persons, image.shape[1], image.shape[0])) for image in images]
+
+    predict = __call__
+
+class BlobPersonModel:
+    """Person detector for synthetic scenes (see scenes.py): saturated blobs on a grey background.
+
+    Costs a colour conversion and a connected-components pass, so it stands in
+    for the detector without hiding the rest of the pipeline. Has no ``track``;
+    pair it with ``create_tracker()``. With ``scale_to_imgsz`` each image is
+    first shrunk to fit ``imgsz`` like the real detector's letterbox, so
+    persons below ``min_area`` model-input pixels are missed the same way.
+    """
+    def __init__(self, min_saturation=60, min_area=400, scale_to_imgsz=False):
+        self.min_saturation = min_saturation
+        self.min_area = min_area
+        self.scale_to_imgsz = scale_to_imgsz
+
+    def _detect(self, image, imgsz=None):
+        scale = 1.0
+        if self.scale_to_imgsz and imgsz and max(image.shape[:2]) > imgsz:
+            scale = imgsz / max(image.shape[:2])
+            image = cv2.resize(image, (round(image.shape[1] * scale), round(image.shape[0] * scale)),
+                               interpolation=cv2.INTER_AREA)
+        saturation = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)[..., 1]
+        mask = (saturation > self.min_saturation).astype(np.uint8)
+        _, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=4)
+        stats = stats[1:]
+        stats = stats[stats[:, cv2.CC_STAT_AREA] >= self.min_area]
+        x, y, w, h = (stats[:, i] for i in (cv2.CC_STAT_LEFT, cv2.CC_STAT_TOP, cv2.CC_STAT_WIDTH, cv2.CC_STAT_HEIGHT))
+        boxes = np.stack([x, y, x + w, y + h], axis=1) / scale if len(stats) else np.zeros((0, 4))
+        return _Result(boxes)
+
+    def __call__(self, source, **kwargs):
+        images = source if isinstance(source, list) else [source]
+        return [self._detect(image, kwargs.get('imgsz')) for image in images]
+
+    predict = __call__
+
+class StubFaceModel:
+    """Face model that reports one face in the upper centre of every crop"""
+    def __call__(self, source, **kwargs):
+        images = source if isinstance(source, list) else [source]
+        results = []
+        for image in images:
+            h, w = image.shape[:2]
+            results.append(_Result([(w * 0.4, h * 0.05, w * 0.6, h * 0.2)]))
+        return results
+
+    predict = __call__
+
+class StubEmotionDetector:
+    """FER stand-in; finds no face unless ``emotion`` is set, then labels every given face with it"""
+    def __init__(self, emotion=None):
+        self.emotion = emotion
+
+    def detect_emotions(self, img, face_rectangles=None):
+        if self.emotion is None or not face_rectangles:
+            return []
+        return [{'box': list(rect), 'emotions': {self.emotion: 0.9, 'neutral': 0.1}} for rect in face_rectangles]
@@ -0,0 +1,232 @@
+# Reproducible benchmark suite: synthetic crowds and recorded clips, no camera or network needed
+# Every case runs in a fresh process (so peak RSS is per case) and feeds its frames either to
+# PersonTrackerEngine.process_frame or to the web server's /process_frame through Flask's test
+# client. Results are written as JSON and can be compared against a stored baseline; the exit
+# code is 1 when a case regresses beyond the tolerance.
+#
+# Usage:
+#   python benchmarks/suite.py --models stub --persons 0 5 20 --frames 200 --output results.json
+#   python benchmarks/suite.py --models real --clips sample.mp4 --http --output results.json
+#   python benchmarks/suite.py --output benchmarks/baseline.json     # record a baseline
+#   python benchmarks/suite.py --output results.json --baseline benchmarks/baseline.json
+
+import argparse
+import base64
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import cv2
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, '..')))
+sys.path.append(os.path.abspath(os.path.join(current_dir, '..', 'WebApp')))
+
+MODELS_DIR = os.path.join(current_dir, '..', 'models')
+KINDS = ('engine', 'http-image', 'http-metadata')
+
+def peak_rss_mb():
+    """Peak resident set size of this process, or None where ``resource`` is unavailable"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def environment():
+    """Interpreter, machine and package versions; peak RSS in particular depends on the torch build"""
+    env = {'python': platform.python_version(), 'platform': platform.platform(),
+           'processor': platform.processor(), 'cpu_count': os.cpu_count(),
+           'opencv': cv2.__version__, 'numpy': np.__version__}
+    if hasattr(os, 'sysconf') and 'SC_PHYS_PAGES' in os.sysconf_names:
+        env['memory_mb'] = round(os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') / 2 ** 20)
+    try:
+        import torch
+        # The local version (e.g. +cpu / +cu130) matters: CUDA builds add hundreds of MB to every case's RSS
+        env['torch'] = torch.__version__
+    except ImportError:
+        env['torch'] = None
+    from importlib import metadata
+    for package in ('ultralytics', 'onnxruntime', 'flask'):
+        try:
+            env[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            env[package] = None
+    return env
+
+def load_models(kind, backend):
+    """(person_model, face_model, emotion_detector): stubs for pure pipeline overhead, or the real models"""
+    if kind == 'stub':
+        from stubs import BlobPersonModel, StubEmotionDetector, StubFaceModel
+        return BlobPersonModel(), StubFaceModel(), StubEmotionDetector('neutral')
+    from backends import load_detector
+    from fer import FER
+    person = load_detector(os.path.join(MODELS_DIR, 'yolov8n.onnx'), backend)
+    face = load_detector(os.path.join(MODELS_DIR, 'yolov8n-face-lindevs.onnx'), backend)
+    return person, face, FER()
+
+def scene_frames(scene, count, size):
+    """Frames for a scene spec: ``synthetic:<persons>`` or a path to a local clip"""
+    if scene.startswith('synthetic:'):
+        from scenes import SyntheticScene
+        return SyntheticScene(int(scene.split(':', 1)[1]), size).frames(count)
+    cap = cv2.VideoCapture(scene)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise RuntimeError(f"Could not read frames from {scene}")
+    return frames
+
+def engine_runner(models):
+    from engine import PersonTrackerEngine, create_tracker
+    engine = PersonTrackerEngine(*models, tracker=create_tracker())
+    return lambda frame: engine.process_frame(frame)
+
+def http_runner(models, mode):
+    """Posts frames to /process_frame in-process; JPEG/base64 encoding happens up front, as on the client"""
+    import server
+    from metrics import NULL_METRICS
+    from sessions import SessionManager
+    server.session_manager = SessionManager(lambda: models, workers=1, metrics=NULL_METRICS,
+                                            engine_kwargs={'conf': 0.4, 'emotion_interval': 1.0})
+    client = server.app.test_client()
+
+    def encode(frame):
+        payload = {'image': 'data:image/jpeg;base64,' +
+                   base64.b64encode(cv2.imencode('.jpg', frame)[1]).decode('ascii')}
+        if mode == 'metadata':
+            payload['mode'] = 'metadata'
+        return payload
+
+    def run(payload):
+        response = client.post('/process_frame', json=payload, headers={'X-Session-ID': 'benchmark'})
+        if response.status_code != 200 or not response.get_json().get('success'):
+            raise RuntimeError(f"/process_frame failed: {response.status_code} {response.get_data(as_text=True)[:200]}")
+    return encode, run
+
+def run_case(case):
+    """Runs in a fresh worker process; returns the case dict extended with its measurements"""
+    models = load_models(case['models'], case['backend'])
+    frames = scene_frames(case['scene'], case['frames'] + case['warmup'], case['size'])
+    if case['kind'] == 'engine':
+        inputs, step = frames, engine_runner(models)
+    else:
+        encode, step = http_runner(models, case['kind'].split('-', 1)[1])
+        inputs = [encode(frame) for frame in frames]
+    for item in inputs[:case['warmup']]:
+        step(item)
+    latencies = []
+    start = time.perf_counter()
+    for item in inputs[case['warmup']:]:
+        t0 = time.perf_counter()
+        step(item)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - start
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return dict(case, measured_frames=len(latencies), fps=round(len(latencies) / elapsed, 2),
+                mean_ms=round(float(np.mean(latencies)), 3), p50_ms=round(float(p50), 3),
+                p95_ms=round(float(p95), 3), p99_ms=round(float(p99), 3), peak_rss_mb=peak_rss_mb())
+
+def build_cases(args):
+    size = tuple(int(v) for v in args.size.lower().split('x'))
+    scenes = [f"synthetic:{n}" for n in args.persons] + list(args.clips)
+    kinds = KINDS if args.http else ('engine',)
+    cases = []
+    for scene in scenes:
+        for kind in kinds:
+            label = scene if scene.startswith('synthetic:') else os.path.basename(scene)
+            cases.append({'name': f"{kind}/{args.models}/{label}", 'kind': kind, 'scene': scene,
+                          'models': args.models, 'backend': args.backend, 'size': size,
+                          'frames': args.frames, 'warmup': args.warmup})
+    return cases
+
+def compare(results, baseline, tolerance, rss_tolerance):
+    """Print per-case deltas against ``baseline``; returns the names of regressed cases"""
+    previous = {case['name']: case for case in baseline['cases']}
+    changed = {key: (value, results['environment'].get(key))
+               for key, value in baseline.get('environment', {}).items()
+               if results['environment'].get(key) != value}
+    if changed:
+        print("⚠️ Baseline recorded in a different environment (compare FPS and RSS with care): " +
+              ', '.join(f"{key} {old} → {new}" for key, (old, new) in changed.items()))
+    regressions = []
+    print(f"\n{'case':<40} {'FPS':>16} {'p95 ms':>18} {'peak RSS MB':>18}")
+    for case in results['cases']:
+        base = previous.get(case['name'])
+        if base is None:
+            print(f"{case['name']:<40} (not in baseline)")
+            continue
+        slower = case['fps'] < base['fps'] * (1 - tolerance) or case['p95_ms'] > base['p95_ms'] * (1 + tolerance)
+        heavier = (case['peak_rss_mb'] is not None and base.get('peak_rss_mb') is not None
+                   and case['peak_rss_mb'] > base['peak_rss_mb'] * (1 + rss_tolerance))
+        if slower or heavier:
+            regressions.append(case['name'])
+        print(f"{case['name']:<40} {base['fps']:>7.1f}→{case['fps']:<8.1f} "
+              f"{base['p95_ms']:>8.2f}→{case['p95_ms']:<9.2f} "
+              f"{base.get('peak_rss_mb') or 0:>8.1f}→{case['peak_rss_mb'] or 0:<9.1f}"
+              f"{' ❌' if slower or heavier else ''}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Reproducible FPS / latency / memory benchmark suite')
+    parser.add_argument('--models', type=str, default='stub', choices=['stub', 'real'],
+                        help='stub = tiny stand-in models (pipeline overhead only), real = models/ directory')
+    parser.add_argument('--backend', type=str, default='ultralytics', help='Backend for --models real')
+    parser.add_argument('--persons', nargs='*', type=int, default=[0, 5, 20, 50],
+                        help='Persons per synthetic scene')
+    parser.add_argument('--clips', nargs='*', default=[], help='Local video clips to replay')
+    parser.add_argument('--size', type=str, default='1280x720', help='Synthetic scene size as WxH')
+    parser.add_argument('--frames', type=int, default=200, help='Measured frames per case')
+    parser.add_argument('--warmup', type=int, default=10, help='Unmeasured frames per case')
+    parser.add_argument('--http', action='store_true', help='Also run every scene through /process_frame')
+    parser.add_argument('--output', type=str, default='benchmark_results.json')
+    parser.add_argument('--baseline', type=str, default=None, help='Previous results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='Allowed FPS / p95 slowdown (fraction)')
+    parser.add_argument('--rss_tolerance', type=float, default=0.2, help='Allowed peak RSS growth (fraction)')
+    args = parser.parse_args()
+
+    cases = build_cases(args)
+    print(f"🏁 {len(cases)} cases, {args.frames} frames each ({args.models} models)")
+    print(f"{'case':<40} {'FPS':>8} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'RSS MB':>8}")
+    measured = []
+    for case in cases:
+        # A fresh process per case keeps ru_maxrss (peak RSS) from leaking between cases
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+            result = pool.submit(run_case, case).result()
+        measured.append(result)
+        print(f"{result['name']:<40} {result['fps']:>8.1f} {result['mean_ms']:>8.2f} {result['p50_ms']:>8.2f} "
+              f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['peak_rss_mb'] or 0:>8.1f}")
+
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'command': 'python benchmarks/suite.py ' + ' '.join(sys.argv[1:]),
+        'environment': environment(),
+        'cases': measured,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"📝 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.rss_tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} case(s) regressed beyond tolerance: {', '.join(regressions)}")
+            sys.exit(1)
+        print("✅ No regressions against the baseline")
+
+if __name__ == '__main__':
+    main()
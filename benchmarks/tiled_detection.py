@@ -0,0 +1,115 @@
+# Benchmark: recall and FPS of tiled detection vs the single downscaled pass
+# Replays a wide-angle synthetic scene (3840x2160 by default) with small, distant persons through
+# PersonTrackerEngine three ways: the current single pass on the 1280x720 processing frame, tiling
+# with every tile on every keyframe, and tiling with idle tiles scheduled less often. Recall is the
+# share of ground-truth persons matched by a track box (IoU >= --iou) over all frames.
+# With --video the clip's frames are used instead and persons per frame replace recall.
+#
+# Usage: python benchmarks/tiled_detection.py --persons 12 --frames 150
+#        python benchmarks/tiled_detection.py --models real --video wide_angle_4k.mp4 --min_person_height 40
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, '..')))
+
+from engine import PersonTrackerEngine, create_tracker
+from scenes import SyntheticScene
+from stubs import BlobPersonModel
+from suite import load_models
+
+def box_ious(boxes, others):
+    """(N, M) IoU matrix between two sets of xyxy boxes"""
+    if not len(boxes) or not len(others):
+        return np.zeros((len(boxes), len(others)))
+    x1 = np.maximum(boxes[:, None, 0], others[None, :, 0])
+    y1 = np.maximum(boxes[:, None, 1], others[None, :, 1])
+    x2 = np.minimum(boxes[:, None, 2], others[None, :, 2])
+    y2 = np.minimum(boxes[:, None, 3], others[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = lambda b: (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area(boxes)[:, None] + area(others)[None, :] - inter, 1e-9)
+
+def frame_source(args):
+    """Yields (frame, ground-truth boxes or None); frames are rendered one at a time (4K clips are large)"""
+    if args.video:
+        cap = cv2.VideoCapture(args.video)
+        for _ in range(args.frames):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame, None
+        cap.release()
+        return
+    scene = SyntheticScene(args.persons, tuple(args.size), seed=args.seed, height_range=tuple(args.height_range))
+    for _ in range(args.frames):
+        yield scene.render(), scene.boxes()
+        scene.step()
+
+def run_mode(models, tiling, args):
+    engine = PersonTrackerEngine(*models, tracker=create_tracker(), tiling=tiling)
+    matched = total = persons = frames = 0
+    elapsed = 0.0
+    for frame, truth in frame_source(args):
+        start = time.perf_counter()
+        processed, result = engine.analyze_frame(frame)
+        elapsed += time.perf_counter() - start
+        frames += 1
+        boxes = np.array([track['box'] for track in result['tracks']], dtype=np.float32).reshape(-1, 4)
+        persons += len(boxes)
+        if truth is not None:
+            # Ground truth is in source pixels, tracks in processing-frame pixels
+            truth = truth * np.tile([processed.shape[1] / frame.shape[1], processed.shape[0] / frame.shape[0]], 2)
+            ious = box_ious(truth, boxes)
+            matched += int((ious.max(axis=1) >= args.iou).sum()) if len(boxes) else 0
+            total += len(truth)
+    return {
+        'fps': frames / elapsed if elapsed else 0.0,
+        'recall': matched / total if total else None,
+        'persons_per_frame': persons / frames if frames else 0.0,
+        'tiles': engine.tiling_stats(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Recall and FPS of tiled vs single-pass person detection')
+    parser.add_argument('--models', type=str, default='stub', choices=['stub', 'real'])
+    parser.add_argument('--backend', type=str, default='ultralytics')
+    parser.add_argument('--video', type=str, default=None, help='Wide-angle clip instead of the synthetic scene')
+    parser.add_argument('--size', type=int, nargs=2, default=[3840, 2160], help='Synthetic scene resolution')
+    parser.add_argument('--persons', type=int, default=12)
+    parser.add_argument('--height_range', type=float, nargs=2, default=[0.02, 0.08],
+                        help='Person heights as fractions of the frame height')
+    parser.add_argument('--frames', type=int, default=150)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--iou', type=float, default=0.3, help='IoU for a track to match a ground-truth person')
+    parser.add_argument('--tile_size', type=int, default=0, help='0 = derive from --min_person_height')
+    parser.add_argument('--min_person_height', type=int, default=48)
+    parser.add_argument('--idle_interval', type=int, default=8)
+    args = parser.parse_args()
+
+    person, face, emotion = load_models(args.models, args.backend)
+    if args.models == 'stub':
+        # Shrinks each image to imgsz like the real letterbox, so distant persons get lost the same way
+        person = BlobPersonModel(scale_to_imgsz=True)
+    tiling = {'tile_size': args.tile_size or None, 'min_person_height': args.min_person_height}
+    modes = [
+        ('single', None),
+        ('tiled', dict(tiling, idle_interval=1)),
+        ('tiled+sched', dict(tiling, idle_interval=args.idle_interval)),
+    ]
+    print(f"{'mode':>12} {'FPS':>7} {'recall':>7} {'persons':>8} {'tiles/keyframe':>15}")
+    for name, mode_tiling in modes:
+        stats = run_mode((person, face, emotion), mode_tiling, args)
+        recall = f"{stats['recall']:.3f}" if stats['recall'] is not None else '-'
+        tiles = (f"{stats['tiles']['tiles_per_call']:.1f}/{stats['tiles']['tiles']}"
+                 if stats['tiles'] else '-')
+        print(f"{name:>12} {stats['fps']:>7.1f} {recall:>7} {stats['persons_per_frame']:>8.1f} {tiles:>15}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# Microbenchmark: list-based track trails vs the NumPy ring buffer (track_state.TrailBuffer)
+# Both sides update every track's trail and draw all trails onto a 1280x720 frame each step.
+# The list side mirrors the previous implementation: append + pop(0) per track, then one
+# np.array() and one cv2.polylines() call per track.
+#
+# Usage: python benchmarks/trail_rendering.py --tracks 10 50 200 --length 30 --steps 500
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.abspath(os.path.join(current_dir, '..')))
+
+from renderer import TRAIL_COLOR, trail_polylines
+from track_state import TrailBuffer
+
+def random_walk(num_tracks, steps, seed=0):
+    """Per-step (num_tracks, 2) centre positions wandering around a 1280x720 frame"""
+    rng = np.random.default_rng(seed)
+    start = rng.uniform((0, 0), (1280, 720), size=(num_tracks, 2))
+    moves = rng.normal(0, 4, size=(steps, num_tracks, 2))
+    return np.clip(start + np.cumsum(moves, axis=0), 0, (1279, 719)).astype(np.float32)
+
+def run_lists(positions, length, frame):
+    history = {track_id: [] for track_id in range(positions.shape[1])}
+    start = time.perf_counter()
+    for step in positions:
+        for track_id, (x, y) in enumerate(step.tolist()):
+            track = history[track_id]
+            track.append((x, y))
+            if len(track) > length:
+                track.pop(0)
+            trail = list(track)
+            if len(trail) > 1:
+                points = np.array(trail, dtype=np.int32).reshape((-1, 1, 2))
+                cv2.polylines(frame, [points], isClosed=False, color=TRAIL_COLOR, thickness=2)
+    return (time.perf_counter() - start) / len(positions)
+
+def run_ring_buffer(positions, length, frame):
+    trails = TrailBuffer(positions.shape[1], length)
+    slots = [trails.allocate() for _ in range(positions.shape[1])]
+    start = time.perf_counter()
+    for step in positions:
+        trails.append(slots, step)
+        polylines = trail_polylines(trails.gather(slots))
+        if polylines:
+            cv2.polylines(frame, polylines, isClosed=False, color=TRAIL_COLOR, thickness=2)
+    return (time.perf_counter() - start) / len(positions)
+
+def main():
+    parser = argparse.ArgumentParser(description='List vs ring-buffer trail update and rendering microbenchmark')
+    parser.add_argument('--tracks', type=int, nargs='+', default=[10, 50, 200])
+    parser.add_argument('--length', type=int, default=30, help='Trail length in points')
+    parser.add_argument('--steps', type=int, default=500, help='Frames simulated per configuration')
+    args = parser.parse_args()
+
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    print(f"{'tracks':>7} {'lists (ms)':>11} {'ring (ms)':>10} {'speedup':>8}")
+    for num_tracks in args.tracks:
+        positions = random_walk(num_tracks, args.steps)
+        lists = run_lists(positions, args.length, frame)
+        ring = run_ring_buffer(positions, args.length, frame)
+        print(f"{num_tracks:>7} {lists * 1000:>11.3f} {ring * 1000:>10.3f} {lists / ring:>7.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+# Low-latency video capture: a background reader that only ever hands out the newest frame
+# plus a disk cache for stream URLs resolved with yt-dlp
+
+import json
+import os
+import subprocess
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+import cv2
+
+from metrics import NULL_METRICS
+
+CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'persontracker', 'stream_urls.json')
+
+# yt-dlp format IDs in order of preference (one yt-dlp call tries them in this order)
+YOUTUBE_FORMATS = {
+    "270": "1080p",
+    "311": "720p60",
+    "232": "720p",
+    "136": "720p",
+    "135": "480p",
+    "134": "360p",
+    "133": "240p",
+    "160": "144p",
+}
+
+def _load_cache(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _url_expiry(url, default_ttl):
+    """googlevideo URLs carry their own expiry (``expire=<unix time>``); otherwise use ``default_ttl``"""
+    expire = parse_qs(urlparse(url).query).get('expire')
+    if expire and expire[0].isdigit():
+        return int(expire[0])
+    return time.time() + default_ttl
+
+def resolve_stream_url(youtube_url, refresh=False, cache_path=CACHE_PATH, ttl=3 * 3600, margin=300, timeout=30):
+    """Direct media URL for ``youtube_url``, cached on disk until shortly before it expires.
+
+    ``refresh=True`` ignores the cache (e.g. when a cached URL no longer opens).
+    Returns None when yt-dlp finds no usable format.
+    """
+    cache = _load_cache(cache_path)
+    entry = cache.get(youtube_url)
+    if not refresh and entry and entry['expires'] - margin > time.time():
+        print(f"⚡ Using cached stream URL ({YOUTUBE_FORMATS.get(entry['format'], entry['format'])}, "
+              f"valid for {(entry['expires'] - time.time()) / 60:.0f} more min)")
+        return entry['url']
+
+    # One yt-dlp call with a fallback chain instead of one call (and timeout) per format
+    cmd = ["yt-dlp", "-f", "/".join(YOUTUBE_FORMATS), "--print", "%(format_id)s %(url)s", youtube_url]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        print(f"⏱️ yt-dlp timed out after {timeout}s")
+        return None
+    except Exception as e:
+        print(f"❌ Error running yt-dlp: {e}")
+        return None
+    fields = result.stdout.strip().split(' ', 1)
+    if len(fields) < 2 or not fields[1].startswith('http'):
+        print("❌ No valid MP4 video format found.")
+        return None
+    format_id, url = fields
+    print(f"✅ Found video URL for {YOUTUBE_FORMATS.get(format_id, format_id)}")
+    cache[youtube_url] = {'url': url, 'format': format_id, 'expires': _url_expiry(url, ttl)}
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, 'w') as f:
+            json.dump(cache, f, indent=2)
+    except OSError as e:
+        print(f"⚠️ Could not write stream URL cache: {e}")
+    return url
+
+def open_capture(target, live=True):
+    """cv2.VideoCapture with whatever hardware decoder OpenCV finds and a one-frame driver buffer"""
+    if isinstance(target, int):
+        cap = cv2.VideoCapture(target)
+    elif hasattr(cv2, 'CAP_PROP_HW_ACCELERATION'):
+        cap = cv2.VideoCapture(target, cv2.CAP_ANY, [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY])
+    else:
+        cap = cv2.VideoCapture(target)
+    if live:
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+class LatestFrameReader:
+    """Reads a video source on a background thread and keeps only the newest frame.
+
+    ``source`` is a webcam index, a file path, a stream URL, or a callable
+    ``source(refresh)`` returning one (used to re-resolve expiring stream URLs on
+    reconnect). A frame replaced before anyone read it counts as dropped, so
+    slow consumers get fresh frames instead of a growing decoder backlog.
+
+    Frames wider than ``decode_width`` are downscaled on the reader thread
+    (webcams are also asked for that width directly). Live sources reconnect
+    with exponential backoff; a file ends the stream at EOF and, with ``pace``,
+    is read at its native frame rate so it behaves like a camera.
+
+    ``read()`` mirrors ``cv2.VideoCapture.read()``, so the reader drops into the
+    GUI loop and ``FramePipeline`` unchanged.
+    """
+    def __init__(self, source, decode_width=1280, reconnect=True, pace=True, max_backoff=30.0, metrics=None):
+        self.source = source
+        self.decode_width = decode_width
+        self.reconnect = reconnect
+        self.pace = pace
+        self.max_backoff = max_backoff
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self.is_file = isinstance(source, str) and os.path.isfile(source)
+        self.captured = 0
+        self.dropped = 0
+        self.reconnects = 0
+        self.ended = False
+        self._frame = None
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._cap = self._open(refresh=False)
+        if self._cap is None and callable(source):
+            # A cached stream URL may have been revoked early
+            self._cap = self._open(refresh=True)
+        if self._cap is None:
+            raise ValueError(f"Failed to open video source: {self._describe()}")
+        self._thread = threading.Thread(target=self._read_loop, name='capture-reader', daemon=True)
+        self._thread.start()
+
+    def _describe(self):
+        return 'stream' if callable(self.source) else str(self.source)
+
+    def _open(self, refresh):
+        target = self.source(refresh) if callable(self.source) else self.source
+        if target is None:
+            return None
+        cap = open_capture(target, live=not self.is_file)
+        if not cap.isOpened():
+            cap.release()
+            return None
+        if isinstance(target, int) and self.decode_width:
+            # Let the camera driver deliver the smaller size instead of resizing every frame
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.decode_width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.decode_width * 9 // 16)
+        fps = cap.get(cv2.CAP_PROP_FPS) if self.is_file and self.pace else 0
+        self._frame_period = 1.0 / fps if fps and fps > 0 else 0.0
+        return cap
+
+    def _reopen(self):
+        """Reconnect with exponential backoff; False once stopped"""
+        delay = 0.5
+        while not self._stop.is_set():
+            self.reconnects += 1
+            self.metrics.count('capture_reconnects')
+            print(f"🔌 Source lost, reconnecting in {delay:.1f}s (attempt {self.reconnects})")
+            if self._stop.wait(delay):
+                return False
+            # Stream URLs may have expired, so ask for a fresh one
+            cap = self._open(refresh=True)
+            if cap is not None:
+                self._cap = cap
+                print("✅ Reconnected")
+                return True
+            delay = min(delay * 2, self.max_backoff)
+        return False
+
+    def _read_loop(self):
+        try:
+            self._read_frames()
+        finally:
+            with self._cond:
+                self.ended = True
+                self._cond.notify_all()
+
+    def _read_frames(self):
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            ret, frame = self._cap.read()
+            if not ret:
+                self._cap.release()
+                if self.is_file or not self.reconnect or not self._reopen():
+                    return
+                continue
+            if self.decode_width and frame.shape[1] > self.decode_width:
+                height = round(frame.shape[0] * self.decode_width / frame.shape[1])
+                frame = cv2.resize(frame, (self.decode_width, height), interpolation=cv2.INTER_AREA)
+            with self._cond:
+                if self._frame is not None:
+                    self.dropped += 1
+                    self.metrics.count('capture_dropped')
+                self._frame = frame
+                self.captured += 1
+                self._cond.notify_all()
+            if self._frame_period:
+                self._stop.wait(max(0.0, self._frame_period - (time.perf_counter() - start)))
+
+    def poll(self):
+        """The newest unread frame, or None (never blocks)"""
+        with self._cond:
+            frame, self._frame = self._frame, None
+            return frame
+
+    def has_frame(self):
+        return self._frame is not None
+
+    def read(self, timeout=None):
+        """(True, newest unread frame), waiting for one; (False, None) once the source has ended"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._frame is not None or self.ended, timeout)
+            frame, self._frame = self._frame, None
+        return (frame is not None), frame
+
+    def isOpened(self):
+        return not self.ended
+
+    def get(self, prop):
+        return self._cap.get(prop)
+
+    def stats(self):
+        return {'captured': self.captured, 'dropped': self.dropped, 'reconnects': self.reconnects}
+
+    def release(self):
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+        self._cap.release()
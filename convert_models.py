@@ -0,0 +1,155 @@
+# Scriptable model conversion: FP32 ONNX export plus INT8-quantized variants
+# Scripted version of ONNX_Conversion.ipynb that also writes dynamic- and static-INT8 models
+#
+# Usage: python convert_models.py --calibration sample.mp4 --variants fp32 int8-dynamic int8-static
+
+import argparse
+import os
+import shutil
+
+import cv2
+import numpy as np
+
+from backends import MODEL_VARIANTS, OnnxRuntimeBackend, letterbox, variant_path
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+models_dir = os.path.join(current_dir, 'models')
+
+# name: (PyTorch source, ONNX target, input size, dynamic batch)
+MODELS = {
+    'person': (os.path.join(models_dir, 'archive', 'yolov8n.pt'), os.path.join(models_dir, 'yolov8n.onnx'), 416, False),
+    'face': (os.path.join(models_dir, 'archive', 'yolov8n-face-lindevs.pt'),
+             os.path.join(models_dir, 'yolov8n-face-lindevs.onnx'), 320, True),
+}
+
+def export_fp32(pt_path, onnx_path, imgsz, dynamic):
+    """Export a YOLO .pt file to ONNX with the same settings as the notebook"""
+    from ultralytics import YOLO
+    if not os.path.exists(pt_path):
+        pt_path = os.path.basename(pt_path)  # Let Ultralytics download the stock weights
+    exported = YOLO(pt_path).export(format='onnx', imgsz=imgsz, half=False, dynamic=dynamic,
+                                    simplify=True, opset=11, verbose=False)
+    if os.path.abspath(exported) != os.path.abspath(onnx_path):
+        shutil.move(exported, onnx_path)
+    print(f"✅ FP32 model exported to: {onnx_path}")
+
+def load_calibration_frames(sources, count):
+    """Evenly spaced frames from video files and/or image files"""
+    frames = []
+    for source in sources:
+        if source.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp')):
+            image = cv2.imread(source)
+            if image is not None:
+                frames.append(image)
+            continue
+        cap = cv2.VideoCapture(source)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or count
+        for index in np.linspace(0, max(0, total - 1), num=min(count, max(1, total)), dtype=int):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+            ret, frame = cap.read()
+            if ret:
+                frames.append(frame)
+        cap.release()
+    return [cv2.resize(frame, (1280, 720)) for frame in frames[:count]]
+
+def person_crops(frames, person_onnx_path, limit):
+    """Person ROIs found by the FP32 person model, as calibration input for the face model"""
+    detector = OnnxRuntimeBackend(person_onnx_path, warmup=False)
+    crops = []
+    for frame in frames:
+        for x1, y1, x2, y2, _, _ in detector.detect([frame], conf=0.4, iou=0.5, imgsz=416, classes=[0])[0].astype(int):
+            if x2 - x1 > 20 and y2 - y1 > 20:
+                crops.append(frame[y1:y2, x1:x2])
+        if len(crops) >= limit:
+            break
+    return crops[:limit] or frames
+
+class FrameCalibrationReader:
+    """onnxruntime CalibrationDataReader feeding letterboxed images one at a time"""
+    def __init__(self, input_name, images, imgsz):
+        self.input_name = input_name
+        self.images = images
+        self.imgsz = imgsz
+        self._iter = None
+        self.rewind()
+
+    def _tensor(self, image):
+        canvas = letterbox(image, self.imgsz)[0]
+        return np.ascontiguousarray(canvas[None, ..., ::-1].transpose(0, 3, 1, 2), dtype=np.float32) / 255
+
+    def get_next(self):
+        image = next(self._iter, None)
+        return None if image is None else {self.input_name: self._tensor(image)}
+
+    def rewind(self):
+        self._iter = iter(self.images)
+
+def quantize_dynamic_int8(onnx_path, output_path):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(onnx_path, output_path, weight_type=QuantType.QUInt8)
+    print(f"✅ Dynamic INT8 model written to: {output_path}")
+
+def quantize_static_int8(onnx_path, output_path, images, imgsz, exclude_head=True):
+    """Static INT8 (QDQ) with activation ranges calibrated on ``images``.
+
+    The YOLOv8 detect head ('/model.22/' nodes) is kept in FP32 by default:
+    quantizing the box regression outputs costs far more accuracy than time.
+    """
+    import onnx
+    import onnxruntime as ort
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    prepared_path = output_path.replace('.onnx', '-prep.onnx')
+    quant_pre_process(onnx_path, prepared_path, skip_symbolic_shape=True)
+    nodes_to_exclude = []
+    if exclude_head:
+        nodes_to_exclude = [node.name for node in onnx.load(prepared_path).graph.node
+                            if node.name.startswith('/model.22/')]
+    input_name = ort.InferenceSession(prepared_path, providers=['CPUExecutionProvider']).get_inputs()[0].name
+    try:
+        quantize_static(prepared_path, output_path, FrameCalibrationReader(input_name, images, imgsz),
+                        quant_format=QuantFormat.QDQ, activation_type=QuantType.QUInt8,
+                        weight_type=QuantType.QInt8, per_channel=True,
+                        calibrate_method=CalibrationMethod.MinMax, nodes_to_exclude=nodes_to_exclude)
+    finally:
+        os.remove(prepared_path)
+    print(f"✅ Static INT8 model written to: {output_path} (calibrated on {len(images)} images)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Export FP32 ONNX models and INT8-quantized variants')
+    parser.add_argument('--models', nargs='+', default=list(MODELS), choices=list(MODELS))
+    parser.add_argument('--variants', nargs='+', default=list(MODEL_VARIANTS), choices=MODEL_VARIANTS)
+    parser.add_argument('--calibration', nargs='*', default=[],
+                        help='Video or image files used to calibrate static INT8 (required for int8-static)')
+    parser.add_argument('--calibration_frames', type=int, default=200, help='Calibration images per model')
+    parser.add_argument('--export', action='store_true', help='Re-export FP32 ONNX even if it already exists')
+    parser.add_argument('--quantize_head', action='store_true', help='Also quantize the detect head in static INT8')
+    parser.add_argument('--dynamic_batch', action='store_true',
+                        help='Export every model with a dynamic batch dimension (batched multi-camera detection)')
+    args = parser.parse_args()
+
+    frames = []
+    if 'int8-static' in args.variants:
+        frames = load_calibration_frames(args.calibration, args.calibration_frames)
+        if not frames:
+            parser.error('int8-static needs --calibration video or image files')
+
+    for name in args.models:
+        pt_path, onnx_path, imgsz, dynamic = MODELS[name]
+        print(f"🔧 {name} model ({os.path.basename(onnx_path)})")
+        if args.export or not os.path.exists(onnx_path):
+            export_fp32(pt_path, onnx_path, imgsz, dynamic or args.dynamic_batch)
+        if 'int8-dynamic' in args.variants:
+            quantize_dynamic_int8(onnx_path, variant_path(onnx_path, 'int8-dynamic'))
+        if 'int8-static' in args.variants:
+            images = frames if name == 'person' else person_crops(frames, MODELS['person'][1], args.calibration_frames)
+            quantize_static_int8(onnx_path, variant_path(onnx_path, 'int8-static'), images, imgsz,
+                                 exclude_head=not args.quantize_head)
+        for variant in args.variants:
+            path = variant_path(onnx_path, variant)
+            if os.path.exists(path):
+                print(f"  📦 {variant:>12}: {os.path.getsize(path) / (1024 * 1024):.2f} MB")
+
+if __name__ == '__main__':
+    main()
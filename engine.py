@@ -4,27 +4,357 @@
 import cv2
 import numpy as np
 import time
-from collections import defaultdict
+from backends import as_backend, letterbox, unletterbox_boxes
+from propagation import AdaptiveCadence, OpticalFlowPropagator
+from metrics import NULL_METRICS
+from motion import MotionGate, RoiMask
+from tiling import TiledDetector
+from renderer import draw_result
+from track_state import TrackStateStore, TrailBuffer
+
+def box_iou(a, b):
+    """IoU of two (x1, y1, x2, y2) boxes"""
+    iw = min(a[2], b[2]) - max(a[0], b[0])
+    ih = min(a[3], b[3]) - max(a[1], b[1])
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / ((a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter)
+
+def create_tracker(config="bytetrack.yaml", frame_rate=30):
+    """Create a standalone ByteTrack tracker.
+
+    ``model.track(persist=True)`` keeps the tracker on the model's predictor,
+    so every engine sharing that model would share track IDs. Engines given
+    their own tracker run plain detection and update this tracker instead.
+    """
+    import inspect
+    import ultralytics.utils as ultralytics_utils
+    from ultralytics.trackers.byte_tracker import BYTETracker
+    from ultralytics.utils.checks import check_yaml
+    # ultralytics < 8.3 has yaml_load(), later releases YAML.load()
+    if hasattr(ultralytics_utils, 'YAML'):
+        settings = ultralytics_utils.YAML.load(check_yaml(config))
+    else:
+        settings = ultralytics_utils.yaml_load(check_yaml(config))
+    args = ultralytics_utils.IterableSimpleNamespace(**settings)
+    if 'frame_rate' in inspect.signature(BYTETracker.__init__).parameters:
+        return BYTETracker(args=args, frame_rate=frame_rate)
+    # Newer BYTETracker(args) no longer scales the lost-track buffer by frame rate itself
+    args.track_buffer = int(frame_rate / 30.0 * args.track_buffer)
+    return BYTETracker(args)
+
+def scale_tracker(tracker, sx, sy):
+    """Rescale a BYTETracker's active and lost tracks to a new input resolution.
+
+    The Kalman state is (center x, center y, aspect, height) plus velocities,
+    so the covariance is scaled with the same per-dimension factors.
+    """
+    factors = np.array([sx, sy, sx / sy, sy] * 2)
+    for track in tracker.tracked_stracks + tracker.lost_stracks:
+        if track.mean is not None:
+            track.mean = track.mean * factors
+            track.covariance = track.covariance * np.outer(factors, factors)
+        track._tlwh = track._tlwh * np.array([sx, sy, sx, sy], dtype=np.float32)
+
+class Detections:
+    """Detections in the attribute layout ``BYTETracker.update`` reads.
+
+    Wraps an (N, 6) array of [x1, y1, x2, y2, conf, cls] so trackers can be fed
+    from batched or non-Ultralytics detectors.
+    """
+    def __init__(self, data):
+        self.data = np.asarray(data, dtype=np.float32).reshape(-1, 6)
+
+    @property
+    def xyxy(self):
+        return self.data[:, :4]
+
+    @property
+    def xywh(self):
+        xywh = self.data[:, :4].copy()
+        xywh[:, 2:] -= xywh[:, :2]
+        xywh[:, :2] += xywh[:, 2:] / 2
+        return xywh
+
+    @property
+    def conf(self):
+        return self.data[:, 4]
+
+    @property
+    def cls(self):
+        return self.data[:, 5]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        return Detections(self.data[index])
 
 class PersonTrackerEngine:
-    def __init__(self, person_model, face_model, emotion_detector, conf=0.4, emotion_interval=1.0):
-        self.person_model = person_model
-        self.face_model = face_model
+    def __init__(self, person_model, face_model, emotion_detector, conf=0.4, emotion_interval=1.0,
+                 face_imgsz=320, face_batch_size=32, emotion_batch_size=4, tracker=None,
+                 detect_interval=1, adaptive_cadence=True, max_tracks=256, track_ttl=30.0,
+                 face_cache_ttl=0.5, face_cache_iou=0.9, trail_length=30, reuse_buffers=False,
+                 metrics=None, roi=None, motion_gate=None, motion_threshold=0.002, frame_size=(1280, 720),
+                 tiling=None):
+        # Models may be Ultralytics YOLO objects or any DetectorBackend (see backends.py)
+        self.person_model = as_backend(person_model)
+        self.face_model = as_backend(face_model)
         self.emotion_detector = emotion_detector
         self.conf = conf
         self.emotion_interval = emotion_interval
-        self.track_history = defaultdict(lambda: [])
-        self.person_emotions = defaultdict(lambda: {"emotion": "Unknown", "confidence": 0.0, "last_update": 0})
+        self.face_imgsz = face_imgsz
+        self.face_batch_size = max(1, int(face_batch_size))
+        # Upper bound on faces sent to the emotion classifier per frame
+        self.emotion_batch_size = max(1, int(emotion_batch_size))
+        # Per-track state is bounded: entries unseen for track_ttl seconds expire and
+        # the least recently seen go first beyond max_tracks (see track_state.py)
+        # Trails live in a preallocated ring buffer; track_history maps track ID -> trail slot
+        self.trails = TrailBuffer(max_tracks, trail_length)
+        self.track_history = TrackStateStore(self.trails.allocate, max_tracks, track_ttl,
+                                             on_evict=lambda track_id, slot: self.trails.release(slot))
+        self.person_emotions = TrackStateStore(lambda: {"emotion": "Unknown", "confidence": 0.0, "last_update": 0},
+                                               max_tracks, track_ttl)
+        # Last face boxes per track, reused while the person box barely moves
+        self.face_cache = TrackStateStore(dict, max_tracks, track_ttl)
+        self.face_cache_ttl = face_cache_ttl
+        self.face_cache_iou = face_cache_iou
+        self.face_cache_hits = 0
+        self.face_cache_misses = 0
         self.last_emotion_time = time.time()
+        # Processing resolution as (width, height); None processes frames at the size they
+        # arrive in (e.g. the web client's adaptive capture size), see rescale_state()
+        self.frame_size = tuple(frame_size) if frame_size else None
+        self._input_size = None
+        self._faces_size = None
+        self._stale_flow = False
+        if roi and self.frame_size is None:
+            raise ValueError("ROI polygons need a fixed frame_size")
+        # Optional per-engine ByteTrack instance, see create_tracker(); backends
+        # without model.track() always need one, and so do ROIs (detection on a crop)
+        # and native resolution (the tracker is rescaled when the input size changes) and tiling
+        if tracker is None and (roi or tiling is not None or self.frame_size is None
+                                or not self.person_model.supports_tracking):
+            tracker = create_tracker()
+        self.tracker = tracker
+        # Last keyframe position and velocity per track, for propagate_tracks()
+        self._track_motion = {}
+        self._frames_since_keyframe = 0
+        # detect_interval > 1 runs the person detector on keyframes only and moves
+        # tracks with optical flow in between (see propagation.py)
+        self.cadence = AdaptiveCadence(detect_interval, adaptive_cadence) if detect_interval > 1 else None
+        self.propagator = OpticalFlowPropagator() if self.cadence is not None else None
+        # Resize into one preallocated buffer instead of a new array per frame. Only
+        # safe when each prepared frame is done with before the next one is prepared
+        # (the sequential GUI loop), not with the pipeline or batched chunks.
+        self.reuse_buffers = reuse_buffers
+        self._resize_buffer = None
+        # Per-stage latency and per-frame counters (metrics.Metrics); a no-op unless given
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        # Whether the last track_persons() call ran the detector
+        self.last_keyframe = True
+        self._keyframe_ids = []
+        # Optional polygon ROIs (processing-frame pixels): the detector sees only their
+        # bounding crop and persons/faces are kept only inside them (see motion.py)
+        self.roi = RoiMask(roi, self.frame_size) if roi else None
+        # Optional motion gate ('diff' or 'mog2'): frames where nothing moved skip all
+        # inference and reuse the last tracks
+        self.motion_gate = (MotionGate(motion_gate, motion_threshold, roi=self.roi)
+                            if motion_gate else None)
+        self.idle = False
+        self._last_pairs = []
+        # Optional tiled detection on the full-resolution source frame: a dict of
+        # tiling.TiledDetector options (tile_size, min_person_height, overlap, ...)
+        self.tiler = TiledDetector(**tiling) if tiling is not None else None
+        self._source_frame = None
 
-    def process_frame(self, frame):
-        current_time = time.time()
-        should_update_emotion = current_time - self.last_emotion_time >= self.emotion_interval
-        if should_update_emotion:
-            self.last_emotion_time = current_time
-        frame = cv2.resize(frame, (1280, 720))
+    def detect_faces(self, frame, rois):
+        """Detect faces in person ROIs with batched face-model calls.
+
+        ``rois`` is a list of (x1, y1, x2, y2) boxes already clipped to the frame.
+        Every crop is letterboxed to ``face_imgsz`` so the whole set can go
+        through the model in chunks of ``face_batch_size``. Returns, per ROI, a
+        list of integer face boxes in frame coordinates.
+        """
+        faces = [[] for _ in rois]
+        for start in range(0, len(rois), self.face_batch_size):
+            chunk = rois[start:start + self.face_batch_size]
+            images, transforms = [], []
+            for x1, y1, x2, y2 in chunk:
+                image, scale, pad = letterbox(frame[y1:y2, x1:x2], self.face_imgsz)
+                images.append(image)
+                transforms.append((scale, pad))
+            try:
+                # iou=0.7 is the Ultralytics predict() default the face model always ran with
+                results = self.face_model.detect(images, conf=0.5, iou=0.7, imgsz=self.face_imgsz)
+            except Exception as e:
+                print(f"Error processing face detection: {e}")
+                continue
+            for offset, (detections, (scale, pad)) in enumerate(zip(results, transforms)):
+                if not len(detections):
+                    continue
+                x1, y1, x2, y2 = chunk[offset]
+                boxes = unletterbox_boxes(detections[:, :4], scale, pad)
+                boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, x2 - x1)
+                boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, y2 - y1)
+                for fx1, fy1, fx2, fy2 in boxes.astype(int).tolist():
+                    faces[start + offset].append((fx1 + x1, fy1 + y1, fx2 + x1, fy2 + y1))
+        return faces
+
+    def update_emotions(self, frame, track_faces, current_time):
+        """Classify emotions for a staleness-ordered subset of tracks in one batch.
+
+        ``track_faces`` maps track IDs to a face box (x1, y1, x2, y2) found this
+        frame. Each track is refreshed at most every ``emotion_interval`` seconds;
+        the stalest due tracks are picked first and at most ``emotion_batch_size``
+        faces are classified per frame, so the cost stays flat instead of spiking
+        when every track comes due at once. The face boxes are handed to FER so
+        its own face detector is skipped.
+        """
+        due = [track_id for track_id in track_faces
+               if current_time - self.person_emotions[track_id]["last_update"] >= self.emotion_interval]
+        if not due:
+            return
+        due.sort(key=lambda track_id: self.person_emotions[track_id]["last_update"])
+        selected = due[:self.emotion_batch_size]
+        rectangles = []
+        for track_id in selected:
+            fx1, fy1, fx2, fy2 = track_faces[track_id]
+            rectangles.append((fx1, fy1, fx2 - fx1, fy2 - fy1))
+        self.metrics.count("emotion_calls")
+        self.metrics.count("emotion_faces", len(rectangles))
+        try:
+            with self.metrics.stage("emotion"):
+                emotions = self.emotion_detector.detect_emotions(frame, face_rectangles=rectangles)
+        except Exception as e:
+            print(f"Error processing emotion detection: {e}")
+            return
+        self.last_emotion_time = current_time
+        # FER silently drops faces it cannot crop, so match results back by box
+        track_by_box = {tuple(int(v) for v in rect): track_id for rect, track_id in zip(rectangles, selected)}
+        for emotion in emotions or []:
+            track_id = track_by_box.get(tuple(int(v) for v in emotion["box"]))
+            if track_id is None:
+                continue
+            top_emotion = max(emotion["emotions"].items(), key=lambda x: x[1])
+            self.person_emotions[track_id]["emotion"] = top_emotion[0]
+            self.person_emotions[track_id]["confidence"] = top_emotion[1]
+            self.person_emotions[track_id]["last_update"] = current_time
+
+    def prepare_frame(self, frame):
+        """Resize a source frame to the engine's processing resolution.
+
+        Frames already at ``frame_size`` (or any frame with ``frame_size=None``)
+        are returned as they are (no copy).
+        """
+        if self.tiler is not None:
+            # Keep the source resolution around for tiled detection on keyframes
+            self._source_frame = frame
+        size = (frame.shape[1], frame.shape[0])
+        if self.frame_size is None:
+            if self._input_size is not None and size != self._input_size:
+                self.rescale_state(size[0] / self._input_size[0], size[1] / self._input_size[1])
+            self._input_size = size
+            return frame
+        if size == self.frame_size:
+            return frame
+        with self.metrics.stage("resize"):
+            if not self.reuse_buffers:
+                return cv2.resize(frame, self.frame_size)
+            self._resize_buffer = cv2.resize(frame, self.frame_size, dst=self._resize_buffer)
+            return self._resize_buffer
+
+    def rescale_state(self, sx, sy):
+        """Scale the tracking state after the input resolution changed.
+
+        Keeps track IDs, trails and velocities consistent when a client switches
+        capture size mid-stream. Optical-flow points cannot be carried over, so
+        the next frame runs the detector. Face and emotion state belongs to the
+        faces stage (another thread in the pipeline), which rescales it in
+        :meth:`analyze_faces` when the first frame at the new size gets there.
+        """
+        if self.tracker is not None:
+            scale_tracker(self.tracker, sx, sy)
+        self.trails.points *= np.array([sx, sy], dtype=np.float32)
+        self._track_motion = {track_id: (x * sx, y * sy, w * sx, h * sy, vx * sx, vy * sy)
+                              for track_id, (x, y, w, h, vx, vy) in self._track_motion.items()}
+        self._last_pairs = [(track_id, (x * sx, y * sy, w * sx, h * sy))
+                            for track_id, (x, y, w, h) in self._last_pairs]
+        if self.motion_gate is not None:
+            self.motion_gate.reset()
+        self._stale_flow = True
+        self.metrics.count("resolution_changes")
+
+    def _rescale_faces(self, frame):
+        """Scale cached face boxes when the faces stage sees a new frame size (see rescale_state)"""
+        size = (frame.shape[1], frame.shape[0])
+        previous, self._faces_size = self._faces_size, size
+        if previous is None or previous == size:
+            return
+        sx, sy = size[0] / previous[0], size[1] / previous[1]
+
+        def scale_box(box):
+            return tuple(int(round(v * f)) for v, f in zip(box, (sx, sy, sx, sy)))
+
+        for _, state in self.person_emotions.items():
+            if "last_face" in state:
+                state["last_face"] = scale_box(state["last_face"])
+                state["face_anchor"] = scale_box(state["face_anchor"])
+        for _, cached in self.face_cache.items():
+            cached["box"] = scale_box(cached["box"])
+            cached["faces"] = [scale_box(face) for face in cached["faces"]]
+
+    def detect_persons(self, frames):
+        """Batched person detection on prepared frames.
+
+        Returns one (N, 6) float32 array of [x1, y1, x2, y2, conf, cls] per frame.
+        """
+        with self.metrics.stage("detect"):
+            if self.roi is None:
+                return self.person_model.detect(frames, conf=self.conf, iou=0.5, imgsz=416, classes=[0])
+            x1, y1, x2, y2 = self.roi.bounds
+            detections = self.person_model.detect([frame[y1:y2, x1:x2] for frame in frames],
+                                                  conf=self.conf, iou=0.5, imgsz=416, classes=[0])
+            return [self.roi.filter(frame_detections, (x1, y1)) for frame_detections in detections]
+
+    def detect_keyframe(self, frame):
+        """Person detections for the prepared ``frame`` of the current keyframe.
+
+        With tiling, the tiles of the full-resolution source frame are detected
+        in one batch, merged and scaled to the processing resolution.
+        """
+        if self.tiler is None:
+            return self.detect_persons([frame])[0]
+        source = self._source_frame
+        with self.metrics.stage("detect"):
+            detections = self.tiler.detect(self.person_model, source, conf=self.conf)
+        if len(detections) and source.shape[:2] != frame.shape[:2]:
+            detections[:, [0, 2]] *= frame.shape[1] / source.shape[1]
+            detections[:, [1, 3]] *= frame.shape[0] / source.shape[0]
+        if self.roi is not None:
+            detections = self.roi.filter(detections)
+        return detections
+
+    def tiling_stats(self):
+        """Tile count and tiles run per keyframe (None without tiling)"""
+        return self.tiler.report() if self.tiler is not None else None
+
+    def track_detections(self, frame, detections):
+        """Feed one frame's detections to this engine's own tracker and build track dicts"""
+        # BYTETracker rows are [x1, y1, x2, y2, track_id, score, cls, idx]
+        with self.metrics.stage("track"):
+            tracked = np.asarray(self.tracker.update(Detections(detections), frame))
+        pairs = []
+        if tracked.size:
+            for x1, y1, x2, y2, track_id in tracked.reshape(len(tracked), -1)[:, :5].tolist():
+                pairs.append((int(track_id), ((x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1)))
+        return self._build_tracks(pairs)
+
+    def _run_model_tracker(self, frame):
+        """Detect and track with ``model.track(persist=True)``, returning (track_id, xywh) pairs"""
         result = self.person_model.track(
-            source=frame,
+            frame,
             persist=True,
             tracker="bytetrack.yaml",
             classes=[0],
@@ -34,67 +364,287 @@ class PersonTrackerEngine:
             stream=False,
             verbose=False
         )[0]
-        draw_frame = frame.copy()
-        total_person_detected = 0
-        if result.boxes and hasattr(result.boxes, 'id') and result.boxes.id is not None:
-            boxes = result.boxes.xywh.cpu()
-            track_ids = result.boxes.id.int().cpu().tolist()
-            total_person_detected = len(track_ids)
-            for box, track_id in zip(boxes, track_ids):
-                x_center, y_center, w, h = box
-                x1 = int(x_center - w / 2)
-                y1 = int(y_center - h / 2)
-                x2 = int(x_center + w / 2)
-                y2 = int(y_center + h / 2)
-                cv2.rectangle(draw_frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
-                cv2.putText(draw_frame, f"ID: {track_id}", (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-                track = self.track_history[track_id]
-                track.append((float(x_center), float(y_center)))
-                if len(track) > 30:
-                    track.pop(0)
-                if len(track) > 1:
-                    points = np.array(track, dtype=np.int32).reshape((-1, 1, 2))
-                    cv2.polylines(draw_frame, [points], isClosed=False, color=(230, 230, 230), thickness=2)
-                y1_safe = max(0, y1)
-                y2_safe = min(frame.shape[0], y2)
-                x1_safe = max(0, x1)
-                x2_safe = min(frame.shape[1], x2)
-                if y2_safe > y1_safe and x2_safe > x1_safe:
-                    person_roi = frame[y1_safe:y2_safe, x1_safe:x2_safe]
-                    if person_roi.size > 0 and person_roi.shape[0] > 20 and person_roi.shape[1] > 20:
-                        try:
-                            faces_result = self.face_model(person_roi, conf=0.5, imgsz=320, verbose=False)[0]
-                            if faces_result.boxes:
-                                for box in faces_result.boxes.xyxy:
-                                    fx1, fy1, fx2, fy2 = map(int, box)
-                                    cv2.rectangle(draw_frame, (fx1 + x1_safe, fy1 + y1_safe), (fx2 + x1_safe, fy2 + y1_safe), (0, 255, 0), 2)
-                                    cv2.putText(draw_frame, "Face", (fx1 + x1_safe, fy1 + y1_safe - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                                    if should_update_emotion:
-                                        emotions = self.emotion_detector.detect_emotions(person_roi)
-                                        if emotions:
-                                            top = emotions[0]["emotions"]
-                                            top_emotion = max(top.items(), key=lambda x: x[1])
-                                            self.person_emotions[track_id]["emotion"] = top_emotion[0]
-                                            self.person_emotions[track_id]["confidence"] = top_emotion[1]
-                                            self.person_emotions[track_id]["last_update"] = current_time
-                                    self.person_emotions[track_id]["last_face"] = (fx1 + x1_safe, fy1 + y1_safe, fx2 + x1_safe, fy2 + y1_safe)
-                        except Exception as e:
-                            print(f"Error processing face detection: {e}")                # Only show emotions when face is detected and emotion data exists
-                if track_id in self.person_emotions:
-                    emotion_data = self.person_emotions[track_id]
-                    # Only display emotion if we have face data
-                    if "last_face" in emotion_data and emotion_data["emotion"] != "Unknown":
-                        fx1, fy1, fx2, fy2 = emotion_data["last_face"]
-                        # Draw face bounding box
-                        cv2.rectangle(draw_frame, (fx1, fy1), (fx2, fy2), (0, 255, 0), 2)
-                        cv2.putText(draw_frame, "Face", (fx1, fy1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                        # Draw emotion text near the face
-                        emotion_x = fx1
-                        emotion_y = fy2 + 25
-                        cv2.putText(draw_frame, f"Emotion: {emotion_data['emotion']} ({emotion_data['confidence']*100:.0f}%)", 
-                                   (emotion_x, emotion_y), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        if not result.boxes or not hasattr(result.boxes, 'id') or result.boxes.id is None:
+            return []
+        boxes = result.boxes.xywh.cpu()
+        track_ids = result.boxes.id.int().cpu().tolist()
+        return [(track_id, tuple(float(v) for v in box)) for box, track_id in zip(boxes, track_ids)]
+
+    def _build_tracks(self, pairs, keyframe=True):
+        """Update trails and motion state from (track_id, xywh) pairs and return track dicts"""
+        tracks = []
+        motion = {}
+        self._last_pairs = pairs
+        slots = [self.track_history[track_id] for track_id, _ in pairs]
+        self.trails.append(slots, [xywh[:2] for _, xywh in pairs])
+        trails = self.trails.gather(slots)
+        for (track_id, (x_center, y_center, w, h)), trail in zip(pairs, trails):
+            # Per-frame velocity between keyframes, used by propagate_tracks()
+            vx = vy = 0.0
+            previous = self._track_motion.get(track_id)
+            if keyframe and previous is not None:
+                frames = self._frames_since_keyframe + 1
+                vx = (x_center - previous[0]) / frames
+                vy = (y_center - previous[1]) / frames
+            elif previous is not None:
+                vx, vy = previous[4], previous[5]
+            motion[track_id] = (x_center, y_center, w, h, vx, vy)
+            tracks.append({
+                "id": track_id,
+                "xywh": (x_center, y_center, w, h),
+                "box": (int(x_center - w / 2), int(y_center - h / 2), int(x_center + w / 2), int(y_center + h / 2)),
+                "trail": trail,
+            })
+        if keyframe:
+            self._track_motion = motion
+            self._frames_since_keyframe = 0
+        return tracks
+
+    def propagate_tracks(self, frame, displacements=None):
+        """Move the last detected tracks forward one frame without detection.
+
+        A cheap stand-in for detection on frames between keyframes; the tracker
+        is not touched. Tracks with an entry in ``displacements`` (pixels moved
+        since the keyframe, e.g. from optical flow) use it, the rest are
+        extrapolated from the last keyframe with constant velocity.
+        """
+        self._frames_since_keyframe += 1
+        k = self._frames_since_keyframe
+        displacements = displacements or {}
+        pairs = []
+        for track_id, (x_center, y_center, w, h, vx, vy) in self._track_motion.items():
+            dx, dy = displacements.get(track_id, (vx * k, vy * k))
+            pairs.append((track_id, (x_center + dx, y_center + dy, w, h)))
+        return self._build_tracks(pairs, keyframe=False)
+
+    def begin_frame(self, frame):
+        """Resize the frame and, between keyframes, move the tracks with optical flow.
+
+        Returns (frame, tracks); tracks is None when this frame needs the
+        detector, in which case the caller detects (possibly batched with other
+        engines' frames, see multicam.py), runs :meth:`track_detections` and
+        passes the tracks to :meth:`end_keyframe`.
+        """
+        frame = self.prepare_frame(frame)
+        # Trails belong to the tracking stage, so their expiry happens here, not in analyze_faces()
+        self.track_history.expire(time.time())
+        stale_flow, self._stale_flow = self.idle or self._stale_flow, False
+        if self.motion_gate is not None:
+            with self.metrics.stage("motion"):
+                # Live tracks keep the gate busy, so persons standing still are still followed
+                self.idle = not self.motion_gate.update(frame, active=bool(self._last_pairs))
+            if self.idle:
+                # Nothing moved: keep the last tracks, no person/face/emotion inference
+                self.metrics.count("idle_frames")
+                self.last_keyframe = False
+                return frame, self._build_tracks(self._last_pairs, keyframe=False)
+        cadence = self.cadence
+        # Flow points are stale after an idle stretch or a resolution change, so the next busy frame is a keyframe
+        if cadence is not None and not stale_flow and self._frames_since_keyframe + 1 < cadence.interval:
+            with self.metrics.stage("propagate"):
+                displacements, motion, lost_ratio = self.propagator.step(frame)
+            if not cadence.update(motion, lost_ratio):
+                cadence.propagated += 1
+                self.last_keyframe = False
+                return frame, self.propagate_tracks(frame, displacements)
+        self.last_keyframe = True
+        return frame, None
+
+    def end_keyframe(self, frame, tracks):
+        """Update the detection cadence and flow points after a detector run"""
+        if self.cadence is not None:
+            previous_ids = set(self._keyframe_ids)
+            self._keyframe_ids = [track["id"] for track in tracks]
+            self.cadence.on_keyframe(previous_ids, set(self._keyframe_ids))
+            self.propagator.reset(frame, tracks)
+        return tracks
+
+    def track_persons(self, frame):
+        """Resize the frame and run person detection with ByteTrack.
+
+        Returns the resized frame and one dict per tracked person holding its
+        ID, center/size, corner box and a snapshot of its trail.
+        """
+        frame, tracks = self.begin_frame(frame)
+        if tracks is not None:
+            return frame, tracks
+        if self.tracker is None:
+            with self.metrics.stage("detect_track"):
+                tracks = self._build_tracks(self._run_model_tracker(frame))
+        else:
+            tracks = self.track_detections(frame, self.detect_keyframe(frame))
+        return frame, self.end_keyframe(frame, tracks)
+
+    def analyze_faces(self, frame, tracks, current_time=None, detect=True):
+        """Run batched face detection and the emotion schedule for ``tracks``.
+
+        Adds the faces found this frame to every track dict, plus a copy of its
+        emotion state so rendering can safely happen on another thread. With
+        ``detect=False`` (propagated frames) only the known emotions are attached.
+        """
+        if current_time is None:
+            current_time = time.time()
+        if self.frame_size is None:
+            self._rescale_faces(frame)
+        self.expire_state(current_time)
+        if not detect:
+            for track in tracks:
+                track["faces"] = []
+            return self.attach_emotions(tracks)
+        face_tracks, face_rois = [], []
+        track_faces = {}
+        for track in tracks:
+            track["faces"] = []
+            x1, y1, x2, y2 = track["box"]
+            y1_safe = max(0, y1)
+            y2_safe = min(frame.shape[0], y2)
+            x1_safe = max(0, x1)
+            x2_safe = min(frame.shape[1], x2)
+            # Only ROIs large enough for the face model (and inside the configured ROI) are queued
+            in_roi = self.roi is None or self.roi.contains((x1 + x2) / 2, (y1 + y2) / 2)
+            if in_roi and y2_safe - y1_safe > 20 and x2_safe - x1_safe > 20:
+                faces = self._cached_faces(track, current_time)
+                if faces is None:
+                    face_tracks.append(track)
+                    face_rois.append((x1_safe, y1_safe, x2_safe, y2_safe))
+                    continue
+                track["faces"] = faces
+                if faces:
+                    self._remember_face(track, faces[-1])
+                    track_faces[track["id"]] = faces[-1]
+        # One batched face-model pass for every person in the frame (the face stage is optional)
+        faces_per_roi = []
+        if face_rois and self.face_model is not None:
+            with self.metrics.stage("faces"):
+                faces_per_roi = self.detect_faces(frame, face_rois)
+        for track, faces in zip(face_tracks, faces_per_roi):
+            track["faces"] = faces
+            self.face_cache[track["id"]] = {"box": track["box"], "faces": faces, "time": current_time}
+            if faces:
+                self._remember_face(track, faces[-1])
+                track_faces[track["id"]] = faces[-1]
+        # One batched emotion pass over the tracks that are due for a refresh
+        if track_faces and self.emotion_detector is not None:
+            self.update_emotions(frame, track_faces, current_time)
+        return self.attach_emotions(tracks)
+
+    def _remember_face(self, track, face):
+        """Keep the face box that emotions are shown for, with the person box it was found in"""
+        state = self.person_emotions[track["id"]]
+        state["last_face"] = face
+        state["face_anchor"] = tuple(track["box"])
+
+    def _cached_faces(self, track, current_time):
+        """Faces from the cache, shifted with the person box, or None on a miss.
+
+        A hit needs a face result younger than ``face_cache_ttl`` seconds and a
+        person box overlapping the cached one by at least ``face_cache_iou``.
+        """
+        if self.face_model is None or self.face_cache_ttl <= 0:
+            return None
+        cached = self.face_cache.get(track["id"])
+        if (cached is None or current_time - cached["time"] > self.face_cache_ttl
+                or box_iou(cached["box"], track["box"]) < self.face_cache_iou):
+            self.face_cache_misses += 1
+            return None
+        self.face_cache_hits += 1
+        dx = track["box"][0] - cached["box"][0]
+        dy = track["box"][1] - cached["box"][1]
+        return [(fx1 + dx, fy1 + dy, fx2 + dx, fy2 + dy) for fx1, fy1, fx2, fy2 in cached["faces"]]
+
+    def expire_state(self, now):
+        """Drop face and emotion state for tracks not seen within ``track_ttl`` seconds.
+
+        Runs on the faces stage; trails (``track_history``) are expired by
+        :meth:`begin_frame` on the tracking stage, so each store is only ever
+        touched by one pipeline thread.
+        """
+        for store in (self.person_emotions, self.face_cache):
+            store.expire(now)
+
+    def cache_stats(self):
+        """Sizes, hit rates and eviction counts of the per-track stores and face cache"""
+        lookups = self.face_cache_hits + self.face_cache_misses
+        return {
+            "track_history": self.track_history.stats(),
+            "person_emotions": self.person_emotions.stats(),
+            "face_cache": dict(self.face_cache.stats(), reuse_hits=self.face_cache_hits,
+                               reuse_misses=self.face_cache_misses,
+                               reuse_rate=round(self.face_cache_hits / lookups, 3) if lookups else 0.0),
+        }
+
+    def motion_stats(self):
+        """Idle/busy frame counts and CPU time per hour from the motion gate (None without one)"""
+        return self.motion_gate.report() if self.motion_gate is not None else None
+
+    def attach_emotions(self, tracks):
+        """Copy each track's current emotion state into its dict.
+
+        The face box moves with the person box since the frame it was found in,
+        so it follows persons on propagated frames instead of staying behind.
+        """
+        for track in tracks:
+            emotion = dict(self.person_emotions[track["id"]]) if track["id"] in self.person_emotions else None
+            if emotion is not None and "last_face" in emotion:
+                dx = track["box"][0] - emotion["face_anchor"][0]
+                dy = track["box"][1] - emotion["face_anchor"][1]
+                fx1, fy1, fx2, fy2 = emotion["last_face"]
+                emotion["last_face"] = (fx1 + dx, fy1 + dy, fx2 + dx, fy2 + dy)
+            track["emotion"] = emotion
+        return tracks
+
+    def build_result(self, frame, tracks, fps=0.0):
+        """Compact, JSON-serializable description of one processed frame.
+
+        Boxes and trail points are integer pixel coordinates in the processed
+        frame (``frame_size``). ``emotion`` is None until an emotion is known
+        for a track whose face has been seen.
+        """
+        result_tracks = []
+        for track in tracks:
+            emotion = None
+            emotion_data = track.get("emotion")
+            if emotion_data and "last_face" in emotion_data and emotion_data["emotion"] != "Unknown":
+                emotion = {
+                    "label": emotion_data["emotion"],
+                    "confidence": round(float(emotion_data["confidence"]), 3),
+                    "face": [int(v) for v in emotion_data["last_face"]],
+                }
+            result_tracks.append({
+                "id": int(track["id"]),
+                "box": [int(v) for v in track["box"]],
+                "faces": [[int(v) for v in face] for face in track.get("faces", [])],
+                "emotion": emotion,
+                "trail": np.asarray(track["trail"]).tolist(),
+            })
+        self.metrics.record_frame(persons=len(result_tracks),
+                                  faces=sum(len(track["faces"]) for track in result_tracks),
+                                  keyframes=int(self.last_keyframe))
+        return {
+            "frame_size": [int(frame.shape[1]), int(frame.shape[0])],
+            "fps": round(float(fps), 2),
+            "total_persons": len(result_tracks),
+            "tracks": result_tracks,
+        }
+
+    def analyze_frame(self, frame):
+        """Run tracking, face and emotion stages without drawing anything.
+
+        Returns the processed (resized) frame and the structured result from
+        :meth:`build_result`; pass both to ``renderer.draw_result`` to draw.
+        """
+        frame, _, result = self._analyze(frame)
+        return frame, result
+
+    def _analyze(self, frame):
+        current_time = time.time()
+        frame, tracks = self.track_persons(frame)
+        self.analyze_faces(frame, tracks, current_time, detect=self.last_keyframe)
+        return frame, tracks, self.build_result(frame, tracks, self.update_fps())
+
+    def update_fps(self):
+        """Count one finished frame and return the FPS over the last second"""
         # FPS calculation (simple)
-        current_fps = 0.0
         if not hasattr(self, '_fps_counter'):
             self._fps_counter = {'prev_time': time.time(), 'frame_count': 0, 'fps': 0.0}
         self._fps_counter['frame_count'] += 1
@@ -104,5 +654,16 @@ class PersonTrackerEngine:
             self._fps_counter['fps'] = self._fps_counter['frame_count'] / diff
             self._fps_counter['frame_count'] = 0
             self._fps_counter['prev_time'] = now
-        current_fps = self._fps_counter['fps']
-        return draw_frame, self.person_emotions, self.last_emotion_time, current_fps, total_person_detected
+        return self._fps_counter['fps']
+
+    def process_frame(self, frame, in_place=False):
+        """Analyze and draw one frame.
+
+        With ``in_place=True`` the annotations are drawn straight onto the
+        processed frame, which is ``frame`` itself when it is already at ``frame_size``;
+        use it when the caller does not need the original pixels afterwards.
+        """
+        frame, tracks, result = self._analyze(frame)
+        with self.metrics.stage("render"):
+            draw_frame = draw_result(frame, result, copy=not in_place, trails=[track["trail"] for track in tracks])
+        return draw_frame, self.person_emotions, self.last_emotion_time, result["fps"], result["total_persons"]
@@ -1,25 +1,58 @@
 # Modern OpenCV Viewer for Person Tracker Engine
 # Enhanced interface with modern features and controls
 
+import time
+LAUNCH_TIME = time.perf_counter()  # for the startup report (imports, time to first frame)
+
 import cv2
 import numpy as np
 import os
-import time
 import argparse
-from ultralytics import YOLO
-from fer import FER
+from backends import BACKENDS, MODEL_VARIANTS
+from capture import LatestFrameReader, resolve_stream_url
 from engine import PersonTrackerEngine
+from metrics import Metrics, NULL_METRICS
+from model_loader import load_model_set, models_failed, models_ready, preload
+from motion import MOTION_METHODS, RoiMask, parse_polygon
+from multicam import CameraSource, MultiCameraScheduler, mosaic
+from pipeline import FramePipeline, END_OF_STREAM, QUEUE_POLICIES
+IMPORT_SECONDS = time.perf_counter() - LAUNCH_TIME
 
 class ModernPersonTrackerViewer:
-    def __init__(self, source='webcam', youtube_url=None, webcam_id=0, conf=0.4):
+    def __init__(self, source='webcam', youtube_url=None, webcam_id=0, conf=0.4,
+                 pipeline=False, queue_size=2, queue_policy='drop_oldest',
+                 detect_interval=1, adaptive_cadence=True, backend='ultralytics', intra_op_threads=0,
+                 model_variant='fp32', debug_hud=False, sources=None, max_fps=0.0, batch_size=8,
+                 show_mosaic=False, roi=None, motion_gate=None, motion_threshold=0.002, video_path=None,
+                 decode_width=1280, reconnect=True, emotions=True, tiling=None):
         self.source = source
         self.youtube_url = youtube_url
         self.webcam_id = webcam_id
+        self.video_path = video_path
+        # Capture reader: frames wider than decode_width are downscaled off the UI thread,
+        # except with tiling, which needs the full source resolution
+        if tiling is not None:
+            decode_width = 0
+        self.decode_width = decode_width
+        self.reconnect = reconnect
+        self.emotions = emotions
+        self._first_frame_reported = False
         self.conf = conf
         
+        # Pipelined execution (one thread per stage)
+        self.use_pipeline = pipeline
+        self.queue_size = queue_size
+        self.queue_policy = queue_policy
+        
         # UI State
         self.is_fullscreen = False
         self.is_paused = False
+        self._paused_frame = None
+        # Debug HUD with per-stage latency; instrumentation is only switched on with it
+        self.metrics = Metrics() if debug_hud else NULL_METRICS
+        self.show_hud = debug_hud
+        self._hud_snapshot = None
+        self._hud_updated = 0.0
         self.window_name = "Person Tracker - Modern View"
         
         # Colors (BGR format for OpenCV)
@@ -35,8 +68,31 @@ class ModernPersonTrackerViewer:
         }
         
         # Initialize models
+        self.backend = backend
+        self.intra_op_threads = intra_op_threads
+        self.model_variant = model_variant
         self.init_models()
         
+        # Optional polygon ROIs and motion gate (see motion.py) and tiled detection on the
+        # full-resolution frame (see tiling.py), applied to every source
+        self.roi_mask = RoiMask(roi) if roi else None
+        gate_kwargs = {'roi': roi, 'motion_gate': motion_gate, 'motion_threshold': motion_threshold,
+                       'tiling': tiling}
+        
+        # Multi-camera mode: every --sources entry gets its own capture thread and tracker
+        # state; one scheduler batches person detection across them (see multicam.py)
+        self.scheduler = None
+        self.show_mosaic = show_mosaic
+        self.focus = 0
+        if sources:
+            self.cameras = [CameraSource(i, spec, max_fps, decode_width, self.metrics) for i, spec in enumerate(sources)]
+            self.scheduler = MultiCameraScheduler(
+                self.person_model, self.face_model, self.emotion_detector, self.cameras,
+                batch_size=batch_size, conf=conf, detect_interval=detect_interval,
+                adaptive_cadence=adaptive_cadence, metrics=self.metrics, **gate_kwargs)
+            self.tracker_engine = None
+            return
+        
         # Initialize video source
         self.init_video_source()
         
@@ -45,100 +101,83 @@ class ModernPersonTrackerViewer:
             self.person_model, 
             self.face_model, 
             self.emotion_detector, 
-            conf=conf
+            conf=conf,
+            detect_interval=detect_interval,
+            adaptive_cadence=adaptive_cadence,
+            # The sequential loop is done with each frame before reading the next
+            reuse_buffers=not pipeline,
+            metrics=self.metrics,
+            **gate_kwargs
         )
 
     def init_models(self):
-        """Initialize YOLO models and emotion detector"""
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        
-        print("🚀 Loading AI Models...")
-        
-        # Load person detection model
-        person_onnx_path = os.path.join(current_dir, 'models', 'yolov8n.onnx')
-        if os.path.exists(person_onnx_path):
-            print("✅ Loading ONNX person detection model")
-            self.person_model = YOLO(person_onnx_path, task='detect')
-        else:
-            print("⚠️ ONNX not found, loading PyTorch model")
-            self.person_model = YOLO('yolov8n.pt')
-        
-        # Load face detection model
-        face_onnx_path = os.path.join(current_dir, 'models', 'yolov8n-face-lindevs.onnx')
-        if os.path.exists(face_onnx_path):
-            print("✅ Loading ONNX face detection model")
-            self.face_model = YOLO(face_onnx_path, task='detect')
-        else:
-            face_pt_path = os.path.join(current_dir, 'models', 'archive', 'yolov8n-face-lindevs.pt')
-            if os.path.exists(face_pt_path):
-                print("⚠️ Loading PyTorch face detection model")
-                self.face_model = YOLO(face_pt_path)
-            else:
-                raise FileNotFoundError("No face detection model found!")
-        
-        # Initialize emotion detector
-        print("🎭 Loading emotion detection model")
-        self.emotion_detector = FER()
-        print("✅ All models loaded successfully!")
+        """Create the detectors and emotion detector lazily and start loading them in the background.
+
+        The window and video source open while the models load; a disabled
+        emotion stage never imports FER/TensorFlow.
+        """
+        print(f"🚀 Preparing AI Models ({self.backend} backend, {self.model_variant})...")
+        self.person_model, self.face_model, self.emotion_detector = load_model_set(
+            self.backend, self.intra_op_threads, self.model_variant, emotions=self.emotions)
+        self.models = (self.person_model, self.face_model, self.emotion_detector)
+        preload(self.models)
 
     def init_video_source(self):
-        """Initialize video capture source"""
+        """Open the source on a background reader that always hands out the newest frame"""
         if self.source == 'youtube':
-            stream_url = self._get_video_stream_url(self.youtube_url)
-            if not stream_url:
-                raise ValueError("Failed to get YouTube video URL")
-            self.cap = cv2.VideoCapture(stream_url)
+            # Resolved stream URLs are cached on disk; the reader re-resolves on reconnect
+            source = lambda refresh=False: self._get_video_stream_url(self.youtube_url, refresh)
+        elif self.source == 'file':
+            if not self.video_path or not os.path.isfile(self.video_path):
+                raise ValueError(f"Video file not found: {self.video_path}")
+            source = self.video_path
         else:
-            self.cap = cv2.VideoCapture(self.webcam_id)
-        
-        if not self.cap.isOpened():
-            raise ValueError(f"Failed to open video source: {self.source}")
+            source = self.webcam_id
+        self.cap = LatestFrameReader(source, decode_width=self.decode_width, reconnect=self.reconnect,
+                                     metrics=self.metrics)
     
-    def _get_video_stream_url(self, youtube_url):
-        """Get video stream URL from YouTube using yt-dlp"""
-        import subprocess
-        
-        formats = {
-            "270": "1080p",
-            "311": "720p60", 
-            "232": "720p",
-            "136": "720p",
-            "135": "480p",
-            "134": "360p",
-            "133": "240p",
-            "160": "144p"
-        }
-        
-        for fmt in formats.keys():
-            cmd = ["yt-dlp", "-g", "-f", fmt, youtube_url]
-            try:
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-                video_url = result.stdout.strip()
-                if video_url:
-                    print(f"\r✅ Found video URL for {formats[fmt]}")
-                    return video_url
-                else:
-                    print(f"\r❌ Format {formats[fmt]} not available, trying lower quality...")
-            except subprocess.TimeoutExpired:
-                print(f"\r⏱️ Timeout for {formats[fmt]}, trying next format...")
-            except Exception as e:
-                print(f"\r❌ Error getting {formats[fmt]}: {e}")
-        
-        print("\r❌ No valid MP4 video format found.")
-        return None
+    def _get_video_stream_url(self, youtube_url, refresh=False):
+        """Get video stream URL from YouTube using yt-dlp (cached on disk until it expires)"""
+        return resolve_stream_url(youtube_url, refresh=refresh)
+
+    def tint_region(self, frame, x1, y1, x2, y2, color, alpha, outline=None):
+        """Blend a filled box (and optional 1px outline) into ``frame`` in place, touching only that region"""
+        x1, y1, x2, y2 = max(0, x1), max(0, y1), min(frame.shape[1], x2), min(frame.shape[0], y2)
+        roi = frame[y1:y2, x1:x2]
+        if roi.size == 0:
+            return frame
+        block = np.empty_like(roi)
+        block[:] = color
+        if outline is not None:
+            cv2.rectangle(block, (0, 0), (x2 - x1 - 1, y2 - y1 - 1), outline, 1)
+        cv2.addWeighted(block, alpha, roi, 1 - alpha, 0, dst=roi)
+        return frame
+
+    def draw_pause_indicator(self, frame):
+        """Pause indicator in top right below FPS"""
+        w = frame.shape[1]
+        pause_text = "|| PAUSED"
+        pause_w, _ = cv2.getTextSize(pause_text, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)[0]
+        pause_x = w - pause_w - 20
+        cv2.putText(frame, pause_text, (pause_x, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, self.colors['warning'], 2)
+        return frame
+
+    def describe_source(self):
+        """Source label for the header"""
+        if self.scheduler is None:
+            return {'youtube': 'YouTube', 'file': 'File'}.get(self.source, 'Webcam')
+        if self.show_mosaic:
+            return f"Mosaic ({len(self.cameras)} cameras)"
+        return f"{self.cameras[self.focus].name} ({self.focus + 1}/{len(self.cameras)})"
 
     def draw_modern_overlay(self, frame, fps, total_persons, paused=False):
-        """Draw modern UI overlay with glass morphism effect"""
+        """Draw modern UI overlay with glass morphism effect (in place on ``frame``)"""
         h, w = frame.shape[:2]
-        overlay = frame.copy()
         
-        # Create semi-transparent background for header
+        # Semi-transparent background for header (lighter tint for better text visibility)
         header_height = 90
-        cv2.rectangle(overlay, (0, 0), (w, header_height), self.colors['dark'], -1)
-        
-        # Apply transparency for header (lighter tint for better text visibility)
         alpha = 0.6
-        frame = cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0)
+        self.tint_region(frame, 0, 0, w, header_height + 1, self.colors['dark'], alpha)
         
         # Title in top left with glow effect
         title = "PERSON TRACKER - AI VISION"
@@ -152,7 +191,7 @@ class ModernPersonTrackerViewer:
         cv2.putText(frame, title, (20, title_y), title_font, title_scale, self.colors['primary'], title_thickness)
         
         # Source indicator below title (smaller)
-        source_text = f"Source: {'YouTube' if self.source == 'youtube' else 'Webcam'}"
+        source_text = f"Source: {self.describe_source()}"
         source_y = title_y + 25
         cv2.putText(frame, source_text, (20, source_y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, self.colors['secondary'], 1)
         
@@ -167,12 +206,8 @@ class ModernPersonTrackerViewer:
         fps_x = w - fps_w - 20
         cv2.putText(frame, fps_text, (fps_x, 35), cv2.FONT_HERSHEY_SIMPLEX, 0.8, self.colors['success'], 2)
         
-        # Pause indicator in top right below FPS
         if paused:
-            pause_text = "|| PAUSED"
-            pause_w, _ = cv2.getTextSize(pause_text, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)[0]
-            pause_x = w - pause_w - 20
-            cv2.putText(frame, pause_text, (pause_x, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, self.colors['warning'], 2)
+            self.draw_pause_indicator(frame)
         
         # Controls help in middle bottom
         controls_y = h - 25
@@ -193,9 +228,6 @@ class ModernPersonTrackerViewer:
         # Add spacing between controls (30px each)
         total_controls_width += 30 * (len(controls) - 1)
         
-        # Create overlay for controls background
-        controls_overlay = frame.copy()
-        
         # Create a more precise background box for controls with padding
         padding_x = 20
         padding_y = 10
@@ -204,13 +236,9 @@ class ModernPersonTrackerViewer:
         controls_bg_y1 = controls_y - 20 - padding_y
         controls_bg_y2 = h - 5
         
-        # Draw background box with outline for controls
-        cv2.rectangle(controls_overlay, (controls_bg_x1, controls_bg_y1), (controls_bg_x2, controls_bg_y2), self.colors['dark'], -1)
-        # Add subtle outline
-        cv2.rectangle(controls_overlay, (controls_bg_x1, controls_bg_y1), (controls_bg_x2, controls_bg_y2), (80, 80, 80), 1)
-        
-        # Apply transparency for controls background
-        frame = cv2.addWeighted(controls_overlay, alpha, frame, 1 - alpha, 0)
+        # Semi-transparent background box for controls with a subtle outline
+        self.tint_region(frame, controls_bg_x1, controls_bg_y1, controls_bg_x2 + 1, controls_bg_y2 + 1,
+                         self.colors['dark'], alpha, outline=(80, 80, 80))
         
         # Draw control text on top of the background
         x_offset = (w - total_controls_width) // 2
@@ -220,6 +248,67 @@ class ModernPersonTrackerViewer:
         
         return frame
 
+    def draw_debug_hud(self, frame):
+        """Per-stage p50/p95/p99 latency (ms) and per-frame counts in a panel below the header"""
+        now = time.time()
+        if self._hud_snapshot is None or now - self._hud_updated >= 0.5:
+            self._hud_snapshot = self.metrics.snapshot()
+            self._hud_updated = now
+        stages = self._hud_snapshot['stages']
+        per_frame = self._hud_snapshot['per_frame']
+        counters = self._hud_snapshot['counters']
+        rows = [('stage', 'p50', 'p95', 'p99')]
+        rows += [(stage, f"{s['p50_ms']:.1f}", f"{s['p95_ms']:.1f}", f"{s['p99_ms']:.1f}") for stage, s in stages.items()]
+        footer = [
+            f"persons/frame {per_frame.get('persons', 0):.1f}  faces/frame {per_frame.get('faces', 0):.1f}",
+            f"emotion calls {counters.get('emotion_calls', 0)}  dropped {counters.get('dropped_frames', 0)}"
+            f"  idle {counters.get('idle_frames', 0)}",
+        ]
+        x, y, line_h = 20, 120, 18
+        self.tint_region(frame, x - 10, y - 16, x + 330, y + line_h * (len(rows) + len(footer)) - 8,
+                         self.colors['dark'], 0.6)
+        for i, row in enumerate(rows):
+            color = self.colors['secondary'] if i == 0 else self.colors['info']
+            for text, column in zip(row, (0, 130, 190, 250)):
+                cv2.putText(frame, text, (x + column, y + i * line_h), cv2.FONT_HERSHEY_SIMPLEX, 0.45, color, 1)
+        for i, text in enumerate(footer):
+            cv2.putText(frame, text, (x, y + (len(rows) + i) * line_h), cv2.FONT_HERSHEY_SIMPLEX, 0.45,
+                        self.colors['warning'], 1)
+        return frame
+
+    def draw_roi(self, frame):
+        """Outline the configured ROI polygons (processing-frame coordinates)"""
+        if self.roi_mask is not None:
+            self.roi_mask.draw(frame)
+        return frame
+
+    def engines(self):
+        if self.scheduler is not None:
+            return [camera.engine for camera in self.cameras]
+        return [self.tracker_engine]
+
+    def print_motion_report(self):
+        """CPU seconds per hour while idle vs busy, per engine with a motion gate"""
+        names = [camera.name for camera in self.cameras] if self.scheduler is not None else [self.source]
+        for engine, name in zip(self.engines(), names):
+            report = engine.motion_stats()
+            if report is None:
+                continue
+            print(f"💤 Motion gate ({name}):")
+            for state in ('busy', 'idle'):
+                usage = report[state]
+                print(f"   {state:>4}: {usage['frames']} frames, {usage['wall_s']:.0f}s wall, "
+                      f"{usage['cpu_s_per_hour']:.0f} CPU-s/hour ({usage['cpu_percent']:.0f}% of a core)")
+
+    def print_tiling_report(self):
+        """Tiles per keyframe for every engine with tiled detection"""
+        names = [camera.name for camera in self.cameras] if self.scheduler is not None else [self.source]
+        for engine, name in zip(self.engines(), names):
+            report = engine.tiling_stats()
+            if report is not None:
+                print(f"🧩 Tiling ({name}): {report['tiles_per_call']:.1f} of {report['tiles']} tiles per keyframe "
+                      f"({report['skipped_share']:.0%} skipped) over {report['calls']} keyframes")
+
     def draw_enhanced_detections(self, frame, person_emotions):
         """Draw enhanced bounding boxes and emotion labels"""
         # This method is called after the engine processes the frame
@@ -246,8 +335,19 @@ class ModernPersonTrackerViewer:
         """Handle keyboard input"""
         if key == ord('f') or key == ord('F'):
             self.toggle_fullscreen()
+        elif (key == ord('d') or key == ord('D')) and self.metrics.enabled:
+            self.show_hud = not self.show_hud
+        elif (key == ord('m') or key == ord('M')) and self.scheduler is not None:
+            self.show_mosaic = not self.show_mosaic
+        elif key == 9 and self.scheduler is not None:  # Tab: next camera
+            self.focus = (self.focus + 1) % len(self.cameras)
+            self.show_mosaic = False
+        elif ord('1') <= key <= ord('9') and self.scheduler is not None and key - ord('1') < len(self.cameras):
+            self.focus = key - ord('1')
+            self.show_mosaic = False
         elif key == ord(' '):  # Spacebar
             self.is_paused = not self.is_paused
+            self._paused_frame = None
             status = "paused" if self.is_paused else "resumed"
             print(f"⏯️ Video {status}")
         elif key == ord('q') or key == ord('Q') or key == 27:  # 'q' or Escape
@@ -255,11 +355,164 @@ class ModernPersonTrackerViewer:
             return False
         return True
 
+    def draw_paused_frame(self, last_frame):
+        """Pause screen: the last displayed frame plus a pause indicator, built once per pause"""
+        if self._paused_frame is None:
+            if last_frame is not None:
+                # last_frame already carries the overlay; copy it once so the indicator isn't baked in
+                self._paused_frame = self.draw_pause_indicator(last_frame.copy())
+            else:
+                # Create a black frame if no previous frame exists
+                black_frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+                self._paused_frame = self.draw_modern_overlay(black_frame, 0.0, 0, self.is_paused)
+        
+        # Sleep a bit when paused to reduce CPU usage
+        time.sleep(0.1)
+        return self._paused_frame
+
+    def run_pipelined(self):
+        """Main loop for pipelined mode: capture, tracking, faces and rendering overlap on worker threads"""
+        def apply_overlay(packet):
+            result = packet['result']
+            packet['final_frame'] = self.draw_modern_overlay(self.draw_roi(packet['draw_frame']), result['fps'],
+                                                             result['total_persons'])
+            if self.show_hud:
+                self.draw_debug_hud(packet['final_frame'])
+        
+        pipeline = FramePipeline(self.tracker_engine, source=self.cap, queue_size=self.queue_size,
+                                 policy=self.queue_policy, postprocess=apply_overlay).start()
+        print(f"🧵 Pipelined mode: queue size {self.queue_size}, policy '{self.queue_policy}'")
+        last_frame = None
+        last_report = time.time()
+        running = True
+        try:
+            while running:
+                pipeline.paused = self.is_paused
+                if not self.is_paused:
+                    packet = pipeline.get(timeout=0.1)
+                    if packet is END_OF_STREAM:
+                        print("⚠️ End of video stream or camera disconnected")
+                        break
+                    if packet is not None:
+                        self.report_first_frame()
+                        last_frame = packet['final_frame']
+                        cv2.imshow(self.window_name, last_frame)
+                else:
+                    cv2.imshow(self.window_name, self.draw_paused_frame(last_frame))
+                
+                # Print per-stage latency and queue depth every few seconds
+                if time.time() - last_report >= 5.0:
+                    last_report = time.time()
+                    for stage, stats in pipeline.report().items():
+                        print(f"   {stage:>8}: {stats.get('latency_ms', 0.0):6.1f} ms "
+                              f"| queue {stats['queue_depth']} | dropped {stats['dropped']}")
+                
+                key = cv2.waitKey(1) & 0xFF
+                if not self.handle_keypress(key):
+                    running = False
+        finally:
+            pipeline.stop()
+
+    def compose_multi_view(self, outputs):
+        """Focused camera or mosaic of all cameras, with the overlay; ``outputs`` from scheduler.latest()"""
+        if self.show_mosaic:
+            frame = mosaic([outputs[c.index][1] if c.index in outputs else None for c in self.cameras],
+                           [c.name for c in self.cameras])
+            results = [entry[2] for entry in outputs.values()]
+        else:
+            entry = outputs.get(self.focus)
+            # The scheduler's frame may still be shown in the mosaic, so draw on a copy
+            frame = entry[1].copy() if entry is not None else np.zeros((720, 1280, 3), dtype=np.uint8)
+            self.draw_roi(frame)
+            results = [entry[2]] if entry is not None else []
+        fps = sum(result['fps'] for result in results)
+        total_persons = sum(result['total_persons'] for result in results)
+        self.draw_modern_overlay(frame, fps, total_persons)
+        if self.show_hud:
+            self.draw_debug_hud(frame)
+        return frame
+
+    def run_multi(self):
+        """Main loop for multi-camera mode: inference runs on the scheduler thread, the UI shows one camera or a mosaic"""
+        self.scheduler.start()
+        print(f"📷 Multi-camera mode: {len(self.cameras)} sources, person-detector batches of up to "
+              f"{self.scheduler.batch_size}")
+        last_frame, shown = None, None
+        last_report = time.time()
+        running = True
+        try:
+            while running:
+                self.scheduler.paused = self.is_paused
+                if self.scheduler.finished():
+                    print("⚠️ All video sources ended or disconnected")
+                    break
+                if not self.is_paused:
+                    outputs = self.scheduler.latest()
+                    # Only recompose when the shown camera(s) produced a new frame
+                    if self.show_mosaic:
+                        view = ('mosaic',) + tuple(outputs[c.index][0] if c.index in outputs else 0 for c in self.cameras)
+                    else:
+                        view = ('focus', self.focus, outputs[self.focus][0] if self.focus in outputs else 0)
+                    if view != shown:
+                        if outputs:
+                            self.report_first_frame()
+                        shown = view
+                        last_frame = self.compose_multi_view(outputs)
+                    final_frame = last_frame
+                else:
+                    final_frame = self.draw_paused_frame(last_frame)
+                cv2.imshow(self.window_name, final_frame)
+                
+                # Print per-camera throughput every few seconds
+                if time.time() - last_report >= 5.0:
+                    last_report = time.time()
+                    report = self.scheduler.report()
+                    print(f"   mean person-detector batch: {report['mean_batch']}")
+                    for entry in report['sources']:
+                        print(f"   {entry['name']:>20}: {entry['fps']:5.1f} FPS | processed {entry['processed']} "
+                              f"| dropped {entry['dropped']}")
+                
+                key = cv2.waitKey(1) & 0xFF
+                if not self.handle_keypress(key):
+                    running = False
+        finally:
+            self.scheduler.stop()
+
+    def report_first_frame(self):
+        """Print import time and time from launch to the first processed frame, once"""
+        if not self._first_frame_reported:
+            self._first_frame_reported = True
+            print(f"⏱️ First frame processed {time.perf_counter() - LAUNCH_TIME:.2f}s after launch "
+                  f"(imports {IMPORT_SECONDS:.2f}s)")
+
+    def show_loading_screen(self):
+        """Show the live source with a loading banner until the background preload finishes; False on quit"""
+        while not models_ready(self.models):
+            failed = models_failed(self.models)
+            if failed:
+                raise RuntimeError(f"Failed to load: {', '.join(failed)}")
+            frame = None
+            if self.scheduler is None:
+                _, frame = self.cap.read(timeout=0.1)
+            if frame is None:
+                frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+                time.sleep(0.05)
+            self.draw_modern_overlay(frame, 0.0, 0)
+            text = "Loading models..."
+            text_w, _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 1.0, 2)[0]
+            cv2.putText(frame, text, ((frame.shape[1] - text_w) // 2, frame.shape[0] // 2),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1.0, self.colors['warning'], 2)
+            cv2.imshow(self.window_name, frame)
+            if not self.handle_keypress(cv2.waitKey(1) & 0xFF):
+                return False
+        print(f"✅ All models loaded {time.perf_counter() - LAUNCH_TIME:.2f}s after launch")
+        return True
+
     def run(self):
         """Main application loop"""
         print(f"🎬 Starting Person Tracker Viewer")
-        print(f"📹 Source: {self.source}")
-        if self.source == 'youtube':
+        print(f"📹 Source: {self.source if self.scheduler is None else ', '.join(c.name for c in self.cameras)}")
+        if self.source == 'youtube' and self.scheduler is None:
             print(f"🔗 URL: {self.youtube_url}")
         
         # Create window
@@ -279,59 +532,128 @@ class ModernPersonTrackerViewer:
         print("🎮 CONTROLS:")
         print("   [F] - Toggle Fullscreen")
         print("   [SPACE] - Pause/Resume")
+        if self.metrics.enabled:
+            print("   [D] - Toggle Debug HUD")
+        if self.scheduler is not None:
+            print("   [M] - Toggle Mosaic View")
+            print("   [TAB] / [1-9] - Next / Select Camera")
         print("   [Q] - Quit Application")
         print("="*60)
-        while running:
-            if not self.is_paused:
-                ret, frame = self.cap.read()
-                if not ret:
-                    print("⚠️ End of video stream or camera disconnected")
-                    break
-                last_frame = frame.copy()
-                
-                # Process frame through tracker engine only when not paused
-                processed_frame, person_emotions, _, fps, total_persons = self.tracker_engine.process_frame(frame)
-                
-                # Apply modern overlay
-                final_frame = self.draw_modern_overlay(processed_frame, fps, total_persons, self.is_paused)
-            else:
-                # When paused, use last frame without processing to save CPU
-                if last_frame is not None:
-                    # Just apply overlay to the last frame without any AI processing
-                    final_frame = self.draw_modern_overlay(last_frame, 0.0, 0, self.is_paused)
+        if not self.show_loading_screen():
+            running = False
+        elif self.scheduler is not None:
+            self.run_multi()
+        elif self.use_pipeline:
+            self.run_pipelined()
+        else:
+            while running:
+                if not self.is_paused:
+                    with self.metrics.stage('capture'):
+                        ret, frame = self.cap.read()
+                    if not ret:
+                        print("⚠️ End of video stream or camera disconnected")
+                        break
+                    
+                    # Process frame through tracker engine only when not paused; nothing needs the
+                    # raw pixels afterwards, so boxes and overlay are drawn onto the frame in place
+                    processed_frame, person_emotions, _, fps, total_persons = self.tracker_engine.process_frame(
+                        frame, in_place=True)
+                    self.report_first_frame()
+                    
+                    # Apply modern overlay
+                    with self.metrics.stage('overlay'):
+                        final_frame = self.draw_modern_overlay(self.draw_roi(processed_frame), fps, total_persons,
+                                                               self.is_paused)
+                    if self.show_hud:
+                        self.draw_debug_hud(final_frame)
+                    last_frame = final_frame
                 else:
-                    # Create a black frame if no previous frame exists
-                    black_frame = np.zeros((720, 1280, 3), dtype=np.uint8)
-                    final_frame = self.draw_modern_overlay(black_frame, 0.0, 0, self.is_paused)
+                    final_frame = self.draw_paused_frame(last_frame)
+                
+                # Display frame
+                with self.metrics.stage('display'):
+                    cv2.imshow(self.window_name, final_frame)
+                    key = cv2.waitKey(1) & 0xFF
                 
-                # Sleep a bit when paused to reduce CPU usage
-                time.sleep(0.1)
-            
-            # Display frame
-            cv2.imshow(self.window_name, final_frame)
-            
-            # Handle keyboard input
-            key = cv2.waitKey(1) & 0xFF
-            if not self.handle_keypress(key):
-                running = False
+                # Handle keyboard input
+                if not self.handle_keypress(key):
+                    running = False
         
         # Cleanup
-        self.cap.release()
+        self.print_motion_report()
+        self.print_tiling_report()
+        if self.scheduler is None:
+            stats = self.cap.stats()
+            print(f"📉 Capture: {stats['captured']} frames read, {stats['dropped']} stale frames dropped, "
+                  f"{stats['reconnects']} reconnects")
+            self.cap.release()
         cv2.destroyAllWindows()
         print("✅ Application closed successfully")
 
 def main():
     parser = argparse.ArgumentParser(description='Modern Person Tracker Viewer')
     parser.add_argument('--source', type=str, default='webcam', 
-                       choices=['webcam', 'youtube'], 
-                       help='Source type: "webcam" or "youtube"')
+                       choices=['webcam', 'youtube', 'file'], 
+                       help='Source type: "webcam", "youtube" or a local "file"')
     parser.add_argument('--youtube_url', type=str, 
                        default='https://youtu.be/su33E1lreMc?si=b2ritLiv6uCMKOx3',
                        help='YouTube URL if source is youtube')
     parser.add_argument('--webcam_id', type=int, default=0, 
                        help='Webcam device ID if source is webcam')
+    parser.add_argument('--video_path', type=str, default=None,
+                       help='Local video file if source is file (read at its native frame rate)')
+    parser.add_argument('--decode_width', type=int, default=1280,
+                       help='Downscale captured frames wider than this on the capture thread (0 = off)')
+    parser.add_argument('--no_reconnect', action='store_true',
+                       help='Stop instead of reconnecting when a live source drops')
     parser.add_argument('--conf', type=float, default=0.4, 
                        help='Confidence threshold for detection')
+    parser.add_argument('--pipeline', action='store_true',
+                       help='Run capture, tracking, face/emotion and rendering as a threaded pipeline')
+    parser.add_argument('--queue_size', type=int, default=2,
+                       help='Bounded queue size between pipeline stages')
+    parser.add_argument('--queue_policy', type=str, default='drop_oldest', choices=QUEUE_POLICIES,
+                       help='What to do when a pipeline queue is full: drop the oldest frame or block')
+    parser.add_argument('--detect_interval', type=int, default=1,
+                       help='Maximum frames between person-detector keyframes; tracks follow optical flow in between')
+    parser.add_argument('--fixed_cadence', action='store_true',
+                       help='Always detect every --detect_interval frames instead of adapting to motion')
+    parser.add_argument('--backend', type=str, default='ultralytics', choices=BACKENDS,
+                       help='Inference backend for the ONNX detectors')
+    parser.add_argument('--intra_op_threads', type=int, default=0,
+                       help='ONNX Runtime intra-op threads (0 = runtime default)')
+    parser.add_argument('--model_variant', type=str, default='fp32', choices=MODEL_VARIANTS,
+                       help='ONNX model variant produced by convert_models.py')
+    parser.add_argument('--no_emotions', action='store_true',
+                       help='Disable emotion recognition (FER/TensorFlow are never imported)')
+    parser.add_argument('--debug_hud', action='store_true',
+                       help='Record per-stage latency and show it in a HUD (toggle with D)')
+    parser.add_argument('--sources', nargs='+', default=None,
+                       help='Multi-camera mode: webcam IDs, video files and/or stream URLs served by one process')
+    parser.add_argument('--max_fps', type=float, default=0.0,
+                       help='Per-source processing FPS cap in multi-camera mode (0 = no cap)')
+    parser.add_argument('--batch_size', type=int, default=8,
+                       help='Maximum frames per batched person-detector call in multi-camera mode')
+    parser.add_argument('--roi', type=str, action='append', default=None,
+                       help='ROI polygon as "x1,y1 x2,y2 x3,y3 ..." in 1280x720 pixels (repeat for several)')
+    parser.add_argument('--motion_gate', type=str, default=None, choices=MOTION_METHODS,
+                       help='Skip inference on frames without motion (frame differencing or MOG2)')
+    parser.add_argument('--motion_threshold', type=float, default=0.002,
+                       help='Fraction of (ROI) pixels that must change to count as motion')
+    parser.add_argument('--tiling', action='store_true',
+                       help='Detect persons on overlapping tiles of the full-resolution frame (implies --decode_width 0)')
+    parser.add_argument('--tile_size', type=int, default=0,
+                       help='Tile side in source pixels (0 = derive from --min_person_height and the resolution)')
+    parser.add_argument('--min_person_height', type=int, default=48,
+                       help='Smallest person height in source pixels that tiling should still detect')
+    parser.add_argument('--tile_overlap', type=float, default=0.2,
+                       help='Minimum overlap between neighbouring tiles')
+    parser.add_argument('--tile_idle_interval', type=int, default=8,
+                       help='Run tiles without recent detections or motion only every N keyframes')
+    parser.add_argument('--max_tiles', type=int, default=0,
+                       help='Cap on tiles per keyframe, least recently run first (0 = no cap)')
+    parser.add_argument('--mosaic', action='store_true',
+                       help='Start multi-camera mode in the tiled mosaic view (toggle with M)')
     
     args = parser.parse_args()
     
@@ -340,7 +662,30 @@ def main():
             source=args.source,
             youtube_url=args.youtube_url,
             webcam_id=args.webcam_id,
-            conf=args.conf
+            conf=args.conf,
+            pipeline=args.pipeline,
+            queue_size=args.queue_size,
+            queue_policy=args.queue_policy,
+            detect_interval=args.detect_interval,
+            adaptive_cadence=not args.fixed_cadence,
+            backend=args.backend,
+            intra_op_threads=args.intra_op_threads,
+            model_variant=args.model_variant,
+            debug_hud=args.debug_hud,
+            sources=args.sources,
+            max_fps=args.max_fps,
+            batch_size=args.batch_size,
+            show_mosaic=args.mosaic,
+            roi=[parse_polygon(text) for text in args.roi] if args.roi else None,
+            motion_gate=args.motion_gate,
+            motion_threshold=args.motion_threshold,
+            video_path=args.video_path,
+            decode_width=args.decode_width,
+            reconnect=not args.no_reconnect,
+            emotions=not args.no_emotions,
+            tiling={'tile_size': args.tile_size or None, 'min_person_height': args.min_person_height,
+                    'overlap': args.tile_overlap, 'idle_interval': args.tile_idle_interval,
+                    'max_tiles': args.max_tiles} if args.tiling else None
         )
         viewer.run()
     except KeyboardInterrupt:
@@ -0,0 +1,140 @@
+# Per-stage latency and per-frame counters for PersonTrackerEngine
+# Exposed as Prometheus text by the web server (/metrics) and as the GUI debug HUD
+
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+class _StageTimer:
+    __slots__ = ('metrics', 'stage', 'start')
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+class Metrics:
+    """Thread-safe latency windows per stage plus monotonically increasing counters.
+
+    Quantiles come from the last ``window`` samples of each stage; counts and
+    sums cover the whole lifetime, like a Prometheus summary.
+    """
+    enabled = True
+
+    def __init__(self, window=1024):
+        self.window = window
+        self.started = time.time()
+        self._samples = {}
+        self._totals = {}
+        self._counters = {}
+        self._last_frame = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        """Context manager timing one run of stage ``name``"""
+        return _StageTimer(self, name)
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+                self._totals[stage] = [0, 0.0]
+            samples.append(seconds)
+            totals = self._totals[stage]
+            totals[0] += 1
+            totals[1] += seconds
+
+    def count(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def record_frame(self, **counts):
+        """Count one finished frame with its per-frame counts (persons, faces, ...)"""
+        with self._lock:
+            self._counters['frames'] = self._counters.get('frames', 0) + 1
+            for name, value in counts.items():
+                self._counters[name] = self._counters.get(name, 0) + value
+            self._last_frame = counts
+
+    def snapshot(self):
+        """Stage quantiles in milliseconds, counters and per-frame averages"""
+        with self._lock:
+            samples = {stage: np.array(values) for stage, values in self._samples.items() if values}
+            totals = {stage: list(values) for stage, values in self._totals.items()}
+            counters = dict(self._counters)
+            last_frame = dict(self._last_frame)
+        stages = {}
+        for stage, values in samples.items():
+            p50, p95, p99 = np.percentile(values, [q * 100 for q in QUANTILES]) * 1000
+            stages[stage] = {'p50_ms': round(float(p50), 3), 'p95_ms': round(float(p95), 3),
+                             'p99_ms': round(float(p99), 3), 'count': totals[stage][0],
+                             'mean_ms': round(totals[stage][1] * 1000 / totals[stage][0], 3)}
+        frames = counters.get('frames', 0)
+        per_frame = {name: round(value / frames, 3) for name, value in counters.items()
+                     if frames and name != 'frames'}
+        return {'uptime_s': round(time.time() - self.started, 1), 'stages': stages, 'counters': counters,
+                'per_frame': per_frame, 'last_frame': last_frame}
+
+    def prometheus(self, prefix='persontracker'):
+        """Prometheus text exposition: one summary for stage latency plus a counter per count"""
+        with self._lock:
+            samples = {stage: np.array(values) for stage, values in self._samples.items() if values}
+            totals = {stage: list(values) for stage, values in self._totals.items()}
+            counters = dict(self._counters)
+        lines = [f"# HELP {prefix}_stage_latency_seconds Per-stage processing latency",
+                 f"# TYPE {prefix}_stage_latency_seconds summary"]
+        for stage, values in sorted(samples.items()):
+            for q, value in zip(QUANTILES, np.percentile(values, [q * 100 for q in QUANTILES])):
+                lines.append(f'{prefix}_stage_latency_seconds{{stage="{stage}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'{prefix}_stage_latency_seconds_sum{{stage="{stage}"}} {totals[stage][1]:.6f}')
+            lines.append(f'{prefix}_stage_latency_seconds_count{{stage="{stage}"}} {totals[stage][0]}')
+        for name, value in sorted(counters.items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        return '\n'.join(lines) + '\n'
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class NullMetrics:
+    """Drop-in for :class:`Metrics` when instrumentation is off; every call is a no-op"""
+    enabled = False
+    _timer = _NullTimer()
+
+    def stage(self, name):
+        return self._timer
+
+    def observe(self, stage, seconds):
+        pass
+
+    def count(self, name, value=1):
+        pass
+
+    def record_frame(self, **counts):
+        pass
+
+    def snapshot(self):
+        return {'stages': {}, 'counters': {}, 'per_frame': {}, 'last_frame': {}}
+
+    def prometheus(self, prefix='persontracker'):
+        return ''
+
+NULL_METRICS = NullMetrics()
@@ -0,0 +1,125 @@
+# Lazy model initialisation for gui.py and WebApp/server.py
+# Nothing heavy (Ultralytics/PyTorch, ONNX Runtime, FER/TensorFlow) is imported until a model
+# is first used or preloaded on a background thread, and disabled stages never load at all.
+
+import os
+import threading
+import time
+
+from backends import DetectorBackend, load_detector, resolve_variant
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+PERSON_ONNX_PATH = os.path.join(MODELS_DIR, 'yolov8n.onnx')
+FACE_ONNX_PATH = os.path.join(MODELS_DIR, 'yolov8n-face-lindevs.onnx')
+FACE_PT_PATH = os.path.join(MODELS_DIR, 'archive', 'yolov8n-face-lindevs.pt')
+
+class LazyModel:
+    """A model created on first use; :meth:`load` is thread-safe and runs the loader once"""
+    def __init__(self, name):
+        self.name = name
+        self.load_seconds = None
+        self.error = None
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _create(self):
+        raise NotImplementedError
+
+    def load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    start = time.perf_counter()
+                    try:
+                        self._model = self._create()
+                    except Exception as e:
+                        self.error = str(e)
+                        raise
+                    self.load_seconds = round(time.perf_counter() - start, 3)
+                    print(f"✅ {self.name} loaded in {self.load_seconds:.2f}s")
+        return self._model
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    def status(self):
+        return {'loaded': self.loaded, 'load_seconds': self.load_seconds, 'error': self.error}
+
+class LazyDetector(LazyModel, DetectorBackend):
+    """DetectorBackend that calls :func:`backends.load_detector` on first use"""
+    def __init__(self, name, path, backend='ultralytics', **options):
+        LazyModel.__init__(self, name)
+        self.path = path
+        self.backend = backend
+        self.options = options
+        # Known without loading: only the Ultralytics backend tracks by itself
+        # (load_detector falls back to it for non-ONNX files)
+        self.supports_tracking = not (backend == 'onnxruntime' and str(path).endswith('.onnx'))
+
+    def _create(self):
+        return load_detector(self.path, self.backend, **self.options)
+
+    def detect(self, images, conf=0.25, iou=0.45, imgsz=640, classes=None):
+        return self.load().detect(images, conf=conf, iou=iou, imgsz=imgsz, classes=classes)
+
+    def warmup(self, imgsz=640, batch=1):
+        return self.load().warmup(imgsz, batch)
+
+    def track(self, frame, **kwargs):
+        return self.load().track(frame, **kwargs)
+
+class LazyEmotionDetector(LazyModel):
+    """FER, imported (with TensorFlow) only when the first emotion is requested"""
+    def _create(self):
+        from fer import FER
+        return FER()
+
+    def detect_emotions(self, img, face_rectangles=None):
+        return self.load().detect_emotions(img, face_rectangles=face_rectangles)
+
+def load_model_set(backend='ultralytics', intra_op_threads=0, model_variant='fp32', faces=True, emotions=True):
+    """Lazy (person_model, face_model, emotion_detector); disabled stages are None.
+
+    ONNX models from models/ are preferred, with the PyTorch weights as fallback.
+    Only file paths are checked here, so this returns immediately.
+    """
+    options = {'intra_op_threads': intra_op_threads} if backend == 'onnxruntime' else {}
+    if os.path.exists(PERSON_ONNX_PATH):
+        person_model = LazyDetector('Person detector (ONNX)', resolve_variant(PERSON_ONNX_PATH, model_variant),
+                                    backend, **options)
+    else:
+        print("⚠️ ONNX person model not found, using PyTorch weights")
+        person_model = LazyDetector('Person detector (PyTorch)', 'yolov8n.pt')
+    face_model = None
+    if faces:
+        if os.path.exists(FACE_ONNX_PATH):
+            face_model = LazyDetector('Face detector (ONNX)', resolve_variant(FACE_ONNX_PATH, model_variant),
+                                      backend, **options)
+        elif os.path.exists(FACE_PT_PATH):
+            print("⚠️ ONNX face model not found, using PyTorch weights")
+            face_model = LazyDetector('Face detector (PyTorch)', FACE_PT_PATH)
+        else:
+            raise FileNotFoundError("No face detection model found!")
+    emotion_detector = LazyEmotionDetector('Emotion detector (FER)') if emotions else None
+    return person_model, face_model, emotion_detector
+
+def preload(models):
+    """Load ``models`` (None entries are skipped) one after another on a background thread"""
+    def run():
+        for model in models:
+            if model is None:
+                continue
+            try:
+                model.load()
+            except Exception as e:
+                print(f"❌ {model.name} failed to load: {e}")
+    thread = threading.Thread(target=run, name='model-preload', daemon=True)
+    thread.start()
+    return thread
+
+def models_ready(models):
+    return all(model is None or model.loaded for model in models)
+
+def models_failed(models):
+    return [model.name for model in models if model is not None and model.error]
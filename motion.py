@@ -0,0 +1,161 @@
+# Motion gate and region-of-interest masks for PersonTrackerEngine
+# Lets mostly-empty cameras skip person, face and emotion inference on idle frames and restrict
+# detection to the parts of the image that matter.
+
+import time
+
+import cv2
+import numpy as np
+
+MOTION_METHODS = ('diff', 'mog2')
+
+def parse_polygon(text):
+    """'x1,y1 x2,y2 x3,y3 ...' (processing-frame pixels) -> list of (x, y) points"""
+    points = [tuple(int(float(v)) for v in pair.split(',')) for pair in text.replace(';', ' ').split()]
+    if len(points) < 3 or any(len(point) != 2 for point in points):
+        raise ValueError(f"ROI polygon needs at least 3 'x,y' points, got '{text}'")
+    return points
+
+class RoiMask:
+    """Union of polygons in processing-frame pixels (1280x720).
+
+    ``bounds`` is the bounding rectangle of all polygons, which is the crop the
+    person detector sees; detections and face lookups are kept only when the
+    box center falls inside a polygon.
+    """
+    def __init__(self, polygons, size=(1280, 720)):
+        width, height = size
+        self.polygons = [np.asarray(polygon, dtype=np.int32).reshape(-1, 2) for polygon in polygons]
+        self.mask = np.zeros((height, width), dtype=np.uint8)
+        cv2.fillPoly(self.mask, self.polygons, 255)
+        points = np.concatenate(self.polygons)
+        x1, y1 = np.clip(points.min(axis=0), 0, [width, height])
+        x2, y2 = np.clip(points.max(axis=0) + 1, 0, [width, height])
+        self.bounds = (int(x1), int(y1), int(x2), int(y2))
+
+    def contains(self, x, y):
+        x, y = int(x), int(y)
+        return 0 <= y < self.mask.shape[0] and 0 <= x < self.mask.shape[1] and self.mask[y, x] > 0
+
+    def filter(self, detections, offset=(0, 0)):
+        """Shift (N, 6) detections from crop to frame coordinates and drop those centered outside the ROI"""
+        if not len(detections):
+            return detections
+        detections = detections.copy()
+        detections[:, [0, 2]] += offset[0]
+        detections[:, [1, 3]] += offset[1]
+        cx = ((detections[:, 0] + detections[:, 2]) / 2).astype(int).clip(0, self.mask.shape[1] - 1)
+        cy = ((detections[:, 1] + detections[:, 3]) / 2).astype(int).clip(0, self.mask.shape[0] - 1)
+        return detections[self.mask[cy, cx] > 0]
+
+    def resized(self, size):
+        """The mask at another resolution (e.g. the motion gate's downscaled frame)"""
+        return cv2.resize(self.mask, size, interpolation=cv2.INTER_NEAREST)
+
+    def draw(self, frame, color=(0, 200, 255)):
+        cv2.polylines(frame, self.polygons, True, color, 1)
+        return frame
+
+class MotionGate:
+    """Decides per frame whether anything moved enough to be worth running inference.
+
+    Works on a blurred grayscale copy downscaled to ``width`` pixels. 'diff'
+    compares it with the last frame that showed motion, so slow changes (a
+    person walking a fraction of a thumbnail pixel per frame) still add up;
+    'mog2' uses OpenCV's adaptive MOG2 background subtractor. A frame counts as
+    motion when more than ``min_changed`` of the (ROI) pixels change by more
+    than ``threshold`` gray levels.
+
+    The gate stays busy for ``hold`` seconds after the last motion and while
+    the caller reports live tracks (``active``), so tracks are not frozen
+    between motion frames; at least one frame every ``max_idle`` seconds is
+    let through anyway.
+
+    Also keeps process CPU time per state: the time between two updates is
+    booked to the state of the earlier frame (see :meth:`report`).
+    """
+    def __init__(self, method='diff', min_changed=0.002, threshold=10, width=160, roi=None, max_idle=30.0,
+                 hold=1.0):
+        if method not in MOTION_METHODS:
+            raise ValueError(f"Unknown motion method '{method}', expected one of {MOTION_METHODS}")
+        self.method = method
+        self.min_changed = min_changed
+        self.threshold = threshold
+        self.width = width
+        self.roi = roi
+        self.max_idle = max_idle
+        self.hold = hold
+        self._mask = None
+        self._reference = None
+        self._subtractor = cv2.createBackgroundSubtractorMOG2(detectShadows=False) if method == 'mog2' else None
+        self._last_busy = 0.0
+        self._last_motion = None
+        self._last_clock = None
+        self._last_state = None
+        self.changed = 0.0
+        self.usage = {state: {'frames': 0, 'cpu_s': 0.0, 'wall_s': 0.0} for state in ('busy', 'idle')}
+
+    def reset(self):
+        """Forget the reference frame and background model (e.g. after a resolution change)"""
+        self._reference = None
+        self._last_motion = None
+        if self._subtractor is not None:
+            self._subtractor = cv2.createBackgroundSubtractorMOG2(detectShadows=False)
+
+    def _small_gray(self, frame):
+        h, w = frame.shape[:2]
+        size = (self.width, max(1, round(h * self.width / w)))
+        gray = cv2.cvtColor(cv2.resize(frame, size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        if self.roi is not None and self._mask is None:
+            self._mask = self.roi.resized(size) > 0
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def update(self, frame, now=None, active=False):
+        """True when ``frame`` should run inference, False to reuse the last results.
+
+        ``active`` is True while the caller still has live tracks to follow.
+        """
+        now = time.time() if now is None else now
+        gray = self._small_gray(frame)
+        if self._subtractor is not None:
+            changed = self._subtractor.apply(gray) > 0
+        elif self._reference is None:
+            changed = None
+        else:
+            changed = cv2.absdiff(gray, self._reference) > self.threshold
+        if changed is not None:
+            if self._mask is not None:
+                self.changed = np.count_nonzero(changed & self._mask) / max(1, np.count_nonzero(self._mask))
+            else:
+                self.changed = np.count_nonzero(changed) / changed.size
+        motion = changed is None or self.changed > self.min_changed
+        if motion:
+            # Only motion moves the reference, so sub-threshold changes keep adding up across held frames
+            self._reference = gray
+            self._last_motion = now
+        held = self._last_motion is not None and now - self._last_motion < self.hold
+        busy = motion or held or active or now - self._last_busy >= self.max_idle
+        if busy:
+            self._last_busy = now
+        self._account(busy)
+        return busy
+
+    def _account(self, busy):
+        cpu, wall = time.process_time(), time.perf_counter()
+        if self._last_clock is not None:
+            bucket = self.usage['busy' if self._last_state else 'idle']
+            bucket['cpu_s'] += cpu - self._last_clock[0]
+            bucket['wall_s'] += wall - self._last_clock[1]
+        self.usage['busy' if busy else 'idle']['frames'] += 1
+        self._last_clock = (cpu, wall)
+        self._last_state = busy
+
+    def report(self):
+        """Frames, wall/CPU seconds and CPU seconds per hour while idle and while busy"""
+        report = {}
+        for state, usage in self.usage.items():
+            wall = usage['wall_s']
+            report[state] = dict(usage, cpu_s=round(usage['cpu_s'], 2), wall_s=round(wall, 2),
+                                 cpu_s_per_hour=round(usage['cpu_s'] / wall * 3600, 1) if wall else 0.0,
+                                 cpu_percent=round(usage['cpu_s'] / wall * 100, 1) if wall else 0.0)
+        return report
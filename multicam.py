@@ -0,0 +1,182 @@
+# Multi-camera mode: several video sources served by one process and one set of models
+# Each source has its own capture reader thread and PersonTrackerEngine (ByteTrack, trails, emotions);
+# a central scheduler batches person detection for all sources into one model call.
+
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from capture import LatestFrameReader
+from engine import PersonTrackerEngine, create_tracker
+from renderer import draw_result
+
+class CameraSource:
+    """One webcam ID, video file or stream URL read by a LatestFrameReader (see capture.py).
+
+    Only the newest frame is kept, so a slow round never builds up latency;
+    files are read at their native frame rate like a camera would deliver them.
+    """
+    def __init__(self, index, spec, max_fps=0.0, decode_width=1280, metrics=None):
+        self.index = index
+        self.spec = spec
+        self.name = f"Cam {spec}" if str(spec).isdigit() else os.path.basename(str(spec).rstrip('/')) or str(spec)
+        self.max_fps = max_fps
+        self.reader = LatestFrameReader(int(spec) if str(spec).isdigit() else spec, decode_width=decode_width,
+                                        metrics=metrics)
+        # Scheduler state
+        self.engine = None
+        self.next_due = 0.0
+        self.last_served = 0.0
+        self.processed = 0
+        self.fps = 0.0
+
+    @property
+    def ended(self):
+        return self.reader.ended
+
+    def ready(self, now):
+        """A new frame is waiting and the source is under its FPS cap"""
+        return self.reader.has_frame() and now >= self.next_due
+
+    def take(self, now):
+        """Hand the newest frame to the scheduler (None if there is none) and book the FPS cap"""
+        frame = self.reader.poll()
+        if frame is not None:
+            self.last_served = now
+            if self.max_fps > 0:
+                self.next_due = max(now, self.next_due) + 1.0 / self.max_fps
+        return frame
+
+    def stop(self):
+        self.reader.release()
+
+class MultiCameraScheduler:
+    """Serves several CameraSources from one set of models.
+
+    Every round takes up to ``batch_size`` sources that have a new frame and
+    are under their ``max_fps`` cap, least recently served first, so a fast
+    camera cannot starve the others. Sources that need the detector this frame
+    (see ``PersonTrackerEngine.begin_frame``) go through one batched person-model
+    call (with tiling, one batch of tiles per source); each source's own
+    tracker, face and emotion state is then updated.
+    The newest rendered frame and result per source are kept for display.
+    """
+    def __init__(self, person_model, face_model, emotion_detector, sources, batch_size=8, render=True,
+                 **engine_kwargs):
+        self.sources = sources
+        self.batch_size = max(1, int(batch_size))
+        self.render = render
+        for source in sources:
+            source.engine = PersonTrackerEngine(person_model, face_model, emotion_detector,
+                                                tracker=create_tracker(), **engine_kwargs)
+        self.paused = False
+        self.detector_calls = 0
+        self.batched_frames = 0
+        self._outputs = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def select(self, now):
+        ready = [source for source in self.sources if source.ready(now)]
+        ready.sort(key=lambda source: source.last_served)
+        return ready[:self.batch_size]
+
+    def step(self):
+        """Run one scheduling round; returns the number of frames processed"""
+        now = time.time()
+        pending = []
+        for source in self.select(now):
+            frame = source.take(now)
+            if frame is not None:
+                frame, tracks = source.engine.begin_frame(frame)
+                pending.append([source, frame, tracks])
+        if not pending:
+            return 0
+        keyframes = [entry for entry in pending if entry[2] is None]
+        if keyframes and keyframes[0][0].engine.tiler is not None:
+            # With tiling every source's tiles already make up one batch of their own
+            for entry in keyframes:
+                engine = entry[0].engine
+                detections = engine.detect_keyframe(entry[1])
+                entry[2] = engine.end_keyframe(entry[1], engine.track_detections(entry[1], detections))
+            self.detector_calls += len(keyframes)
+            self.batched_frames += len(keyframes)
+        elif keyframes:
+            # Engines share the person model and thresholds, so any of them can run the batched call
+            detections = keyframes[0][0].engine.detect_persons([entry[1] for entry in keyframes])
+            for entry, source_detections in zip(keyframes, detections):
+                engine = entry[0].engine
+                entry[2] = engine.end_keyframe(entry[1], engine.track_detections(entry[1], source_detections))
+            self.detector_calls += 1
+            self.batched_frames += len(keyframes)
+        for source, frame, tracks in pending:
+            engine = source.engine
+            engine.analyze_faces(frame, tracks, now, detect=engine.last_keyframe)
+            result = engine.build_result(frame, tracks, engine.update_fps())
+            draw_frame = None
+            if self.render:
+                with engine.metrics.stage("render"):
+                    draw_frame = draw_result(frame, result, copy=False, trails=[track["trail"] for track in tracks])
+            source.processed += 1
+            source.fps = result["fps"]
+            with self._lock:
+                self._outputs[source.index] = (source.processed, draw_frame, result)
+        return len(pending)
+
+    def latest(self):
+        """{source index: (sequence number, draw_frame, result)} for the newest frame of each source"""
+        with self._lock:
+            return dict(self._outputs)
+
+    def finished(self):
+        return all(source.ended for source in self.sources) and not any(
+            source.ready(float('inf')) for source in self.sources)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            if self.paused or not self.step():
+                if self.finished():
+                    return
+                time.sleep(0.002)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name='multicam-scheduler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        for source in self.sources:
+            source.stop()
+
+    def report(self):
+        """Per-source processed FPS and capture drops, plus the mean person-detector batch size"""
+        return {
+            'mean_batch': round(self.batched_frames / self.detector_calls, 2) if self.detector_calls else 0.0,
+            'sources': [dict(source.reader.stats(), name=source.name, processed=source.processed, fps=source.fps)
+                        for source in self.sources],
+        }
+
+def mosaic(frames, labels, tile_size=(640, 360), cols=None):
+    """Tile ``frames`` (None = no frame yet) into one grid image with a label per tile"""
+    count = max(1, len(frames))
+    cols = cols or int(np.ceil(np.sqrt(count)))
+    rows = int(np.ceil(count / cols))
+    tile_w, tile_h = tile_size
+    canvas = np.zeros((rows * tile_h, cols * tile_w, 3), dtype=np.uint8)
+    for i, (frame, label) in enumerate(zip(frames, labels)):
+        r, c = divmod(i, cols)
+        tile = canvas[r * tile_h:(r + 1) * tile_h, c * tile_w:(c + 1) * tile_w]
+        if frame is not None:
+            tile[:] = cv2.resize(frame, tile_size, interpolation=cv2.INTER_AREA)
+        else:
+            cv2.putText(tile, "waiting...", (20, tile_h // 2), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (120, 120, 120), 1)
+        cv2.rectangle(tile, (0, 0), (tile_w - 1, tile_h - 1), (80, 80, 80), 1)
+        cv2.putText(tile, label, (10, tile_h - 12), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 1)
+    return canvas
@@ -0,0 +1,233 @@
+# Asynchronous multi-stage pipeline for PersonTrackerEngine
+# capture → detect/track → face/emotion → render, one worker thread per stage
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from renderer import draw_result
+
+QUEUE_POLICIES = ('drop_oldest', 'block')
+
+# Marks the end of the input stream as it travels through the stages
+END_OF_STREAM = object()
+
+class DroppedFrameError(Exception):
+    """Raised on a frame's future when a full queue discarded it"""
+
+class StageQueue:
+    """Bounded queue between two stages with a configurable full-queue policy.
+
+    ``drop_oldest`` keeps latency low by discarding the oldest waiting frame,
+    ``block`` applies back-pressure to the producing stage instead.
+    ``on_drop`` is called with every discarded packet.
+    """
+    def __init__(self, maxsize=2, policy='drop_oldest', on_drop=None):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self.policy = policy
+        self.on_drop = on_drop
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max(1, maxsize))
+
+    def put(self, item, stop_event):
+        if item is END_OF_STREAM or self.policy == 'block':
+            while not stop_event.is_set():
+                try:
+                    self._queue.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+            return
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    old = self._queue.get_nowait()
+                except queue.Empty:
+                    continue
+                if old is END_OF_STREAM:
+                    # Never drop the end marker, wait for room instead
+                    self._queue.put(old)
+                    continue
+                self.dropped += 1
+                if self.on_drop is not None:
+                    self.on_drop(old)
+                future = old.get('future')
+                if future is not None and not future.done():
+                    future.set_exception(DroppedFrameError("Frame dropped by full pipeline queue"))
+
+    def get(self, timeout=None):
+        return self._queue.get(timeout=timeout)
+
+    def qsize(self):
+        return self._queue.qsize()
+
+class StageStats:
+    """Rolling latency samples and counters for one pipeline stage"""
+    def __init__(self, window=200):
+        self.latencies = deque(maxlen=window)
+        self.processed = 0
+        self.errors = 0
+
+    def record(self, seconds):
+        self.latencies.append(seconds)
+        self.processed += 1
+
+    def summary(self):
+        if self.latencies:
+            samples = np.array(self.latencies) * 1000.0
+            mean_ms, p95_ms = float(samples.mean()), float(np.percentile(samples, 95))
+        else:
+            mean_ms = p95_ms = 0.0
+        return {'latency_ms': mean_ms, 'latency_p95_ms': p95_ms, 'processed': self.processed, 'errors': self.errors}
+
+class FramePipeline:
+    """Runs PersonTrackerEngine stages on worker threads linked by bounded queues.
+
+    With a ``source`` (anything with a ``read()`` like ``cv2.VideoCapture``) a
+    capture thread feeds the pipeline and results are pulled with :meth:`get`.
+    Without one, frames are pushed with :meth:`submit`, which returns a future
+    resolving to ``(draw_frame, result)`` where ``result`` is the structured
+    output of ``PersonTrackerEngine.build_result`` and ``draw_frame`` is None
+    when rendering was not requested.
+    Submitted frames may name their own engine, so several tracker states can
+    share one pipeline (and its models) as long as they share model objects.
+    ``postprocess`` is an optional callable run on the render thread with the
+    finished packet (e.g. the GUI overlay).
+    """
+    STAGES = ('capture', 'track', 'faces', 'render')
+
+    def __init__(self, engine, source=None, queue_size=2, policy='drop_oldest', postprocess=None):
+        self.engine = engine
+        self.source = source
+        self.policy = policy
+        self.postprocess = postprocess
+        self.paused = False
+        self._stop = threading.Event()
+        self._threads = []
+        self.queues = {name: StageQueue(queue_size, policy, on_drop=self._count_drop)
+                       for name in ('track', 'faces', 'render', 'output')}
+        self.stats = {stage: StageStats() for stage in self.STAGES}
+
+    def start(self):
+        workers = [
+            ('track', self._track, 'faces'),
+            ('faces', self._faces, 'render'),
+            ('render', self._render, 'output'),
+        ]
+        if self.source is not None:
+            self._threads.append(threading.Thread(target=self._capture_loop, name='pipeline-capture', daemon=True))
+        for stage, fn, next_queue in workers:
+            thread = threading.Thread(target=self._stage_loop, args=(stage, fn, next_queue),
+                                      name=f'pipeline-{stage}', daemon=True)
+            self._threads.append(thread)
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+        self._threads = []
+
+    def submit(self, frame, engine=None, render=True):
+        """Push a frame into the pipeline and return a future for its result"""
+        future = Future()
+        packet = {'frame': frame, 'time': time.time(), 'future': future, 'engine': engine or self.engine,
+                  'render': render}
+        self.queues['track'].put(packet, self._stop)
+        return future
+
+    def get(self, timeout=None):
+        """Next finished packet, ``END_OF_STREAM`` when the source ran dry, or None on timeout"""
+        try:
+            return self.queues['output'].get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def report(self):
+        """Per-stage latency, queue depth and drop counts"""
+        report = {}
+        for stage in self.STAGES:
+            entry = self.stats[stage].summary()
+            input_queue = self.queues.get(stage)
+            entry['queue_depth'] = input_queue.qsize() if input_queue else 0
+            entry['dropped'] = input_queue.dropped if input_queue else 0
+            report[stage] = entry
+        report['output'] = {'queue_depth': self.queues['output'].qsize(), 'dropped': self.queues['output'].dropped}
+        return report
+
+    @staticmethod
+    def _count_drop(packet):
+        packet['engine'].metrics.count('dropped_frames')
+
+    def _capture_loop(self):
+        stats = self.stats['capture']
+        while not self._stop.is_set():
+            if self.paused:
+                time.sleep(0.05)
+                continue
+            start = time.perf_counter()
+            ret, frame = self.source.read()
+            if not ret:
+                self.queues['track'].put(END_OF_STREAM, self._stop)
+                return
+            stats.record(time.perf_counter() - start)
+            self.engine.metrics.observe('capture', time.perf_counter() - start)
+            packet = {'frame': frame, 'time': time.time(), 'future': None, 'engine': self.engine, 'render': True}
+            self.queues['track'].put(packet, self._stop)
+
+    def _stage_loop(self, stage, fn, next_queue):
+        stats = self.stats[stage]
+        while not self._stop.is_set():
+            try:
+                packet = self.queues[stage].get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if packet is END_OF_STREAM:
+                self.queues[next_queue].put(END_OF_STREAM, self._stop)
+                return
+            start = time.perf_counter()
+            try:
+                fn(packet)
+            except Exception as e:
+                stats.errors += 1
+                print(f"Error in pipeline stage '{stage}': {e}")
+                if packet['future'] is not None and not packet['future'].done():
+                    packet['future'].set_exception(e)
+                continue
+            stats.record(time.perf_counter() - start)
+            if next_queue == 'output' and packet['future'] is not None:
+                # Submitted frames are delivered through their future only
+                continue
+            self.queues[next_queue].put(packet, self._stop)
+
+    def _track(self, packet):
+        packet['frame'], packet['tracks'] = packet['engine'].track_persons(packet['frame'])
+        packet['keyframe'] = packet['engine'].last_keyframe
+
+    def _faces(self, packet):
+        packet['engine'].analyze_faces(packet['frame'], packet['tracks'], packet['time'], detect=packet['keyframe'])
+
+    def _render(self, packet):
+        engine = packet['engine']
+        packet['result'] = engine.build_result(packet['frame'], packet['tracks'], engine.update_fps())
+        trails = [track['trail'] for track in packet['tracks']]
+        # Each packet owns its frame, so annotations are drawn onto it directly
+        packet['draw_frame'] = None
+        if packet['render']:
+            with engine.metrics.stage('render'):
+                packet['draw_frame'] = draw_result(packet['frame'], packet['result'], copy=False, trails=trails)
+        if self.postprocess is not None:
+            self.postprocess(packet)
+        future = packet['future']
+        if future is not None and not future.done():
+            future.set_result((packet['draw_frame'], packet['result']))
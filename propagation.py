@@ -0,0 +1,111 @@
+# Cheap track propagation between detector keyframes
+# Sparse Lucas-Kanade optical flow on a downscaled frame plus an adaptive keyframe cadence
+
+import cv2
+import numpy as np
+
+class OpticalFlowPropagator:
+    """Follows feature points inside each track box from one keyframe to the next.
+
+    :meth:`reset` samples corners inside every track box on a keyframe;
+    :meth:`step` tracks them into the next frame and returns, per track, the
+    median displacement since the keyframe in full-resolution pixels.
+    """
+    def __init__(self, scale=0.5, max_points_per_track=15):
+        self.scale = scale
+        self.max_points_per_track = max_points_per_track
+        self._prev_gray = None
+        self._points = np.zeros((0, 2), dtype=np.float32)
+        self._origin = self._points
+        self._owners = np.zeros(0, dtype=np.int64)
+        self._initial_count = 0
+
+    def _gray(self, frame):
+        small = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def reset(self, frame, tracks):
+        gray = self._gray(frame)
+        h, w = gray.shape
+        points, owners = [], []
+        for track in tracks:
+            x1, y1, x2, y2 = (int(v * self.scale) for v in track["box"])
+            x1, y1, x2, y2 = max(0, x1), max(0, y1), min(w, x2), min(h, y2)
+            if x2 - x1 < 8 or y2 - y1 < 8:
+                continue
+            corners = cv2.goodFeaturesToTrack(gray[y1:y2, x1:x2], maxCorners=self.max_points_per_track,
+                                              qualityLevel=0.01, minDistance=4)
+            if corners is None:
+                continue
+            corners = corners.reshape(-1, 2) + (x1, y1)
+            points.append(corners)
+            owners.extend([track["id"]] * len(corners))
+        self._prev_gray = gray
+        self._points = np.concatenate(points).astype(np.float32) if points else np.zeros((0, 2), dtype=np.float32)
+        self._origin = self._points.copy()
+        self._owners = np.array(owners, dtype=np.int64)
+        self._initial_count = len(self._points)
+
+    def step(self, frame):
+        """Returns (displacements by track ID, median motion in px/frame, fraction of points lost)"""
+        gray = self._gray(frame)
+        if self._prev_gray is None or len(self._points) == 0:
+            self._prev_gray = gray
+            return {}, 0.0, 1.0 if self._initial_count else 0.0
+        new_points, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, self._points.reshape(-1, 1, 2), None,
+                                                         winSize=(15, 15), maxLevel=2)
+        ok = status.reshape(-1).astype(bool)
+        new_points = new_points.reshape(-1, 2)
+        motion = 0.0
+        if ok.any():
+            motion = float(np.median(np.linalg.norm(new_points[ok] - self._points[ok], axis=1))) / self.scale
+        self._points, self._origin, self._owners = new_points[ok], self._origin[ok], self._owners[ok]
+        self._prev_gray = gray
+
+        displacements = {}
+        deltas = (self._points - self._origin) / self.scale
+        for track_id in np.unique(self._owners):
+            dx, dy = np.median(deltas[self._owners == track_id], axis=0)
+            displacements[int(track_id)] = (float(dx), float(dy))
+        lost_ratio = 1.0 - len(self._points) / self._initial_count
+        return displacements, motion, lost_ratio
+
+class AdaptiveCadence:
+    """Decides how many frames may pass between person-detector keyframes.
+
+    The interval grows by one frame per calm propagated frame or keyframe (the
+    same tracks as at the previous keyframe) and is halved when motion is high,
+    optical-flow points are being lost, or the set of tracks changed. Growing on
+    keyframes matters at interval 1, where no frame is propagated. With
+    ``adaptive=False`` it stays fixed at ``max_interval``.
+    """
+    def __init__(self, max_interval=6, adaptive=True, motion_high=6.0, motion_low=1.5, lost_high=0.4):
+        self.max_interval = max(1, max_interval)
+        self.adaptive = adaptive
+        self.motion_high = motion_high
+        self.motion_low = motion_low
+        self.lost_high = lost_high
+        self.interval = 1 if adaptive else self.max_interval
+        self.keyframes = 0
+        self.propagated = 0
+
+    def update(self, motion, lost_ratio):
+        """Feed one propagated frame's flow statistics; returns True to force a keyframe now"""
+        if not self.adaptive:
+            return False
+        if motion > self.motion_high or lost_ratio > self.lost_high:
+            self.interval = max(1, self.interval // 2)
+            return True
+        if motion < self.motion_low:
+            self.interval = min(self.max_interval, self.interval + 1)
+        return False
+
+    def on_keyframe(self, previous_ids, current_ids):
+        """Tracks appearing or disappearing mean the scene is changing - detect more often, else less"""
+        self.keyframes += 1
+        if not self.adaptive:
+            return
+        if previous_ids != current_ids:
+            self.interval = max(1, self.interval // 2)
+        else:
+            self.interval = min(self.max_interval, self.interval + 1)
@@ -0,0 +1,57 @@
+# Optional renderer for PersonTrackerEngine results
+# Draws the structured per-frame result (see PersonTrackerEngine.build_result) with OpenCV
+
+import cv2
+import numpy as np
+
+PERSON_COLOR = (0, 0, 255)     # Red
+FACE_COLOR = (0, 255, 0)       # Green
+TRAIL_COLOR = (230, 230, 230)  # Light gray
+
+def trail_polylines(trails):
+    """Point arrays for cv2.polylines from a list of trails.
+
+    Trails that are already int32 arrays (the engine's ring-buffer snapshots)
+    are used as views; lists from a serialized result are converted with one
+    array construction for the whole frame rather than one per track.
+    """
+    if all(isinstance(trail, np.ndarray) for trail in trails):
+        return [trail.reshape(-1, 1, 2) for trail in trails if len(trail) > 1]
+    trails = [trail for trail in trails if len(trail) > 1]
+    if not trails:
+        return []
+    points = np.array([point for trail in trails for point in trail], dtype=np.int32).reshape(-1, 1, 2)
+    return np.split(points, np.cumsum([len(trail) for trail in trails])[:-1])
+
+def draw_result(frame, result, copy=True, trails=None):
+    """Draw person boxes, trails, faces and emotion labels for one frame result.
+
+    ``trails`` optionally supplies the per-track trail arrays directly, which
+    skips converting the result's JSON lists back to arrays.
+    """
+    draw_frame = frame.copy() if copy else frame
+    tracks = result["tracks"]
+    for track in tracks:
+        x1, y1, x2, y2 = track["box"]
+        cv2.rectangle(draw_frame, (x1, y1), (x2, y2), PERSON_COLOR, 2)
+        cv2.putText(draw_frame, f"ID: {track['id']}", (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, PERSON_COLOR, 2)
+    # Every trail in a single polylines call
+    polylines = trail_polylines(trails if trails is not None else [track["trail"] for track in tracks])
+    if polylines:
+        cv2.polylines(draw_frame, polylines, isClosed=False, color=TRAIL_COLOR, thickness=2)
+    for track in tracks:
+        for fx1, fy1, fx2, fy2 in track["faces"]:
+            cv2.rectangle(draw_frame, (fx1, fy1), (fx2, fy2), FACE_COLOR, 2)
+            cv2.putText(draw_frame, "Face", (fx1, fy1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, FACE_COLOR, 2)
+    for track in tracks:
+        # Only show emotions when a face was seen and emotion data exists
+        emotion = track["emotion"]
+        if emotion is None:
+            continue
+        fx1, fy1, fx2, fy2 = emotion["face"]
+        cv2.rectangle(draw_frame, (fx1, fy1), (fx2, fy2), FACE_COLOR, 2)
+        cv2.putText(draw_frame, "Face", (fx1, fy1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, FACE_COLOR, 2)
+        # Draw emotion text near the face
+        cv2.putText(draw_frame, f"Emotion: {emotion['label']} ({emotion['confidence']*100:.0f}%)",
+                    (fx1, fy2 + 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, FACE_COLOR, 2)
+    return draw_frame
@@ -0,0 +1,8 @@
+# Shared pytest setup: the modules live at the repository root (and in WebApp/), not in a package;
+# the stand-in models and synthetic scenes come from benchmarks/
+
+import os
+import sys
+
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path[:0] = [root_dir, os.path.join(root_dir, 'WebApp'), os.path.join(root_dir, 'benchmarks')]
@@ -0,0 +1,24 @@
+# Tests for PersonTrackerEngine with the stand-in models from benchmarks/stubs.py
+
+from engine import PersonTrackerEngine, create_tracker
+from scenes import SyntheticScene
+from stubs import BlobPersonModel, StubEmotionDetector, StubFaceModel
+
+def test_emotion_face_follows_propagated_box():
+    engine = PersonTrackerEngine(BlobPersonModel(), StubFaceModel(), StubEmotionDetector('neutral'),
+                                 tracker=create_tracker(), detect_interval=6, adaptive_cadence=False,
+                                 emotion_interval=0.0)
+    offsets = {}
+    propagated = 0
+    for frame in SyntheticScene(3).frames(30):
+        _, result = engine.analyze_frame(frame)
+        propagated += not engine.last_keyframe
+        for track in result['tracks']:
+            if track['emotion'] is None:
+                continue
+            offset = (track['emotion']['face'][0] - track['box'][0], track['emotion']['face'][1] - track['box'][1])
+            if engine.last_keyframe:
+                offsets[track['id']] = offset
+            elif track['id'] in offsets:
+                assert offset == offsets[track['id']]
+    assert propagated and offsets
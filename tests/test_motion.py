@@ -0,0 +1,48 @@
+# Tests for the motion gate: walking persons keep it busy, an empty scene lets it go idle
+
+import cv2
+import numpy as np
+
+from motion import MotionGate
+
+FPS = 15.0
+
+def background():
+    rng = np.random.default_rng(0)
+    texture = rng.integers(60, 140, (720, 1280), dtype=np.uint8)
+    return cv2.cvtColor(cv2.GaussianBlur(texture, (5, 5), 0), cv2.COLOR_GRAY2BGR)
+
+def walking_frames(count, step=3, size=(60, 150)):
+    """A person-sized blob crossing the background ``step`` pixels per frame"""
+    base = background()
+    frames = []
+    for i in range(count):
+        frame = base.copy()
+        x = 200 + i * step
+        cv2.rectangle(frame, (x, 300), (x + size[0], 300 + size[1]), (35, 35, 45), -1)
+        frames.append(frame)
+    return frames
+
+def test_walking_person_keeps_gate_busy():
+    gate = MotionGate('diff')
+    busy = [gate.update(frame, now=i / FPS) for i, frame in enumerate(walking_frames(90))]
+    assert all(busy)
+
+def test_slow_walker_keeps_gate_busy():
+    gate = MotionGate('diff')
+    busy = [gate.update(frame, now=i / FPS) for i, frame in enumerate(walking_frames(90, step=1))]
+    assert all(busy)
+
+def test_empty_scene_goes_idle_after_hold():
+    gate = MotionGate('diff', hold=1.0)
+    frame = background()
+    busy = [gate.update(frame, now=i / FPS) for i in range(60)]
+    assert busy[0]
+    assert not any(busy[int(FPS) + 1:])
+
+def test_live_tracks_keep_gate_busy():
+    gate = MotionGate('diff', hold=1.0)
+    frame = background()
+    gate.update(frame, now=0.0)
+    assert all(gate.update(frame, now=i / FPS, active=True) for i in range(1, 60))
+    assert not gate.update(frame, now=60 / FPS)
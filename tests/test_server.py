@@ -0,0 +1,78 @@
+# Tests for the web server: readiness with lazy and plain (already loaded) models, and the
+# /ws channel with several frames in flight
+
+import threading
+
+import cv2
+import pytest
+
+pytest.importorskip('flask_sock')
+
+import simple_websocket
+from werkzeug.serving import make_server
+
+import server
+from model_loader import LazyModel
+from protocol import pack_frame, unpack_result
+from scenes import SyntheticScene
+from sessions import SessionManager
+from stubs import BlobPersonModel, StubEmotionDetector, StubFaceModel
+
+class PlainModel:
+    """Any model object that is not a model_loader.LazyModel, e.g. a YOLO instance or a benchmark stub"""
+
+@pytest.fixture
+def client_for():
+    managers = []
+
+    def make(model_factory):
+        server.session_manager = SessionManager(model_factory, workers=2)
+        managers.append(server.session_manager)
+        return server.app.test_client()
+
+    yield make
+    for manager in managers:
+        manager.stop()
+    server.session_manager = None
+
+def test_ready_with_plain_models(client_for):
+    client = client_for(lambda: (PlainModel(), PlainModel(), None))
+    response = client.get('/ready')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['ready']
+    assert sorted(body['models']) == ['worker0/face', 'worker0/person', 'worker1/face', 'worker1/person']
+
+def test_ready_waits_for_lazy_models(client_for):
+    client = client_for(lambda: (PlainModel(), LazyModel('Face detector'), None))
+    response = client.get('/ready')
+    assert response.status_code == 503
+    assert not response.get_json()['models']['worker0/Face detector']['loaded']
+    assert response.get_json()['models']['worker0/person']['loaded']
+
+def test_socket_answers_frames_in_flight_in_order():
+    server.session_manager = SessionManager(
+        lambda: (BlobPersonModel(), StubFaceModel(), StubEmotionDetector('neutral')), workers=1,
+        max_pending=server.SOCKET_IN_FLIGHT, engine_kwargs={'frame_size': None})
+    httpd = make_server('127.0.0.1', 0, server.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        ws = simple_websocket.Client(f'ws://127.0.0.1:{httpd.port}/ws?session=test&mode=metadata')
+        frames = [cv2.imencode('.jpg', frame)[1].tobytes() for frame in SyntheticScene(3).frames(12)]
+        messages = [pack_frame(seq, jpeg) for seq, jpeg in enumerate(frames)]
+        messages.insert(6, b'\x01')  # malformed: shorter than the sequence number
+        replies = []
+        for i, message in enumerate(messages):
+            ws.send(message)
+            if i >= server.SOCKET_IN_FLIGHT - 1:
+                replies.append(unpack_result(ws.receive()))
+        while len(replies) < len(messages):
+            replies.append(unpack_result(ws.receive()))
+        ws.close()
+    finally:
+        httpd.shutdown()
+        server.session_manager.stop()
+        server.session_manager = None
+    failed = [header for _, header, _ in replies if not header['success']]
+    assert len(failed) == 1 and 'error' in failed[0]
+    assert [seq for seq, header, _ in replies if header['success']] == list(range(len(frames)))
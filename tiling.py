@@ -0,0 +1,177 @@
+# Tiled multi-scale person detection for high-resolution wide-angle cameras
+# The full-resolution frame is cut into overlapping tiles that go through the person model in one
+# batch together with a downscaled full-frame pass; the boxes are merged with cross-tile NMS before
+# they reach ByteTrack. Tiles without recent detections or motion are scheduled less often.
+
+import math
+
+import cv2
+import numpy as np
+
+def tile_size_for(frame_size, min_person_height, imgsz=416, min_detectable=32):
+    """Largest square tile (source pixels) in which a ``min_person_height`` person stays detectable.
+
+    The detector sees each tile scaled to ``imgsz``, and persons much smaller
+    than ``min_detectable`` pixels at that scale are missed, so the tile side is
+    at most ``min_person_height * imgsz / min_detectable``, but never below
+    ``imgsz`` (no upscaling) or above the frame's shorter side.
+    """
+    width, height = frame_size
+    tile = int(min_person_height * imgsz / min_detectable)
+    return max(imgsz, min(tile, width, height))
+
+def tile_grid(frame_size, tile_size, overlap=0.2):
+    """(x1, y1, x2, y2) tiles of side ``tile_size`` covering the frame, overlapping by at least ``overlap``.
+
+    Tiles are spread evenly so the last row and column end flush with the
+    frame edge; a frame smaller than a tile is a single tile.
+    """
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        count = math.ceil((length - tile_size) / (tile_size * (1 - overlap))) + 1
+        return [round(i * (length - tile_size) / (count - 1)) for i in range(count)]
+
+    width, height = frame_size
+    tile_w, tile_h = min(tile_size, width), min(tile_size, height)
+    return [(x, y, x + tile_w, y + tile_h) for y in starts(height) for x in starts(width)]
+
+def merge_detections(detections, iou_threshold=0.5, ios_threshold=0.8):
+    """Cross-tile NMS over (N, 6) [x1, y1, x2, y2, conf, cls] detections in frame coordinates.
+
+    Besides the usual IoU test, a box lying mostly inside a higher-scoring one
+    (intersection over the smaller area above ``ios_threshold``) is suppressed:
+    that is the part of a person a tile border cut off while a neighbouring
+    tile or the full-frame pass saw all of them.
+    """
+    if len(detections) < 2:
+        return detections
+    x1, y1, x2, y2 = detections[:, 0], detections[:, 1], detections[:, 2], detections[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+    order = detections[:, 4].argsort()[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        iw = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        ih = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = iw * ih
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+        ios = inter / np.maximum(np.minimum(areas[i], areas[rest]), 1e-9)
+        order = rest[(iou <= iou_threshold) & (ios <= ios_threshold)]
+    return detections[np.array(keep, dtype=np.int64)]
+
+class TiledDetector:
+    """Schedules, batches and merges tiles of one camera's full-resolution frames.
+
+    The tile size comes from the camera: a fixed ``tile_size`` in source pixels,
+    or one derived from its resolution and the smallest person height worth
+    detecting (``min_person_height``, see :func:`tile_size_for`).
+
+    Every call runs the downscaled full frame (for persons larger than a tile)
+    plus the tiles that are due: tiles with a detection in the last ``recent``
+    calls or motion since the previous call always, all others once every
+    ``idle_interval`` calls, staggered so the idle work is spread out.
+    ``max_tiles`` optionally caps the tiles per call, least recently run first.
+    """
+    def __init__(self, tile_size=None, min_person_height=48, overlap=0.2, idle_interval=8, recent=15,
+                 max_tiles=0, full_frame=True, motion_threshold=0.002, imgsz=416):
+        self.tile_size = tile_size
+        self.min_person_height = min_person_height
+        self.overlap = overlap
+        self.idle_interval = max(1, int(idle_interval))
+        self.recent = recent
+        self.max_tiles = max_tiles
+        self.full_frame = full_frame
+        self.motion_threshold = motion_threshold
+        self.imgsz = imgsz
+        self.tiles = []
+        self.calls = 0
+        self.tiles_run = 0
+        self._frame_size = None
+        self._reference = None
+
+    def _layout(self, frame_size):
+        tile_size = self.tile_size or tile_size_for(frame_size, self.min_person_height, self.imgsz)
+        self.tiles = tile_grid(frame_size, tile_size, self.overlap)
+        self.last_hit = np.full(len(self.tiles), -self.recent - 1, dtype=np.int64)
+        self.last_run = np.full(len(self.tiles), -1, dtype=np.int64)
+        self._frame_size = frame_size
+        self._reference = None
+        print(f"🧩 Tiling {frame_size[0]}x{frame_size[1]} into {len(self.tiles)} tiles of {tile_size}px "
+              f"({self.overlap:.0%} overlap)")
+
+    def _motion(self, frame):
+        """Share of changed pixels per tile since the previous call (None on the first)"""
+        h, w = frame.shape[:2]
+        scale = 160 / w
+        gray = cv2.cvtColor(cv2.resize(frame, (160, max(1, round(h * scale))), interpolation=cv2.INTER_AREA),
+                            cv2.COLOR_BGR2GRAY)
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+        reference, self._reference = self._reference, gray
+        if reference is None:
+            return None
+        changed = cv2.absdiff(gray, reference) > 25
+        motion = np.empty(len(self.tiles))
+        for i, (x1, y1, x2, y2) in enumerate(self.tiles):
+            cell = changed[int(y1 * scale):max(int(y1 * scale) + 1, int(y2 * scale)),
+                           int(x1 * scale):max(int(x1 * scale) + 1, int(x2 * scale))]
+            motion[i] = cell.mean() if cell.size else 0.0
+        return motion
+
+    def schedule(self, frame):
+        """Indices of the tiles to run on ``frame``"""
+        count = len(self.tiles)
+        motion = self._motion(frame)
+        due = (self.calls - self.last_hit <= self.recent) | (self.last_run < 0)
+        due |= (self.calls + np.arange(count)) % self.idle_interval == 0
+        if motion is not None:
+            due |= motion > self.motion_threshold
+        indices = np.flatnonzero(due)
+        if self.max_tiles and len(indices) > self.max_tiles:
+            indices = indices[np.argsort(self.last_run[indices], kind='stable')[:self.max_tiles]]
+        return indices
+
+    def detect(self, model, frame, conf=0.4, iou=0.5, classes=(0,)):
+        """(N, 6) detections in ``frame`` pixels from one batched call over the due tiles and full frame"""
+        frame_size = (frame.shape[1], frame.shape[0])
+        if frame_size != self._frame_size:
+            self._layout(frame_size)
+        due = self.schedule(frame)
+        images = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in (self.tiles[i] for i in due)]
+        if self.full_frame:
+            images.append(frame)
+        results = model.detect(images, conf=conf, iou=iou, imgsz=self.imgsz, classes=list(classes))
+        merged = []
+        for i, detections in zip(due, results):
+            if len(detections):
+                x1, y1 = self.tiles[i][:2]
+                detections = detections.copy()
+                detections[:, [0, 2]] += x1
+                detections[:, [1, 3]] += y1
+                self.last_hit[i] = self.calls
+                merged.append(detections)
+        if self.full_frame and len(results[-1]):
+            merged.append(results[-1])
+            # Persons the full-frame pass found keep the tiles around them active
+            cx = (results[-1][:, 0] + results[-1][:, 2]) / 2
+            cy = (results[-1][:, 1] + results[-1][:, 3]) / 2
+            for i, (x1, y1, x2, y2) in enumerate(self.tiles):
+                if np.any((cx >= x1) & (cx < x2) & (cy >= y1) & (cy < y2)):
+                    self.last_hit[i] = self.calls
+        self.last_run[due] = self.calls
+        self.calls += 1
+        self.tiles_run += len(due)
+        if not merged:
+            return np.zeros((0, 6), dtype=np.float32)
+        return merge_detections(np.concatenate(merged), iou_threshold=iou)
+
+    def report(self):
+        """Tile count and how many tiles an average call ran"""
+        return {
+            'tiles': len(self.tiles),
+            'calls': self.calls,
+            'tiles_per_call': round(self.tiles_run / self.calls, 2) if self.calls else 0.0,
+            'skipped_share': round(1 - self.tiles_run / (self.calls * len(self.tiles)), 3) if self.calls else 0.0,
+        }
@@ -0,0 +1,160 @@
+# Bounded per-track state for long-running trackers
+# Entries expire after a period without access (TTL) and the least recently used go first when full (LRU)
+
+from collections import OrderedDict
+
+import numpy as np
+
+class TrackStateStore:
+    """A size- and age-bounded replacement for ``defaultdict`` keyed by track ID.
+
+    Indexing a missing key creates its entry with ``factory`` like a
+    defaultdict; every access refreshes the entry's age and LRU position.
+    Time only advances through :meth:`expire`, which the engine calls once per
+    frame with the frame's timestamp, so video-time and wall-clock callers
+    behave the same. ``on_evict(key, value)`` is called for every entry
+    dropped by expiry, LRU eviction or :meth:`pop`.
+    """
+    def __init__(self, factory, max_tracks=256, ttl=30.0, on_evict=None):
+        self.factory = factory
+        self.on_evict = on_evict
+        self.max_tracks = max(1, int(max_tracks))
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._last_seen = {}
+        self._now = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evicted_ttl = 0
+        self.evicted_lru = 0
+
+    def _touch(self, key):
+        self._entries.move_to_end(key)
+        self._last_seen[key] = self._now
+
+    def _drop(self, key):
+        value = self._entries.pop(key)
+        del self._last_seen[key]
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+        return value
+
+    def _make_room(self):
+        # Evict before inserting so at most max_tracks entries ever exist
+        while len(self._entries) >= self.max_tracks:
+            self._drop(next(iter(self._entries)))
+            self.evicted_lru += 1
+
+    def __getitem__(self, key):
+        if key in self._entries:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._make_room()
+            self._entries[key] = self.factory()
+        self._touch(key)
+        return self._entries[key]
+
+    def __setitem__(self, key, value):
+        if key not in self._entries:
+            self._make_room()
+        self._entries[key] = value
+        self._touch(key)
+
+    def get(self, key, default=None):
+        """Look up ``key`` without creating it"""
+        if key not in self._entries:
+            return default
+        self._touch(key)
+        return self._entries[key]
+
+    def pop(self, key, default=None):
+        if key not in self._entries:
+            return default
+        return self._drop(key)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(list(self._entries))
+
+    def items(self):
+        return list(self._entries.items())
+
+    def expire(self, now):
+        """Advance the clock to ``now`` and drop entries not accessed for ``ttl`` seconds"""
+        self._now = now
+        if self.ttl is None:
+            return 0
+        cutoff = now - self.ttl
+        # Entries are in access order, so stale ones are at the front
+        expired = 0
+        while self._entries:
+            key = next(iter(self._entries))
+            if self._last_seen[key] >= cutoff:
+                break
+            self._drop(key)
+            expired += 1
+        self.evicted_ttl += expired
+        return expired
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'evicted_ttl': self.evicted_ttl,
+            'evicted_lru': self.evicted_lru,
+        }
+
+class TrailBuffer:
+    """Fixed-length trails for up to ``capacity`` tracks in one preallocated array.
+
+    Each track owns a slot (see :meth:`allocate`); points are written into a
+    per-slot ring buffer, so appending is O(1) and reading every trail back in
+    order is a single vectorized gather.
+    """
+    def __init__(self, capacity=256, length=30):
+        self.capacity = max(1, int(capacity))
+        self.length = max(2, int(length))
+        self.points = np.zeros((self.capacity, self.length, 2), dtype=np.float32)
+        self.heads = np.zeros(self.capacity, dtype=np.int64)
+        self.counts = np.zeros(self.capacity, dtype=np.int64)
+        self._free = list(range(self.capacity - 1, -1, -1))
+
+    def allocate(self):
+        """Claim an empty slot for a new track"""
+        if not self._free:
+            raise RuntimeError("TrailBuffer is full; release slots of evicted tracks")
+        slot = self._free.pop()
+        self.heads[slot] = 0
+        self.counts[slot] = 0
+        return slot
+
+    def release(self, slot):
+        self._free.append(slot)
+
+    def append(self, slots, points):
+        """Append one (x, y) point to each slot in ``slots``"""
+        slots = np.asarray(slots, dtype=np.int64)
+        if not len(slots):
+            return
+        self.points[slots, self.heads[slots]] = points
+        self.heads[slots] = (self.heads[slots] + 1) % self.length
+        self.counts[slots] = np.minimum(self.counts[slots] + 1, self.length)
+
+    def gather(self, slots):
+        """Ordered (oldest first) int32 trails for ``slots``, one (n, 2) array per slot"""
+        slots = np.asarray(slots, dtype=np.int64)
+        if not len(slots):
+            return []
+        counts = self.counts[slots]
+        index = (self.heads[slots, None] - counts[:, None] + np.arange(self.length)) % self.length
+        trails = self.points[slots[:, None], index].astype(np.int32)
+        return [trail[:count] for trail, count in zip(trails, counts)]